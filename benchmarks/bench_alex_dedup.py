@@ -0,0 +1,211 @@
+"""Benchmark: Alex's Telegram handler and message dedup, end to end.
+
+Drives the real process_telegram_update (routing, history, save, reply)
+against a throwaway SQLite DB. Gemini and the Telegram Bot API are replaced
+by fakes that sleep like the real calls. Each simulated user sends messages
+one after another while all users run concurrently; every update is also
+delivered a second time, as a Telegram webhook retry. Then every user's
+next message is saved and the process "crashes" before replying; after the
+restart (in-memory indexes dropped) Telegram retries it, and
+DatabaseService.load_last_message must catch the duplicate from the DB.
+
+The same workload also runs with one global dedup lock instead of the
+per-user stripes, for comparison.
+
+    python benchmarks/bench_alex_dedup.py [messages per user] [gemini latency ms]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["TOKEN_USAGE_DB"] = os.path.join(tempfile.mkdtemp(), "token_usage.db")
+os.environ["ALEX_TELEGRAM_BOT_TOKEN"] = "123456:bench"
+os.environ["GEMINI_API_KEY"] = "bench"
+
+from telegram.ext import Application
+from telegram.request import BaseRequest
+from services.db_executor import db_metrics
+from services.history_cache import HistoryCache
+from bots.alex.services import telegram_bot, database
+
+GEMINI_LATENCY = 0.1
+TELEGRAM_LATENCY = 0.02
+calls = {'router': 0, 'chat': 0, 'replies': 0}
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(prompt_token_count=200, candidates_token_count=20)
+
+
+class FakeChat:
+    def send_message(self, content):
+        # Called on a worker thread by send_message_with_retry, like the real SDK
+        calls['chat'] += 1
+        time.sleep(GEMINI_LATENCY)
+        return FakeResponse("<response>ha, fair point</response>")
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel: the router and chat calls only."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def generate_content_async(self, prompt):
+        calls['router'] += 1
+        await asyncio.sleep(GEMINI_LATENCY / 2)
+        return FakeResponse("SIMPLE")
+
+    def start_chat(self, history=None):
+        return FakeChat()
+
+
+class FakeTelegram(BaseRequest):
+    """Bot API stub: answers getMe and sendMessage after TELEGRAM_LATENCY."""
+
+    def __init__(self):
+        self.message_id = 0
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None):
+        endpoint = url.rsplit("/", 1)[-1]
+        if endpoint == "getMe":
+            result = {"id": 123456, "is_bot": True, "first_name": "Alex", "username": "alex_bench_bot"}
+        else:
+            await asyncio.sleep(TELEGRAM_LATENCY)
+            calls['replies'] += 1
+            self.message_id += 1
+            params = request_data.parameters if request_data else {}
+            result = {"message_id": self.message_id, "date": int(time.time()), "text": params.get("text", ""),
+                      "chat": {"id": int(params.get("chat_id", 0)), "type": "private"}}
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+def install_fakes():
+    telegram_bot.model = telegram_bot.fast_model = FakeModel()
+    telegram_bot.genai = SimpleNamespace(GenerativeModel=FakeModel)
+    # Same handlers as the real application, with the Bot API stubbed out
+    application = Application.builder().token(os.environ["ALEX_TELEGRAM_BOT_TOKEN"]) \
+        .request(FakeTelegram()).get_updates_request(FakeTelegram()).build()
+    for group, handlers in telegram_bot.application.handlers.items():
+        for handler in handlers:
+            application.add_handler(handler, group)
+    telegram_bot.application = application
+
+
+def restart():
+    """Forget everything a new process would not have: dedup caches and history rings."""
+    telegram_bot.processed_messages.clear()
+    telegram_bot.db._last_messages.clear()
+    database.history_cache = HistoryCache()
+
+
+def update(update_id: int, user: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": int(time.time()), "text": text,
+            "chat": {"id": user, "type": "private"},
+            "from": {"id": user, "is_bot": False, "first_name": f"user{user}"},
+        },
+    }
+
+
+def texts(user: int, messages: int):
+    return [f"hey, message {m} from {user}" for m in range(messages)]
+
+
+async def run(users: int, messages: int, first_user: int):
+    """Returns (messages/s, handler latencies) for one workload."""
+    latencies = []
+
+    async def deliver(data):
+        start = time.perf_counter()
+        await telegram_bot.process_telegram_update(data)
+        latencies.append(time.perf_counter() - start)
+
+    async def user(u):
+        for m, text in enumerate(texts(u, messages)):
+            data = update(u * 1000 + m, u, text)
+            # The webhook retry lands while the first delivery is still in flight
+            await asyncio.gather(deliver(data), deliver(data))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(u) for u in range(first_user, first_user + users)))
+    elapsed = time.perf_counter() - start
+    await telegram_bot.db.chat_logs.flush()
+    return users * messages / elapsed, sorted(latencies)
+
+
+async def retry_after_restart(users: int, first_user: int):
+    """Each user's message is saved, the process dies before replying, then Telegram retries it."""
+    pending = {u: f"still there? ({u})" for u in range(first_user, first_user + users)}
+    for u, text in pending.items():
+        await telegram_bot.db.save_message(str(u), "user", text, "telegram")
+    await telegram_bot.db.chat_logs.flush()
+    restart()
+    before = db_metrics.snapshot()["alex.chat_logs.history"]["calls"]
+    replies = calls['replies']
+    await asyncio.gather(*(
+        telegram_bot.process_telegram_update(update(u * 1000 + 999, u, text))
+        for u, text in pending.items()
+    ))
+    reads = db_metrics.snapshot()["alex.chat_logs.history"]["calls"] - before
+    return calls['replies'] - replies, reads
+
+
+async def main():
+    global GEMINI_LATENCY
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    GEMINI_LATENCY = (float(sys.argv[2]) if len(sys.argv) > 2 else 100) / 1000
+    install_fakes()
+    # Initialize up front: concurrent first webhooks would race application.start()
+    await telegram_bot.application.initialize()
+    await telegram_bot.application.start()
+    striped = telegram_bot.dedup_locks
+    global_lock = asyncio.Lock()
+
+    print(f"{messages} messages per user (each delivered twice), {GEMINI_LATENCY * 1000:.0f} ms Gemini, "
+          f"{TELEGRAM_LATENCY * 1000:.0f} ms Telegram, SQLite storage")
+    print(f"{'users':>6}{'stripes msg/s':>15}{'p95 ms':>9}{'global lock msg/s':>19}{'p95 ms':>9}"
+          f"{'replies':>9}{'dup replies':>13}{'retries answered after restart':>32}{'DB reads':>10}")
+    first_user = 1
+    for users in (1, 4, 16, 64):
+        row = []
+        for locks in (striped, lambda user_id: global_lock):
+            telegram_bot.dedup_locks = locks
+            replies = calls['replies']
+            rate, latencies = await run(users, messages, first_user)
+            row.append((rate, latencies[int(len(latencies) * 0.95)] * 1000, calls['replies'] - replies))
+            if locks is striped:
+                answered, reads = await retry_after_restart(users, first_user)
+            first_user += users
+        telegram_bot.dedup_locks = striped
+        (rate, p95, replies), (global_rate, global_p95, _) = row
+        print(f"{users:>6}{rate:>15.0f}{p95:>9.0f}{global_rate:>19.0f}{global_p95:>9.0f}"
+              f"{replies:>9}{replies - users * messages:>13}{answered:>32}{reads:>10}")
+    print(f"Gemini calls: {calls['router']} router, {calls['chat']} chat")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""Benchmark: Word of the Day broadcast cost per day.
+
+Fans the real send_word_of_day out to N chats through run_slot, against a
+throwaway SQLite DB, with Gemini, gTTS and Telegram replaced by counting
+fakes (each fake sleeps like the real call would). Prints how many
+generations, syntheses and uploads one day's broadcast costs.
+
+    python benchmarks/bench_daily_wod.py [chats]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("REVIEW_LOG_PATH", os.path.join(tempfile.mkdtemp(), "review_grades.jsonl"))
+
+from bots.english_coach import bot
+from bots.english_coach.services.subscribers import subscribers
+
+calls = {'gemini': 0, 'tts': 0, 'uploads': 0, 'file_id_sends': 0, 'messages': 0}
+
+
+async def fake_word_of_day():
+    calls['gemini'] += 1
+    await asyncio.sleep(0.5)
+    return {'word': 'synergy', 'definition': 'd', 'chinese': 'c', 'example': 'e'}
+
+
+async def fake_tts(text, engine='gtts', voice=None):
+    calls['tts'] += 1
+    await asyncio.sleep(0.3)
+    return b'\0' * 8000
+
+
+class FakeBot:
+    async def send_message(self, chat_id, text, **kwargs):
+        calls['messages'] += 1
+        await asyncio.sleep(0.01)
+
+    async def send_voice(self, chat_id, voice, **kwargs):
+        if isinstance(voice, str):
+            calls['file_id_sends'] += 1
+            await asyncio.sleep(0.01)
+            return None
+        calls['uploads'] += 1
+        await asyncio.sleep(0.2)
+        return SimpleNamespace(voice=SimpleNamespace(file_id='AwACAgQAAx-bench'), audio=None)
+
+
+async def main():
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bot.generate_word_of_day = fake_word_of_day
+    bot.text_to_speech = fake_tts
+    for chat_id in range(100000, 100000 + chats):
+        subscribers.subscribe(chat_id)
+
+    context = SimpleNamespace(bot=FakeBot(), job=SimpleNamespace(data=('wod', '09:00')))
+    start = time.perf_counter()
+    await bot.run_slot(context)
+    elapsed = time.perf_counter() - start
+    print(f"{chats} chats in {elapsed:.2f}s: {calls}")
+    print(f"old per-chat path would make {chats} Gemini calls, {chats} syntheses and {chats} uploads")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""Benchmark: importing a 500-word deck, per-word select+insert vs. batched upserts.
+
+Runs the real English Coach database functions against a throwaway SQLite file,
+counts DB round trips via db_metrics and estimates the Supabase cost from an
+assumed round-trip time (Gemini definitions are not included).
+
+    python benchmarks/bench_flashcard_import.py [words] [rtt ms]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from services.db_executor import execute_query, db_metrics
+from bots.english_coach.services import database
+
+
+def make_cards(n: int):
+    return [{
+        'word': f"word{i}",
+        'definition': f"definition of word {i}",
+        'ipa': "/wɜrd/",
+        'chinese': "词",
+        'example': f"We used word{i} in the board meeting.",
+    } for i in range(n)]
+
+
+async def legacy_import(cards, user_id):
+    """What importing looked like before: select then insert, per word."""
+    for card in cards:
+        existing = await execute_query(database.supabase.table('flashcards').select('id').eq('user_id', str(user_id)).eq('word', card['word']), "bench.legacy")
+        if not existing.data:
+            await execute_query(database.supabase.table('flashcards').insert({**card, 'user_id': str(user_id)}), "bench.legacy")
+
+
+async def batched_import(cards, user_id):
+    await database.save_flashcards(cards, user_id)
+
+
+def calls():
+    return sum(stats["calls"] for stats in db_metrics.snapshot().values())
+
+
+async def run(name, fn, cards, user_id, rtt):
+    before = calls()
+    start = time.perf_counter()
+    await fn(cards, user_id)
+    elapsed = time.perf_counter() - start
+    trips = calls() - before
+    print(f"{name:24}{elapsed * 1000:10.0f}{trips:8}{elapsed + trips * rtt:14.2f}")
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rtt = (float(sys.argv[2]) if len(sys.argv) > 2 else 30) / 1000
+    cards = make_cards(n)
+
+    print(f"{n} words, estimate assumes {rtt * 1000:.0f} ms per Supabase round trip")
+    print(f"{'':24}{'local ms':>10}{'trips':>8}{'est. remote s':>14}")
+    await run("select + insert per word", legacy_import, cards, 1, rtt)
+    await run("batched upsert", batched_import, cards, 2, rtt)
+    # Re-import: every word already exists
+    await run("batched re-import", batched_import, cards, 2, rtt)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""Benchmark: /memory latency vs. journal size, fetch-all + random.choice vs. the ID index.
+
+Runs the real English Coach database functions against a throwaway SQLite file.
+The index is loaded once per user per process; after that each /memory is one
+single-row fetch.
+
+    python benchmarks/bench_journal_memory.py [samples]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from services.db_executor import execute_query
+from bots.english_coach.services import database
+
+
+async def seed(user_id: int, n: int):
+    rows = [{
+        'user_id': str(user_id),
+        'entry_date': f"{2015 + i // 365}-{i // 30 % 12 + 1:02d}-{i % 28 + 1:02d}",
+        'entry': "1. grateful for the team\n2. sleep earlier\n3. finish the deck " * 5,
+    } for i in range(n)]
+    for start in range(0, n, 1000):
+        await execute_query(database.supabase.table('journal_entries').insert(rows[start:start + 1000]), "bench.seed")
+
+
+async def legacy_random(user_id: int):
+    result = await execute_query(database.supabase.table('journal_entries').select('*').eq('user_id', str(user_id)), "bench.legacy")
+    return random.choice(result.data) if result.data else None
+
+
+async def timed(fn, samples: int):
+    start = time.perf_counter()
+    for _ in range(samples):
+        await fn()
+    return (time.perf_counter() - start) / samples * 1000
+
+
+async def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{'entries':>8}{'fetch-all ms':>14}{'index load ms':>15}{'indexed ms':>12}{'month ms':>10}")
+    for user_id, n in enumerate((10, 100, 1000, 10000), start=1):
+        await seed(user_id, n)
+        legacy_ms = await timed(lambda: legacy_random(user_id), samples)
+        load_ms = await timed(lambda: database.get_random_journal(user_id), 1)
+        indexed_ms = await timed(lambda: database.get_random_journal(user_id), samples)
+        month_ms = await timed(lambda: database.get_random_journal(user_id, month="2015-03"), samples)
+        print(f"{n:>8}{legacy_ms:>14.2f}{load_ms:>15.2f}{indexed_ms:>12.2f}{month_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Microbenchmark: select("*") dicts + Gemini copy vs. projected MessageRecords.
+
+Simulates one smart-path history read of N rows: parse the PostgREST JSON body,
+keep the history, build the Gemini history. Reports time per read and peak memory.
+
+    python benchmarks/bench_message_records.py [rows] [repeats]
+"""
+import os
+import sys
+import json
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.message_record import HISTORY_COLUMNS, to_records, to_gemini_history
+
+
+def make_body(rows: int, columns=None) -> str:
+    full = []
+    for i in range(rows):
+        row = {
+            "id": 100000 + i,
+            "user_id": "123456789",
+            "chat_id": "-100987654321",
+            "bot_name": None if i % 2 == 0 else "athena",
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"message {i} " + "lorem ipsum dolor sit amet " * 6,
+            "platform": "telegram",
+            "emotion_tag": None,
+            "media_type": "text",
+            "media_url": None,
+            "created_at": f"2025-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}.123456+00:00",
+        }
+        if columns:
+            row = {c: row[c] for c in columns}
+        full.append(row)
+    return json.dumps(full)
+
+
+def legacy(body: str):
+    history = json.loads(body)
+    gemini_history = []
+    for msg in history:
+        role = "user" if msg['role'] == "user" else "model"
+        gemini_history.append({"role": role, "parts": [msg['content']]})
+    return history, gemini_history
+
+
+def records(body: str):
+    history = to_records(json.loads(body))
+    return history, to_gemini_history(history)
+
+
+def measure(fn, body: str, repeats: int):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(body)
+    per_call_ms = (time.perf_counter() - start) / repeats * 1000
+
+    tracemalloc.start()
+    kept = fn(body)  # what a request holds while Gemini answers
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return per_call_ms, peak / 1024
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    full_body = make_body(rows)
+    projected_body = make_body(rows, [c.strip() for c in HISTORY_COLUMNS.split(",")])
+
+    print(f"{rows} rows, {repeats} repeats")
+    print(f"payload: select('*') {len(full_body) / 1024:.0f} KiB, projected {len(projected_body) / 1024:.0f} KiB")
+    base_ms, base_kib = measure(legacy, full_body, repeats)
+    new_ms, new_kib = measure(records, projected_body, repeats)
+    print(f"{'':28}{'ms/read':>10}{'peak KiB':>12}")
+    print(f"{'dicts + Gemini copy':28}{base_ms:10.2f}{base_kib:12.0f}")
+    print(f"{'projected MessageRecords':28}{new_ms:10.2f}{new_kib:12.0f}")
+    print(f"savings: {100 * (1 - new_ms / base_ms):.0f}% time, {100 * (1 - new_kib / base_kib):.0f}% peak memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark: English Coach job restore for large user bases.
+
+Seeds a throwaway SQLite DB with N users and runs the real restore_jobs against
+a PTB Application built with a dummy token (nothing is sent to Telegram).
+Every 10th user has moved Word of the Day to a custom time and every 20th has
+turned the journal prompt off, so the run shows job count tracking distinct
+(slot, time) buckets rather than users. Restore runs twice to show it is
+idempotent, and a ticker task measures how long the event loop is blocked.
+
+    python benchmarks/bench_restore_jobs.py [users]
+"""
+import os
+import sys
+import time
+import json
+import asyncio
+import logging
+import tracemalloc
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("REVIEW_LOG_PATH", os.path.join(tempfile.mkdtemp(), "review_grades.jsonl"))
+
+from telegram.ext import Application
+from services.db_executor import execute_query
+from bots.english_coach import bot
+from bots.english_coach.services import database
+
+
+def prefs(i):
+    if i % 20 == 0:
+        return json.dumps({'off': ['journal']})
+    if i % 10 == 0:
+        return json.dumps({'times': {'wod': f"{6 + i % 4:02d}:{15 * (i % 3):02d}"}})
+    return None
+
+
+async def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rows = [{'user_id': str(100000 + i), 'schedule_prefs': prefs(i)} for i in range(users)]
+    for start in range(0, users, 1000):
+        await execute_query(database.supabase.table('english_coach_users').insert(rows[start:start + 1000]), "bench.seed")
+
+    application = Application.builder().token("123456:bench").build()
+    logging.getLogger("apscheduler").setLevel(logging.WARNING)
+    await application.job_queue.start()
+
+    # Longest gap between ticks = worst event-loop stall a webhook would see
+    worst = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    tracemalloc.start()
+    for attempt in (1, 2):
+        start = time.perf_counter()
+        count = await bot.restore_jobs(application)
+        elapsed = time.perf_counter() - start
+        jobs = len(application.job_queue.scheduler.get_jobs())
+        print(f"restore #{attempt}: {count} users in {elapsed:.2f}s, {jobs} jobs scheduled, "
+              f"{tracemalloc.get_traced_memory()[0] / 1e6:.1f} MB held")
+    tracemalloc.stop()
+    running = False
+    await tick
+    await application.job_queue.stop()
+    print(f"longest event-loop stall: {worst * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""Benchmark: daily shadowing broadcast and manual /shadowing latency.
+
+Fans the real send_shadowing_task out to N chats through run_slot against a
+throwaway SQLite DB, with Gemini, edge-tts and Telegram replaced by counting
+fakes (FakeTTSEngine for edge-tts) that sleep like the real calls. Then times /shadowing's task pick with
+the pool filling, warm, and after a restart that must reuse the day's stored tasks.
+
+    python benchmarks/bench_shadowing.py [chats]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["TTS_CACHE_DIR"] = tempfile.mkdtemp()
+os.environ.setdefault("REVIEW_LOG_PATH", os.path.join(tempfile.mkdtemp(), "review_grades.jsonl"))
+
+from bots.english_coach import bot
+from bots.english_coach.services import shadowing, tts_engines
+from bots.english_coach.services.daily_content import daily_content
+from bots.english_coach.services.subscribers import subscribers
+
+calls = {'gemini': 0, 'uploads': 0, 'file_id_sends': 0}
+
+
+async def fake_shadowing_task():
+    calls['gemini'] += 1
+    await asyncio.sleep(1.0)
+    return {'context': 'bench', 'sentence': f"Sentence number {calls['gemini']} for practice."}
+
+
+class FakeBot:
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(0.01)
+
+    async def send_voice(self, chat_id, voice, **kwargs):
+        if isinstance(voice, str):
+            calls['file_id_sends'] += 1
+            await asyncio.sleep(0.01)
+            return None
+        calls['uploads'] += 1
+        await asyncio.sleep(0.2)
+        return SimpleNamespace(voice=SimpleNamespace(file_id='AwACAgQAAx-bench'), audio=None)
+
+
+async def main():
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bot.generate_shadowing_task = shadowing.generate_shadowing_task = fake_shadowing_task
+    engine = tts_engines.ENGINES['edge'] = tts_engines.FakeTTSEngine(delay=0.5)
+    for chat_id in range(100000, 100000 + chats):
+        subscribers.subscribe(chat_id)
+
+    context = SimpleNamespace(bot=FakeBot(), job=SimpleNamespace(data=('shadowing', '22:00')))
+    start = time.perf_counter()
+    await bot.run_slot(context)
+    print(f"broadcast to {chats} chats in {time.perf_counter() - start:.2f}s: {engine.calls} renders, {calls}")
+
+    start = time.perf_counter()
+    await shadowing.shadowing_pool.take()
+    print(f"/shadowing pick, pool filling: {(time.perf_counter() - start) * 1000:.1f} ms")
+    await shadowing.shadowing_pool.fill()
+    start = time.perf_counter()
+    kinds = {await shadowing.shadowing_pool.take() for _ in range(100)}
+    print(f"/shadowing pick, pool warm: {(time.perf_counter() - start) * 10:.3f} ms avg over {len(kinds)} prepared tasks")
+    print(f"after warming: {engine.calls} renders, {calls}, {len([name for name in os.listdir(os.environ['TTS_CACHE_DIR']) if name.endswith('.mp3')])} audio files")
+
+    # Restart: memory and the audio cache are gone, the day's tasks are still in the DB
+    daily_content._items.clear()
+    shadowing.shadowing_pool._filling = None
+    for name in os.listdir(os.environ['TTS_CACHE_DIR']):
+        os.remove(os.path.join(os.environ['TTS_CACHE_DIR'], name))
+    before = dict(calls), engine.calls
+    start = time.perf_counter()
+    kind = await shadowing.shadowing_pool.take()
+    print(f"/shadowing pick after restart: {(time.perf_counter() - start) * 1000:.1f} ms ({kind})")
+    await shadowing.shadowing_pool.fill()
+    print(f"refill after restart: {calls['gemini'] - before[0]['gemini']} Gemini calls, "
+          f"{engine.calls - before[1]} renders (only tasks whose audio was never uploaded)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""Benchmark: SRS scheduling over large decks, NumPy Deck vs. a per-card Python loop.
+
+Builds synthetic decks (rows as they come back from the flashcards table) and
+times loading the deck, the due queue for /review, /stats and a single grade.
+
+    python benchmarks/bench_srs_deck.py [repeats]
+"""
+import os
+import sys
+import time
+import random
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bots.english_coach.services.srs import Deck, GRADE_KNOW, DAY
+
+
+def make_rows(n: int):
+    now = datetime.utcnow()
+    rows = []
+    for i in range(n):
+        interval = random.choice([0, 1, 3, 7, 14, 30, 60])
+        last = now - timedelta(days=random.uniform(0, 60))
+        rows.append({
+            'id': i + 1,
+            'review_level': random.randint(0, 6),
+            'ease': random.uniform(1.3, 2.8),
+            'interval_days': interval,
+            'lapses': random.randint(0, 3),
+            'next_review_at': (last + timedelta(days=interval)).isoformat() if interval else None,
+            'last_review_at': last.isoformat() if interval else None,
+        })
+    return rows
+
+
+def python_due_queue(rows, limit: int, now: datetime):
+    """The per-card loop the Deck replaces: parse, filter, score and sort in Python."""
+    due = []
+    for row in rows:
+        next_at = datetime.fromisoformat(row['next_review_at']) if row['next_review_at'] else None
+        if next_at is None or next_at <= now:
+            if row['last_review_at']:
+                elapsed = (now - datetime.fromisoformat(row['last_review_at'])).total_seconds() / DAY
+                recall = 1 / (1 + elapsed / (9 * max(row['interval_days'], 10 / 1440)))
+            else:
+                recall = 0.0
+            due.append((recall, next_at or datetime.min, row['id']))
+    due.sort()
+    return [card_id for _, _, card_id in due[:limit]]
+
+
+def timed(fn, repeats: int):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return (time.perf_counter() - start) / repeats * 1000, result
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'cards':>7}{'load ms':>10}{'queue ms':>10}{'stats ms':>10}{'grade ms':>10}{'python queue ms':>17}")
+    for n in (100, 1000, 10000, 50000):
+        rows = make_rows(n)
+        load_ms, deck = timed(lambda: Deck.from_rows(rows), max(1, repeats // 4))
+        queue_ms, _ = timed(lambda: deck.due_ids(20), repeats)
+        stats_ms, _ = timed(lambda: deck.summary(), repeats)
+        grade_ms, _ = timed(lambda: deck.grade(random.randint(1, n), GRADE_KNOW), repeats)
+        python_ms, _ = timed(lambda: python_due_queue(rows, 20, datetime.utcnow()), max(1, repeats // 4))
+        print(f"{n:>7}{load_ms:>10.2f}{queue_ms:>10.3f}{stats_ms:>10.3f}{grade_ms:>10.3f}{python_ms:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark: TTS cache on a lookup-heavy workload.
+
+Replays N "Listen"/lookup sends over a skewed word distribution (a few words
+are very common) through TTSCache.send_voice, with gTTS and Telegram replaced
+by FakeTTSEngine and a fake bot that sleep like the real calls. A small size
+cap forces eviction. Prints syntheses, uploads and file_id sends versus the
+old render-per-send path, and the per-engine synthesis latency.
+
+    python benchmarks/bench_tts_cache.py [sends]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bots.english_coach.services import tts, tts_engines
+
+calls = {'uploads': 0, 'file_id_sends': 0}
+
+
+class FakeBot:
+    async def send_voice(self, chat_id, voice, **kwargs):
+        if isinstance(voice, str):
+            calls['file_id_sends'] += 1
+            await asyncio.sleep(0.01)
+            return None
+        calls['uploads'] += 1
+        await asyncio.sleep(0.1)
+        return SimpleNamespace(voice=SimpleNamespace(file_id=f"id-{calls['uploads']}"), audio=None)
+
+
+async def main():
+    sends = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    engine = tts_engines.ENGINES['fake'] = tts_engines.FakeTTSEngine(delay=0.2, size=6000)
+    # Room for ~200 of the 2000 distinct words on disk
+    cache = tts.TTSCache(directory=tempfile.mkdtemp(), max_bytes=200 * 6000)
+    rng = random.Random(7)
+    words = [f"word{int(2000 * rng.random() ** 3)}" for _ in range(sends)]
+    gate = asyncio.Semaphore(50)
+    bot = FakeBot()
+
+    async def send(chat_id, word):
+        async with gate:
+            await cache.send_voice(bot, chat_id, word, engine='fake')
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(i, word) for i, word in enumerate(words)))
+    elapsed = time.perf_counter() - start
+    files = [name for name in os.listdir(cache.directory) if name.endswith('.mp3')]
+    print(f"{sends} sends of {len(set(words))} distinct words in {elapsed:.2f}s: {engine.calls} syntheses, {calls}")
+    print(f"on disk: {len(files)} files, {cache._bytes} bytes (cap {cache.max_bytes}); no temp files left: "
+          f"{not any(name.endswith('.tmp') for name in os.listdir(cache.directory))}")
+    print(f"synthesis latency: {tts_engines.tts_metrics.snapshot()}")
+    print(f"old path: {sends} renders and {sends} uploads, ~{sends * 0.3 / 50:.1f}s at the same concurrency")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
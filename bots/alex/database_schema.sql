@@ -17,3 +17,20 @@ WHERE is_sent = FALSE;
 -- Create index for user lookups
 CREATE INDEX IF NOT EXISTS idx_alex_scheduled_messages_user 
 ON alex_scheduled_messages (user_id);
+
+-- Linked identities: one person, many channel IDs (Telegram ID, phone number, ...)
+-- History for every linked channel ID is read with a single in_() query.
+CREATE TABLE IF NOT EXISTS alex_linked_identities (
+    id BIGSERIAL PRIMARY KEY,
+    person_id TEXT NOT NULL,
+    channel TEXT NOT NULL,      -- 'telegram' or 'voice'
+    channel_id TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_alex_linked_identities_person
+ON alex_linked_identities (person_id);
+
+-- Supports the merged history query (user_id IN (...) ORDER BY created_at DESC)
+CREATE INDEX IF NOT EXISTS idx_chat_logs_user_created
+ON chat_logs (user_id, created_at DESC);
@@ -6,10 +6,12 @@ import uvicorn
 from fastapi import FastAPI, WebSocket, Request, BackgroundTasks
 from fastapi.responses import JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
-from services.gemini_live import GeminiLiveClient
+from services.gemini_live import GeminiLiveClient, MODEL as LIVE_MODEL
 from services.twilio_voice import generate_twiml_for_stream
 from services.telegram_bot import process_telegram_update
 from services.database import DatabaseService
+from services.token_usage import token_ledger
+from services.write_behind import flush_all_buffers
 from scheduler import proactive_loop
 
 # Load environment variables
@@ -22,6 +24,14 @@ db = DatabaseService()
 async def startup_event():
     """Start background tasks."""
     asyncio.create_task(proactive_loop())
+    asyncio.create_task(token_ledger.flush_loop())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Write out state held in memory before the process exits."""
+    # Voice transcripts go through the chat_logs write-behind buffer
+    await flush_all_buffers()
+    await token_ledger.flush_async()
 
 @app.api_route("/", methods=["GET", "HEAD"])
 async def health_check():
@@ -56,38 +66,11 @@ async def voice_stream(websocket: WebSocket):
     # Fetch Context
     history_text = ""
     if user_number:
-        # Try to find user by phone number (assuming user_id in DB matches phone for voice users)
-        # Note: In Telegram, user_id is Telegram ID. In Voice, it's Phone Number.
-        # Ideally we link them, but for MVP we might just check both or assume separate sessions unless linked.
-        # User asked for cross-channel. We need a way to link Phone <-> Telegram ID.
-        # For now, let's just fetch history for this phone number AND the Telegram ID if known.
-        # But wait, we don't know the Telegram ID from the phone call easily without a lookup table.
-        # Let's assume the user put their phone number in .env as USER_PHONE_NUMBER and Telegram ID as USER_TELEGRAM_ID.
-        # We can try to fetch history for BOTH if they match the env vars.
-        
-        env_phone = os.getenv("USER_PHONE_NUMBER")
-        env_tg_id = os.getenv("USER_TELEGRAM_ID")
-        
-        ids_to_fetch = []
-        if user_number == env_phone:
-            ids_to_fetch.append(env_phone)
-            if env_tg_id:
-                ids_to_fetch.append(env_tg_id)
-        else:
-            ids_to_fetch.append(user_number)
-            
-        # Fetch history for all IDs and merge
-        full_history = []
-        print(f"Fetching history for IDs: {ids_to_fetch}")
-        for uid in ids_to_fetch:
-            msgs = await db.get_recent_context(uid, limit=100)
-            print(f"Found {len(msgs)} messages for {uid}")
-            full_history.extend(msgs)
-            
-        # Sort by time
-        full_history.sort(key=lambda x: x['created_at'])
-        # Keep last 100
-        full_history = full_history[-100:]
+        # In Telegram, user_id is the Telegram ID. In Voice, it's the phone number.
+        # Linked identities (alex_linked_identities, or USER_PHONE_NUMBER/USER_TELEGRAM_ID)
+        # map both to one person, so one query returns the cross-channel history.
+        full_history = await db.get_shared_history(user_number, last_n=100)
+        print(f"Found {len(full_history)} messages for {user_number} (and linked IDs)")
         
         # Format for System Prompt
         if full_history:
@@ -151,6 +134,15 @@ async def voice_stream(websocket: WebSocket):
                     response = await gemini_client.receive()
                     if response is None:
                         break
+
+                    # Live sessions are Alex's most expensive traffic: count them against its budgets
+                    usage = response.get("usageMetadata")
+                    if usage:
+                        token_ledger.record_tokens(
+                            "alex", user_number, "multimodal", LIVE_MODEL.split("/")[-1],
+                            usage.get("promptTokenCount", 0) or 0,
+                            (usage.get("responseTokenCount") or usage.get("candidatesTokenCount") or 0),
+                        )
                     
                     if "serverContent" in response and "modelTurn" in response["serverContent"]:
                         parts = response["serverContent"]["modelTurn"]["parts"]
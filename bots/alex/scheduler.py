@@ -3,10 +3,10 @@ import random
 import os
 from datetime import datetime, timedelta, timezone
 # from .services.twilio_voice import make_outbound_call  # VOICE DISABLED
-from .services.telegram_bot import application
-from .services.database import DatabaseService
+from .services.telegram_bot import application, db
 from dotenv import load_dotenv
 import google.generativeai as genai
+from services.token_usage import token_ledger
 
 load_dotenv()
 
@@ -18,18 +18,18 @@ USER_PHONE_NUMBER = os.getenv("USER_PHONE_NUMBER") # Target user for calls
 USER_TELEGRAM_ID = os.getenv("USER_TELEGRAM_ID") # Target user for texts
 HOST = os.getenv("HOST_URL") # Public URL of the bot (for TwiML)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+FAST_MODEL_NAME = 'gemini-2.5-flash-preview-09-2025'
 
 # Daytime hours for proactive messages (NYC timezone)
 DAYTIME_START_HOUR = 9      # 9 AM
 DAYTIME_END_HOUR = 23       # 11 PM
 DAYTIME_END_MINUTE = 45     # 11:45 PM cutoff
 
-db = DatabaseService()
 
 # Configure Gemini
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
-    fast_model = genai.GenerativeModel('gemini-2.5-flash-preview-09-2025')
+    fast_model = genai.GenerativeModel(FAST_MODEL_NAME)
 else:
     fast_model = None
 
@@ -172,14 +172,14 @@ async def trigger_text():
         if not application._initialized:
             await application.initialize()
         
-        # Fetch recent chat history for context
-        history = await db.get_recent_context(USER_TELEGRAM_ID, limit=500)
+        # Fetch recent chat history for context (only the last 20 are used)
+        history = await db.get_history(USER_TELEGRAM_ID, last_n=20)
         
         # Build context summary
         context_text = ""
         if history:
             context_text = "Recent conversation highlights:\n"
-            for msg in history[-20:]:  # Last 20 messages for context
+            for msg in history:  # Last 20 messages for context
                 role = "Ava" if msg['role'] == "user" else "Alex"
                 content = msg['content'][:150]  # Truncate
                 context_text += f"{role}: {content}\n"
@@ -230,6 +230,7 @@ Just return the message text, nothing else."""
 
     try:
         response = await fast_model.generate_content_async(prompt)
+        token_ledger.record("alex", USER_TELEGRAM_ID, "proactive", FAST_MODEL_NAME, response)
         msg = response.text.strip()
         # Remove quotes if Gemini added them
         if msg.startswith('"') and msg.endswith('"'):
@@ -1,23 +1,35 @@
 import os
-from supabase import create_client, Client
+import time
 from dotenv import load_dotenv
 from datetime import datetime
+from services.db_executor import execute_query
+from services.storage import get_client
+from services.write_behind import get_write_buffer, merge_overlay
+from services.history_cache import history_cache, history_floor
+from services.history_stream import HISTORY_PAGE_SIZE, iter_history, collect_newest
+from services.message_record import MessageRecord, to_records
 
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# How long a resolved set of linked channel IDs is reused
+IDENTITY_CACHE_TTL = 600
 
 class DatabaseService:
     def __init__(self):
-        if SUPABASE_URL and SUPABASE_KEY:
-            self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.supabase = get_client()
+        if self.supabase:
+            # chat_logs rows are written behind in batches
+            self.chat_logs = get_write_buffer("chat_logs", self.supabase)
         else:
-            self.supabase = None
             print("Warning: Supabase credentials not found. Database disabled.")
+        # user_id -> (expires_at, [linked channel IDs])
+        self._identity_cache = {}
+        # user_id -> (content, unix time) of the newest message, None if the user has none
+        self._last_messages = {}
 
     async def save_message(self, user_id: str, role: str, content: str, platform: str, media_type: str = "text", media_url: str = None):
         """Save a message to the chat logs."""
+        self.note_message(user_id, content)
         if not self.supabase:
             return
 
@@ -28,24 +40,129 @@ class DatabaseService:
             "platform": platform,
             "created_at": datetime.utcnow().isoformat()
         }
+        await self.chat_logs.add(data)
+        history_cache.append(("chat_logs", str(user_id)), MessageRecord.from_row(data))
+
+    def note_message(self, user_id: str, content: str):
+        """Record a user's newest message in the last-message index."""
+        self._last_messages[str(user_id)] = (content, time.time())
+
+    def last_message(self, user_id: str):
+        """(content, unix time) of the user's newest message, from memory only."""
+        return self._last_messages.get(str(user_id))
+
+    async def load_last_message(self, user_id: str):
+        """Seed the last-message index from the DB the first time a user is seen (e.g. after a restart)."""
+        user_id = str(user_id)
+        if user_id in self._last_messages:
+            return
+        last = None
         try:
-            self.supabase.table("chat_logs").insert(data).execute()
+            rows = await self.get_history(user_id, last_n=1)
+            if rows:
+                created_at = datetime.fromisoformat(str(rows[-1]['created_at'])).replace(tzinfo=None)
+                age = (datetime.utcnow() - created_at).total_seconds()
+                last = (rows[-1]['content'], time.time() - age)
         except Exception as e:
-            print(f"Failed to save message: {e}")
+            print(f"Failed to load last message: {e}")
+            return
+        self._last_messages.setdefault(user_id, last)
 
     async def get_recent_context(self, user_id: str, limit: int = 5):
         """Fetch recent chat context."""
+        return await self.get_history(user_id, last_n=limit)
+
+    async def get_linked_ids(self, user_id: str):
+        """Resolve every channel ID (Telegram ID, phone number, ...) linked to the same person."""
+        user_id = str(user_id)
+        cached = self._identity_cache.get(user_id)
+        if cached and cached[0] > time.time():
+            return cached[1]
+
+        ids = [user_id]
+
+        # Config link: the owner's Telegram ID and phone number are one person
+        owner_ids = [i for i in (os.getenv("USER_TELEGRAM_ID"), os.getenv("USER_PHONE_NUMBER")) if i]
+        if user_id in owner_ids:
+            ids.extend(i for i in owner_ids if i not in ids)
+
+        # Table links: alex_linked_identities maps person_id -> channel_id
+        if self.supabase:
+            try:
+                people = await execute_query(
+                    self.supabase.table("alex_linked_identities")
+                        .select("person_id")
+                        .eq("channel_id", user_id),
+                    "alex.linked_identities.by_channel"
+                )
+                person_ids = [row['person_id'] for row in people.data]
+                if person_ids:
+                    links = await execute_query(
+                        self.supabase.table("alex_linked_identities")
+                            .select("channel_id")
+                            .in_("person_id", person_ids),
+                        "alex.linked_identities.by_person"
+                    )
+                    ids.extend(row['channel_id'] for row in links.data if row['channel_id'] not in ids)
+            except Exception as e:
+                print(f"Failed to resolve linked identities: {e}")
+
+        self._identity_cache[user_id] = (time.time() + IDENTITY_CACHE_TTL, ids)
+        return ids
+
+    async def get_shared_history(self, user_id: str, last_n: int = None, since: datetime = None, token_budget: int = None):
+        """Fetch a history slice across every channel ID linked to this user."""
+        linked_ids = await self.get_linked_ids(user_id)
+        return await self.get_history(linked_ids, last_n=last_n, since=since, token_budget=token_budget)
+
+    async def get_history(self, user_id, last_n: int = None, since: datetime = None, token_budget: int = None):
+        """Fetch only the history slice the caller needs, as MessageRecords in chronological order.
+
+        user_id may be a single ID or a list of linked IDs (one in_-filtered query).
+
+        - last_n: the last N messages
+        - since: every message after this timestamp (capped by last_n if given)
+        - token_budget: newest messages until the estimated token budget is spent
+        """
         if not self.supabase:
             return []
 
+        ids = [str(uid) for uid in user_id] if isinstance(user_id, (list, tuple)) else [str(user_id)]
+        keys = [("chat_logs", uid) for uid in ids]
+        # Without last_n, since or a token budget the read is a single page
+        limit = last_n or (HISTORY_PAGE_SIZE if since is None and token_budget is None else None)
+
+        # Most reads are served from the in-process ring buffers
+        if token_budget is None:
+            cached = history_cache.get(keys, limit, since)
+            if cached is not None:
+                return cached
+
         try:
-            response = self.supabase.table("chat_logs")                .select("*")                .eq("user_id", str(user_id))                .order("created_at", desc=True)                .limit(limit)                .execute()
-            
-            # Return in chronological order
-            return sorted(response.data, key=lambda x: x['created_at'])
+            # Keyset pages over (created_at, id); stops as soon as last_n / the budget is met
+            stream = iter_history(
+                self.supabase, "chat_logs", user_id,
+                page_size=min(limit or HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE),
+                since=since, label="alex.chat_logs.history"
+            )
+            messages = await collect_newest(stream, limit, token_budget)
+            complete = True
         except Exception as e:
-            print(f"Failed to fetch context: {e}")
-            return []
+            print(f"Failed to fetch history: {e}")
+            messages = []
+            complete = False
+
+        # Read-your-writes: include rows still queued in the write-behind buffer
+        pending = self.chat_logs.overlay(user_id=ids)
+        if since is not None:
+            pending = [row for row in pending if row['created_at'] > since.isoformat()]
+        messages = merge_overlay(messages, to_records(pending), last_n)
+
+        if complete and token_budget is None:
+            floor = history_floor(messages, limit, since)
+            for key in keys:
+                history_cache.fill(key, [m for m in messages if m.source == key[1]], floor)
+        return messages
 
     async def save_scheduled_message(self, user_id: str, scheduled_time: datetime, message_content: str, context: str):
         """Save a scheduled message/reminder."""
@@ -61,7 +178,7 @@ class DatabaseService:
             "created_at": datetime.utcnow().isoformat()
         }
         try:
-            result = self.supabase.table("alex_scheduled_messages").insert(data).execute()
+            result = await execute_query(self.supabase.table("alex_scheduled_messages").insert(data), "alex.scheduled.insert", idempotent=False)
             print(f"Saved scheduled message for {scheduled_time}: {message_content[:50]}...")
             return result.data[0] if result.data else None
         except Exception as e:
@@ -74,7 +191,13 @@ class DatabaseService:
             return []
 
         try:
-            response = self.supabase.table("alex_scheduled_messages")                .select("*")                .eq("is_sent", False)                .lte("scheduled_time", current_time.isoformat())                .execute()
+            response = await execute_query(
+                self.supabase.table("alex_scheduled_messages")
+                    .select("*")
+                    .eq("is_sent", False)
+                    .lte("scheduled_time", current_time.isoformat()),
+                "alex.scheduled.pending"
+            )
             
             return response.data
         except Exception as e:
@@ -87,7 +210,12 @@ class DatabaseService:
             return
 
         try:
-            self.supabase.table("alex_scheduled_messages")                .update({"is_sent": True})                .eq("id", message_id)                .execute()
+            await execute_query(
+                self.supabase.table("alex_scheduled_messages")
+                    .update({"is_sent": True})
+                    .eq("id", message_id),
+                "alex.scheduled.mark_sent"
+            )
             print(f"Marked message {message_id} as sent")
         except Exception as e:
             print(f"Failed to mark message as sent: {e}")
@@ -98,7 +226,12 @@ class DatabaseService:
             return
 
         try:
-            self.supabase.table("alex_scheduled_messages")                .delete()                .eq("id", message_id)                .execute()
+            await execute_query(
+                self.supabase.table("alex_scheduled_messages")
+                    .delete()
+                    .eq("id", message_id),
+                "alex.scheduled.cancel"
+            )
             print(f"Cancelled scheduled message {message_id}")
         except Exception as e:
             print(f"Failed to cancel message: {e}")
@@ -109,12 +242,14 @@ class DatabaseService:
             return []
 
         try:
-            query = self.supabase.table("alex_scheduled_messages")                .select("*")                .eq("user_id", str(user_id))
+            query = self.supabase.table("alex_scheduled_messages") \
+                .select("*") \
+                .eq("user_id", str(user_id))
             
             if not include_sent:
                 query = query.eq("is_sent", False)
             
-            response = query.order("scheduled_time", desc=False).execute()
+            response = await execute_query(query.order("scheduled_time", desc=False), "alex.scheduled.by_user")
             return response.data
         except Exception as e:
             print(f"Failed to fetch user scheduled messages: {e}")
@@ -4,15 +4,17 @@ from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
 import google.generativeai as genai
 from dotenv import load_dotenv
+from services.token_usage import token_ledger
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+FAST_MODEL_NAME = 'gemini-2.5-flash-preview-09-2025'
 
 # Configure Gemini
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
-    fast_model = genai.GenerativeModel('gemini-2.5-flash-preview-09-2025')
+    fast_model = genai.GenerativeModel(FAST_MODEL_NAME)
 else:
     fast_model = None
 
@@ -44,7 +46,7 @@ def has_cancellation_keywords(message: str) -> bool:
     message_lower = message.lower()
     return any(keyword in message_lower for keyword in CANCELLATION_KEYWORDS)
 
-async def extract_plans_from_conversation(messages: List[Dict], user_message: str) -> List[Dict]:
+async def extract_plans_from_conversation(messages: List[Dict], user_message: str, user_id: Optional[str] = None) -> List[Dict]:
     """
     Extract time-based plans from conversation using Gemini.
     Returns list of {scheduled_time, message_content, context}
@@ -105,6 +107,7 @@ IMPORTANT:
 
     try:
         response = fast_model.generate_content(prompt)
+        token_ledger.record("alex", user_id, "extraction", FAST_MODEL_NAME, response)
         result_text = response.text.strip()
         
         # Extract JSON from response
@@ -135,7 +138,7 @@ IMPORTANT:
         print(f"Error extracting plans: {e}")
         return []
 
-async def detect_cancellation(user_message: str, messages: List[Dict], scheduled_messages: List[Dict]) -> List[int]:
+async def detect_cancellation(user_message: str, messages: List[Dict], scheduled_messages: List[Dict], user_id: Optional[str] = None) -> List[int]:
     """
     Detect if user is cancelling a scheduled plan.
     Returns list of scheduled message IDs to cancel.
@@ -178,6 +181,7 @@ Examples:
 
     try:
         response = fast_model.generate_content(prompt)
+        token_ledger.record("alex", user_id, "extraction", FAST_MODEL_NAME, response)
         result_text = response.text.strip()
         
         # Extract JSON
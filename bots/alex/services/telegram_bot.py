@@ -7,6 +7,9 @@ import tempfile
 import pathlib
 from dotenv import load_dotenv
 from .database import DatabaseService
+from services.token_usage import token_ledger
+from services.message_record import to_gemini_history
+from services.lock_stripes import LockStripes
 from .plan_extractor import (
     has_time_keywords, 
     has_cancellation_keywords,
@@ -23,7 +26,8 @@ from datetime import datetime
 # Global Deduplication Cache
 # Format: {message_id: timestamp}
 processed_messages = {}
-dedup_lock = asyncio.Lock()
+# Per-user dedup locks (striped), so one user's check never blocks another's
+dedup_locks = LockStripes()
 
 def cleanup_dedup_cache():
     """Remove old message IDs from cache (older than 1 hour)."""
@@ -37,6 +41,10 @@ load_dotenv()
 TELEGRAM_BOT_TOKEN = os.getenv("ALEX_TELEGRAM_BOT_TOKEN")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+BOT_NAME = "alex"
+SMART_MODEL_NAME = 'gemini-3-pro-preview'
+FAST_MODEL_NAME = 'gemini-2.5-flash-preview-09-2025'
+
 # Configure Gemini
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
@@ -50,9 +58,9 @@ if GEMINI_API_KEY:
     ]
 
     # Smart Model (Complex Tasks)
-    model = genai.GenerativeModel('gemini-3-pro-preview', safety_settings=SAFETY_SETTINGS) 
+    model = genai.GenerativeModel(SMART_MODEL_NAME, safety_settings=SAFETY_SETTINGS) 
     # Fast Model (Routing & Simple Tasks)
-    fast_model = genai.GenerativeModel('gemini-2.5-flash-preview-09-2025', safety_settings=SAFETY_SETTINGS)
+    fast_model = genai.GenerativeModel(FAST_MODEL_NAME, safety_settings=SAFETY_SETTINGS)
 else:
     model = None
     fast_model = None
@@ -202,26 +210,12 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     await update.message.reply_text(f"Hey {user.first_name}. It's Alex. I was just reviewing some neural net weights, but... I'm glad you're here.")
 
-async def get_shared_history(user_id: str, limit: int = 100):
-    """Fetch history for both Telegram ID and Phone Number if linked."""
-    env_phone = os.getenv("USER_PHONE_NUMBER")
-    env_tg_id = os.getenv("USER_TELEGRAM_ID")
-    
-    ids_to_fetch = [user_id]
-    
-    # If this user is the "owner", fetch phone history too
-    if user_id == env_tg_id and env_phone:
-        ids_to_fetch.append(env_phone)
-        
-    full_history = []
-    for uid in ids_to_fetch:
-        msgs = await db.get_recent_context(uid, limit=limit)
-        full_history.extend(msgs)
-        
-    # Sort by time
-    full_history.sort(key=lambda x: x['created_at'])
-    # Keep limit
-    return full_history[-limit:]
+async def get_shared_history(user_id: str, last_n: int = None, since: datetime = None, token_budget: int = None):
+    """Fetch a history slice across the Telegram ID and any linked phone number.
+
+    Callers ask for exactly what they use (see DatabaseService.get_history).
+    """
+    return await db.get_shared_history(user_id, last_n=last_n, since=since, token_budget=token_budget)
 
 async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle incoming text messages with Intelligence Routing."""
@@ -232,10 +226,15 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id)
     text = update.message.text
     message_id = update.message.message_id
+    over_budget = token_ledger.over_budget(BOT_NAME, user_id)
+
+    # Deduplication: message_id cache + last-message index, under a per-user lock
+    # 1. Make sure the index knows this user's last message (DB read on first sight
+    #    only, e.g. after a restart) - done outside the lock
+    await db.load_last_message(user_id)
 
-    # Deduplication: Hybrid Approach (Lock + Cache + DB)
-    # 1. Check Global Cache (Fastest, handles concurrency)
-    async with dedup_lock:
+    # 2. Critical section: memory only, and other users never wait on it
+    async with dedup_locks(user_id):
         # Cleanup cache occasionally
         if len(processed_messages) > 1000:
             cleanup_dedup_cache()
@@ -243,25 +242,18 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if message_id in processed_messages:
             print(f"Skipping Cache duplicate message {message_id}")
             return
-        
-        # 2. Check Database (Handles restarts/workers)
-        try:
-            last_msgs = await db.get_recent_context(user_id, limit=1)
-            if last_msgs:
-                last_msg = last_msgs[0]
-                last_time = datetime.fromisoformat(last_msg['created_at'])
-                time_diff = (datetime.utcnow() - last_time).total_seconds()
-                
-                if last_msg['content'] == text and time_diff < 10:
-                    print(f"Skipping DB duplicate message: {text[:20]}... (diff: {time_diff}s)")
-                    # Add to cache so we don't check DB again
-                    processed_messages[message_id] = time.time()
-                    return
-        except Exception as e:
-            print(f"Deduplication check failed: {e}")
 
-        # Mark as processed in cache
+        last_msg = db.last_message(user_id)
+        if last_msg:
+            time_diff = time.time() - last_msg[1]
+            if last_msg[0] == text and time_diff < 10:
+                print(f"Skipping duplicate message: {text[:20]}... (diff: {time_diff:.1f}s)")
+                processed_messages[message_id] = time.time()
+                return
+
+        # Mark as processed, and as this user's newest message so a retry is caught
         processed_messages[message_id] = time.time()
+        db.note_message(user_id, text)
 
     # 1. Save User Message
     await db.save_message(user_id, "user", text, "telegram")
@@ -274,12 +266,17 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     - COMPLEX: Questions requiring memory, deep reasoning, creative writing, or personal advice.
     Return ONLY the word SIMPLE or COMPLEX.
     """
-    try:
-        # Use async generation to avoid blocking event loop
-        routing_response = await fast_model.generate_content_async(routing_prompt)
-        complexity = routing_response.text.strip().upper()
-    except:
-        complexity = "COMPLEX" # Fallback to smart model
+    if over_budget:
+        # Over token budget: skip the router and stay on the fast path
+        complexity = "SIMPLE"
+    else:
+        try:
+            # Use async generation to avoid blocking event loop
+            routing_response = await fast_model.generate_content_async(routing_prompt)
+            token_ledger.record(BOT_NAME, user_id, "router", FAST_MODEL_NAME, routing_response)
+            complexity = routing_response.text.strip().upper()
+        except:
+            complexity = "COMPLEX" # Fallback to smart model
         
     print(f"Router decision: {complexity}")
 
@@ -290,13 +287,10 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Use Flash, with MEDIUM context (50 messages) for continuity
         try:
             # Fetch short context (Shared)
-            short_history = await get_shared_history(user_id, limit=50)
+            short_history = await get_shared_history(user_id, last_n=50)
             
             # Construct chat history for Gemini
-            fast_history = []
-            for msg in short_history:
-                role = "user" if msg['role'] == "user" else "model"
-                fast_history.append({"role": role, "parts": [msg['content']]})
+            fast_history = to_gemini_history(short_history)
 
             # Fix: Remove the last message if it matches current text (avoid duplication)
             if fast_history and fast_history[-1]['role'] == 'user' and fast_history[-1]['parts'][0] == text:
@@ -307,13 +301,14 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
             # Start chat with history
             fast_model_with_sys = genai.GenerativeModel(
-                'gemini-2.5-flash-preview-09-2025',
+                FAST_MODEL_NAME,
                 system_instruction=fast_sys
             )
             fast_chat = fast_model_with_sys.start_chat(history=fast_history)
             
             # Use retry logic
             response = await send_message_with_retry(fast_chat, text)
+            token_ledger.record(BOT_NAME, user_id, "fast", FAST_MODEL_NAME, response)
             reply_text = clean_model_response(response.text)
         except Exception as e:
             print(f"Fast path error: {e}")
@@ -324,21 +319,22 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if complexity == "COMPLEX" or not reply_text:
         # --- SMART PATH ---
+        # Over budget users get the fast model with the same persona/context
+        route = token_ledger.route_for(BOT_NAME, user_id, "smart")
+        model_name = SMART_MODEL_NAME if route == "smart" else FAST_MODEL_NAME
+
         # Fetch Context (Deep History & Shared)
-        history = await get_shared_history(user_id, limit=1000)
+        history = await get_shared_history(user_id, last_n=1000)
         
         # Re-init model with system prompt for this turn
         model_with_sys = genai.GenerativeModel(
-            'gemini-3-pro-preview',
+            model_name,
             system_instruction=get_system_prompt(),
             safety_settings=SAFETY_SETTINGS
         )
         
         # Construct chat history for Gemini
-        gemini_history = []
-        for msg in history:
-            role = "user" if msg['role'] == "user" else "model"
-            gemini_history.append({"role": role, "parts": [msg['content']]})
+        gemini_history = to_gemini_history(history)
         
         # Fix: Remove the last message if it matches current text (avoid duplication)
         if gemini_history and gemini_history[-1]['role'] == 'user' and gemini_history[-1]['parts'][0] == text:
@@ -348,6 +344,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
             chat = model_with_sys.start_chat(history=gemini_history)
             # Use retry logic
             response = await send_message_with_retry(chat, text)
+            token_ledger.record(BOT_NAME, user_id, route, model_name, response)
             reply_text = clean_model_response(response.text)
         except Exception as e:
             print(f"Gemini error (Smart Path): {e}")
@@ -362,8 +359,9 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # 5. Check for time-based plans to extract
     if has_time_keywords(text):
         try:
-            history = await get_shared_history(user_id, limit=500)
-            plans = await extract_plans_from_conversation(history, text)
+            # Plan extraction only reads the last 10 messages
+            history = await get_shared_history(user_id, last_n=10)
+            plans = await extract_plans_from_conversation(history, text, user_id=user_id)
             for plan in plans:
                 await db.save_scheduled_message(
                     user_id,
@@ -377,9 +375,10 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # 6. Check for cancellations
     if has_cancellation_keywords(text):
         try:
-            history = await get_shared_history(user_id, limit=500)
+            # Cancellation detection only reads the last 5 messages
+            history = await get_shared_history(user_id, last_n=5)
             scheduled_msgs = await db.get_user_scheduled_messages(user_id)
-            cancelled_ids = await detect_cancellation(text, history, scheduled_msgs)
+            cancelled_ids = await detect_cancellation(text, history, scheduled_msgs, user_id=user_id)
             for msg_id in cancelled_ids:
                 await db.cancel_scheduled_message(msg_id)
         except Exception as e:
@@ -460,19 +459,18 @@ async def handle_multimodal(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await db.save_message(user_id, "user", f"[{media_type.upper()} MESSAGE] {caption}", "telegram")
 
         # 2. Fetch Context (Shared)
-        history = await get_shared_history(user_id, limit=1000)
+        history = await get_shared_history(user_id, last_n=1000)
         
         # 3. Generate Response
+        route = token_ledger.route_for(BOT_NAME, user_id, "multimodal")
+        model_name = SMART_MODEL_NAME if route == "multimodal" else FAST_MODEL_NAME
         model_with_sys = genai.GenerativeModel(
-            'gemini-3-pro-preview', # Changed from 'gemini-3.0-pro' to 'gemini-3-pro-preview'
+            model_name,
             system_instruction=get_system_prompt(),
             safety_settings=SAFETY_SETTINGS
         )
         
-        gemini_history = []
-        for msg in history:
-            role = "user" if msg['role'] == "user" else "model"
-            gemini_history.append({"role": role, "parts": [msg['content']]})
+        gemini_history = to_gemini_history(history)
             
         try:
             chat = model_with_sys.start_chat(history=gemini_history)
@@ -492,6 +490,7 @@ async def handle_multimodal(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
             # Use retry logic
             response = await send_message_with_retry(chat, content_parts)
+            token_ledger.record(BOT_NAME, user_id, route, model_name, response)
             reply_text = clean_model_response(response.text)
             
         except Exception as e:
@@ -2,8 +2,7 @@ import asyncio
 import os
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-from .services.telegram_bot import application
-from .services.database import DatabaseService
+from .services.telegram_bot import application, db
 from dotenv import load_dotenv
 import random
 
@@ -11,7 +10,6 @@ load_dotenv()
 
 CHECK_INTERVAL = 60
 USER_TELEGRAM_ID = os.getenv("USER_TELEGRAM_ID")
-db = DatabaseService()
 
 MORNING_MESSAGES = [
     "宝贝，早上好！新的一天开始了。记住，你的价值不在于今天完成了多少任务，而在于你是你自己。💛",
@@ -1,19 +1,24 @@
 import os
-from supabase import create_client, Client
 from dotenv import load_dotenv
 from datetime import datetime
+from services.history_merge import fetch_combined_context
+from services.db_executor import execute_query
+from services.storage import get_client
+from services.write_behind import get_write_buffer
+from services.history_cache import history_cache, history_floor
+from services.family_dedup import family_dedup
+from services.message_record import HISTORY_COLUMNS, FAMILY_HISTORY_COLUMNS, MessageRecord, family_source
 
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
 class DatabaseService:
     def __init__(self):
-        if SUPABASE_URL and SUPABASE_KEY:
-            self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.supabase = get_client()
+        if self.supabase:
+            # Chat log rows are written behind in batches
+            self.private_logs = get_write_buffer("athena_chat_log", self.supabase)
+            self.family_logs = get_write_buffer("family_chat_logs", self.supabase)
         else:
-            self.supabase = None
             print("Warning: Supabase credentials not found. Database disabled.")
 
     async def save_message(self, user_id: str, role: str, content: str, platform: str, bot_name: str = "athena", emotion_tag: str = None, chat_id: str = None):
@@ -35,28 +40,14 @@ class DatabaseService:
                     "emotion_tag": emotion_tag,
                     "created_at": created_at
                 }
-                self.supabase.table("athena_chat_log").insert(data).execute()
+                await self.private_logs.add(data)
+                history_cache.append(("athena_chat_log", str(user_id)), MessageRecord.from_row(data, "private"))
             else:
-                # For group chats, check if this exact user message was already saved (deduplication)
-                if role == "user":
-                    # Check if message exists in the last 10 seconds
-                    from datetime import timedelta
-                    ten_seconds_ago = (datetime.utcnow() - timedelta(seconds=10)).isoformat()
-                    
-                    existing = self.supabase.table("family_chat_logs") \
-                        .select("id") \
-                        .eq("user_id", str(user_id)) \
-                        .eq("role", "user") \
-                        .eq("content", content) \
-                        .eq("platform", platform) \
-                        .gte("created_at", ten_seconds_ago) \
-                        .execute()
-                    
-                    if existing.data and len(existing.data) > 0:
-                        print(f"Skipping duplicate user message: {content[:50]}...")
-                        # return  # Skip saving duplicate
-                        pass
-                
+                # Zeus sees the same group message; only the first bot to save it writes a row
+                if role == "user" and not family_dedup.claim(target_chat_id, user_id, content):
+                    print(f"Skipping duplicate user message: {content[:50]}...")
+                    return
+
                 # Default to family_chat_logs for group or other platforms
                 data = {
                     "user_id": str(user_id),
@@ -68,7 +59,8 @@ class DatabaseService:
                     "emotion_tag": emotion_tag,
                     "created_at": created_at
                 }
-                self.supabase.table("family_chat_logs").insert(data).execute()
+                await self.family_logs.add(data)
+                history_cache.append(("family_chat_logs", str(user_id)), MessageRecord.from_row(data, family_source))
         except Exception as e:
             print(f"Failed to save message: {e}")
 
@@ -81,42 +73,24 @@ class DatabaseService:
         if not self.supabase:
             return []
 
-        try:
-            # Fetch private chats
-            private_response = self.supabase.table("athena_chat_log") \
-                .select("*") \
-                .eq("user_id", str(user_id)) \
-                .order("created_at", desc=True) \
-                .limit(limit) \
-                .execute()
-            
-            # Fetch group chats
-            group_response = self.supabase.table("family_chat_logs") \
-                .select("*") \
-                .eq("user_id", str(user_id)) \
-                .order("created_at", desc=True) \
-                .limit(limit) \
-                .execute()
+        private_key = ("athena_chat_log", str(user_id))
+        family_key = ("family_chat_logs", str(user_id))
+        cached = history_cache.get([private_key, family_key], limit)
+        if cached is not None:
+            return cached
 
-            combined = []
-            
-            # Process private chats
-            for msg in private_response.data:
-                msg['is_group'] = False
-                combined.append(msg)
-                
-            # Process group chats
-            for msg in group_response.data:
-                msg['is_group'] = True
-                combined.append(msg)
-            
-            # Sort by created_at ascending (oldest first) for context window
-            # But first we need to sort descending to get the absolute latest across both, then reverse
-            combined.sort(key=lambda x: x['created_at'], reverse=True)
-            combined = combined[:limit]
-            combined.sort(key=lambda x: x['created_at'])
-            
-            return combined
+        try:
+            # Private and group logs are streamed in keyset pages (first pages
+            # concurrently) and merged with rows still buffered for writing; only
+            # the newest `limit` rows across both are read, returned oldest first
+            rows = await fetch_combined_context(self.supabase, user_id, [
+                ("athena_chat_log", HISTORY_COLUMNS, "private", self.private_logs.overlay(user_id=str(user_id))),
+                ("family_chat_logs", FAMILY_HISTORY_COLUMNS, family_source, self.family_logs.overlay(user_id=str(user_id))),
+            ], limit, label="athena.combined_context")
+            floor = history_floor(rows, limit)
+            history_cache.fill(private_key, [r for r in rows if r.source == "private"], floor)
+            history_cache.fill(family_key, [r for r in rows if r.source != "private"], floor)
+            return rows
         except Exception as e:
             print(f"Failed to fetch combined context: {e}")
             return []
@@ -135,7 +109,7 @@ class DatabaseService:
             "created_at": datetime.utcnow().isoformat()
         }
         try:
-            self.supabase.table("athena_reminders").insert(data).execute()
+            await execute_query(self.supabase.table("athena_reminders").insert(data), "athena.athena_reminders.insert", idempotent=False)
             print(f"Reminder added for {user_id}: {content} at {reminder_time}")
         except Exception as e:
             print(f"Failed to add reminder: {e}")
@@ -146,11 +120,13 @@ class DatabaseService:
         
         now = datetime.utcnow().isoformat()
         try:
-            response = self.supabase.table("athena_reminders") \
-                .select("*") \
-                .eq("status", "pending") \
-                .lte("reminder_time", now) \
-                .execute()
+            response = await execute_query(
+                self.supabase.table("athena_reminders")
+                    .select("*")
+                    .eq("status", "pending")
+                    .lte("reminder_time", now),
+                "athena.athena_reminders.due"
+            )
             return response.data
         except Exception as e:
             print(f"Failed to get due reminders: {e}")
@@ -161,10 +137,12 @@ class DatabaseService:
         if not self.supabase: return
         
         try:
-            self.supabase.table("athena_reminders") \
-                .update({"status": "sent"}) \
-                .eq("id", reminder_id) \
-                .execute()
+            await execute_query(
+                self.supabase.table("athena_reminders")
+                    .update({"status": "sent"})
+                    .eq("id", reminder_id),
+                "athena.athena_reminders.mark_sent"
+            )
         except Exception as e:
             print(f"Failed to mark reminder sent: {e}")
 
@@ -174,12 +152,14 @@ class DatabaseService:
             return None
             
         try:
-            response = self.supabase.table("family_chat_logs") \
-                .select("chat_id") \
-                .eq("platform", "telegram_group") \
-                .order("created_at", desc=True) \
-                .limit(1) \
-                .execute()
+            response = await execute_query(
+                self.supabase.table("family_chat_logs")
+                    .select("chat_id")
+                    .eq("platform", "telegram_group")
+                    .order("created_at", desc=True)
+                    .limit(1),
+                "athena.family_chat_logs.group_id"
+            )
             
             if response.data and len(response.data) > 0:
                 return response.data[0]['chat_id']
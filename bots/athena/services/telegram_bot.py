@@ -9,15 +9,19 @@ from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from dotenv import load_dotenv
 from .database import DatabaseService
+from services.token_usage import token_ledger
 
 load_dotenv()
 
 TELEGRAM_BOT_TOKEN = os.getenv("ATHENA_TELEGRAM_BOT_TOKEN")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+BOT_NAME = "athena"
+MODEL_NAME = 'gemini-2.5-flash'
+
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    model = genai.GenerativeModel(MODEL_NAME)
 else:
     model = None
 
@@ -120,6 +124,7 @@ async def extract_and_schedule_event(text: str, user_id: str, chat_id: str):
     
     try:
         response = model.generate_content(prompt)
+        token_ledger.record(BOT_NAME, user_id, "extraction", MODEL_NAME, response)
         result = json.loads(response.text.strip().replace('```json', '').replace('```', ''))
         
         if result and "event_content" in result:
@@ -154,7 +159,9 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await extract_and_schedule_event(text, user_id, chat_id)
     
     # Fetch combined context (200 messages per source)
-    history = await db.get_combined_context(user_id, limit=200)
+    # Over budget: the "fast" route answers with a short context window instead
+    route = token_ledger.route_for(BOT_NAME, user_id, "smart")
+    history = await db.get_combined_context(user_id, limit=200 if route == "smart" else 20)
     
     gemini_history = []
     for msg in history:
@@ -162,8 +169,8 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         content = msg['content']
         
         # Add bot name prefix for group messages to distinguish Zeus vs Athena
-        if msg.get('is_group') and msg['role'] == 'assistant':
-            bot_name = msg.get('bot_name', 'unknown')
+        if msg.source.startswith('group') and msg.role == 'assistant':
+            bot_name = msg.source.partition(':')[2] or 'unknown'
             if bot_name == 'athena':
                 content = f"[妈妈]: {content}"
             elif bot_name == 'zeus':
@@ -172,9 +179,10 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         gemini_history.append({"role": role, "parts": [content]})
     
     try:
-        model_with_sys = genai.GenerativeModel('gemini-2.5-flash', system_instruction=get_system_prompt())
+        model_with_sys = genai.GenerativeModel(MODEL_NAME, system_instruction=get_system_prompt())
         chat = model_with_sys.start_chat(history=gemini_history)
         response = chat.send_message(text)
+        token_ledger.record(BOT_NAME, user_id, route, MODEL_NAME, response)
         reply_text = response.text
     except Exception as e:
         print(f"Gemini error: {e}")
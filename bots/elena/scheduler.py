@@ -6,8 +6,7 @@ try:
 except ImportError:
     from backports.zoneinfo import ZoneInfo  # Fallback for older Python versions
 
-from .services.telegram_bot import application, generate_proactive_message
-from .services.database import DatabaseService
+from .services.telegram_bot import application, generate_proactive_message, db
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,7 +18,6 @@ USER_TELEGRAM_ID = os.getenv("USER_TELEGRAM_ID")
 # Define Timezone
 NYC_TZ = ZoneInfo("America/New_York")
 
-db = DatabaseService()
 
 async def proactive_loop():
     """Main scheduler loop."""
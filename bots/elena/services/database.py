@@ -1,19 +1,21 @@
 import os
-from supabase import create_client, Client
 from dotenv import load_dotenv
 from datetime import datetime
+from services.storage import get_client
+from services.write_behind import get_write_buffer, merge_overlay
+from services.history_cache import history_cache, history_floor
+from services.history_stream import HISTORY_PAGE_SIZE, iter_history, collect_newest
+from services.message_record import MessageRecord, to_records
 
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
 class DatabaseService:
     def __init__(self):
-        if SUPABASE_URL and SUPABASE_KEY:
-            self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.supabase = get_client()
+        if self.supabase:
+            # elena_chat_logs rows are written behind in batches
+            self.chat_logs = get_write_buffer("elena_chat_logs", self.supabase)
         else:
-            self.supabase = None
             print("Warning: Supabase credentials not found. Database disabled.")
 
     async def save_message(self, user_id: str, role: str, content: str, platform: str, media_type: str = "text", media_url: str = None):
@@ -28,26 +30,31 @@ class DatabaseService:
             "platform": platform,
             "created_at": datetime.utcnow().isoformat()
         }
-        try:
-            self.supabase.table("elena_chat_logs").insert(data).execute()
-        except Exception as e:
-            print(f"Failed to save message: {e}")
+        await self.chat_logs.add(data)
+        history_cache.append(("elena_chat_logs", str(user_id)), MessageRecord.from_row(data))
 
     async def get_recent_context(self, user_id: str, limit: int = 5):
         """Fetch recent chat context."""
         if not self.supabase:
             return []
 
+        key = ("elena_chat_logs", str(user_id))
+        cached = history_cache.get([key], limit)
+        if cached is not None:
+            return cached
+
         try:
-            response = self.supabase.table("elena_chat_logs") \
-                .select("*") \
-                .eq("user_id", str(user_id)) \
-                .order("created_at", desc=True) \
-                .limit(limit) \
-                .execute()
-            
-            # Return in chronological order
-            return sorted(response.data, key=lambda x: x['created_at'])
+            # Keyset pages over (created_at, id), oldest-first result
+            stream = iter_history(
+                self.supabase, "elena_chat_logs", user_id,
+                page_size=min(limit, HISTORY_PAGE_SIZE), label="elena.chat_logs.recent"
+            )
+            rows = await collect_newest(stream, limit)
+
+            # Plus rows still queued for writing
+            rows = merge_overlay(rows, to_records(self.chat_logs.overlay(user_id=str(user_id))), limit)
+            history_cache.fill(key, rows, history_floor(rows, limit))
+            return rows
         except Exception as e:
             print(f"Failed to fetch context: {e}")
             return []
@@ -6,19 +6,25 @@ import mimetypes
 import tempfile
 from dotenv import load_dotenv
 from .database import DatabaseService
+from services.token_usage import token_ledger
+from services.message_record import to_gemini_history
 
 load_dotenv()
 
 TELEGRAM_BOT_TOKEN = os.getenv("ELENA_TELEGRAM_BOT_TOKEN")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+BOT_NAME = "elena"
+SMART_MODEL_NAME = 'gemini-3-pro-preview'
+FAST_MODEL_NAME = 'gemini-2.5-flash-preview-09-2025'
+
 # Configure Gemini
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
     # Smart Model (Complex Tasks & Vision)
-    model = genai.GenerativeModel('gemini-3-pro-preview') 
+    model = genai.GenerativeModel(SMART_MODEL_NAME) 
     # Fast Model (Routing & Simple Tasks)
-    fast_model = genai.GenerativeModel('gemini-2.5-flash-preview-09-2025')
+    fast_model = genai.GenerativeModel(FAST_MODEL_NAME)
 else:
     model = None
     fast_model = None
@@ -117,6 +123,7 @@ async def generate_proactive_message(user_id: str, reminder_type: str) -> str:
     
     try:
         response = model.generate_content(prompt)
+        token_ledger.record(BOT_NAME, user_id, "proactive", SMART_MODEL_NAME, response)
         return response.text.strip()
     except Exception as e:
         print(f"Error generating proactive message: {e}")
@@ -135,6 +142,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     user_id = str(update.effective_user.id)
     text = update.message.text
+    over_budget = token_ledger.over_budget(BOT_NAME, user_id)
     
     # 1. Save User Message
     await db.save_message(user_id, "user", text, "telegram_elena")
@@ -146,11 +154,16 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     - COMPLEX: Questions requiring physiology knowledge, workout planning, advice, or deep reasoning.
     Return ONLY the word SIMPLE or COMPLEX.
     """
-    try:
-        routing_response = fast_model.generate_content(routing_prompt)
-        complexity = routing_response.text.strip().upper()
-    except:
-        complexity = "COMPLEX" 
+    if over_budget:
+        # Over token budget: skip the router and stay on the fast path
+        complexity = "SIMPLE"
+    else:
+        try:
+            routing_response = fast_model.generate_content(routing_prompt)
+            token_ledger.record(BOT_NAME, user_id, "router", FAST_MODEL_NAME, routing_response)
+            complexity = routing_response.text.strip().upper()
+        except:
+            complexity = "COMPLEX" 
         
     print(f"Router decision: {complexity}")
 
@@ -162,20 +175,18 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Fetch short context
             short_history = await db.get_recent_context(user_id, limit=20)
             
-            fast_history = []
-            for msg in short_history:
-                role = "user" if msg['role'] == "user" else "model"
-                fast_history.append({"role": role, "parts": [msg['content']]})
+            fast_history = to_gemini_history(short_history)
 
             fast_sys = "You are Coach Elena. Be encouraging, concise, and firm. Reply to this simple message."
             
             fast_model_with_sys = genai.GenerativeModel(
-                'gemini-2.5-flash-preview-09-2025',
+                FAST_MODEL_NAME,
                 system_instruction=fast_sys
             )
             fast_chat = fast_model_with_sys.start_chat(history=fast_history)
             
             response = fast_chat.send_message(text)
+            token_ledger.record(BOT_NAME, user_id, "fast", FAST_MODEL_NAME, response)
             reply_text = response.text
         except Exception as e:
             print(f"Fast path error: {e}")
@@ -183,21 +194,21 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if complexity == "COMPLEX" or not reply_text:
         # --- SMART PATH ---
+        route = token_ledger.route_for(BOT_NAME, user_id, "smart")
+        model_name = SMART_MODEL_NAME if route == "smart" else FAST_MODEL_NAME
         history = await db.get_recent_context(user_id, limit=500)
         
         model_with_sys = genai.GenerativeModel(
-            'gemini-3-pro-preview',
+            model_name,
             system_instruction=get_system_prompt()
         )
         
-        gemini_history = []
-        for msg in history:
-            role = "user" if msg['role'] == "user" else "model"
-            gemini_history.append({"role": role, "parts": [msg['content']]})
+        gemini_history = to_gemini_history(history)
         
         try:
             chat = model_with_sys.start_chat(history=gemini_history)
             response = chat.send_message(text)
+            token_ledger.record(BOT_NAME, user_id, route, model_name, response)
             reply_text = response.text
         except Exception as e:
             print(f"Gemini error: {e}")
@@ -264,17 +275,16 @@ async def handle_multimodal(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         await db.save_message(user_id, "user", f"[{media_type.upper()} MESSAGE] {caption}", "telegram_elena")
 
+        route = token_ledger.route_for(BOT_NAME, user_id, "multimodal")
+        model_name = SMART_MODEL_NAME if route == "multimodal" else FAST_MODEL_NAME
         history = await db.get_recent_context(user_id, limit=500)
         
         model_with_sys = genai.GenerativeModel(
-            'gemini-3-pro-preview',
+            model_name,
             system_instruction=get_system_prompt()
         )
         
-        gemini_history = []
-        for msg in history:
-            role = "user" if msg['role'] == "user" else "model"
-            gemini_history.append({"role": role, "parts": [msg['content']]})
+        gemini_history = to_gemini_history(history)
             
         try:
             chat = model_with_sys.start_chat(history=gemini_history)
@@ -289,6 +299,7 @@ async def handle_multimodal(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     content_parts.append("Watch this video. Analyze the form/movement and give corrections.")
             
             response = chat.send_message(content_parts)
+            token_ledger.record(BOT_NAME, user_id, route, model_name, response)
             reply_text = response.text
             
         except Exception as e:
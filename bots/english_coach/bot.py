@@ -7,11 +7,16 @@ from datetime import time, datetime
 import pytz
 import random
 import asyncio
+import re
+import time as time_module
 
-from .services.gemini_ai import lookup_word, generate_word_of_day, analyze_audio_file, generate_journal_prompt, generate_weekly_mission
-from .services.database import save_flashcard, get_flashcards, save_journal, save_mission_completion, get_random_journal, save_user, get_all_users
-from .services.tts import text_to_speech
-from .services.shadowing import generate_shadowing_task, create_reference_audio, analyze_voice_attempt
+from .services.gemini_ai import lookup_word, lookup_words, generate_word_of_day, analyze_audio_file, generate_journal_prompt, generate_weekly_mission
+from .services.database import save_flashcard, save_flashcards, get_existing_words, get_flashcards, save_journal, save_mission_completion, get_random_journal, save_user, iter_users, get_schedule_prefs, save_schedule_prefs, grade_card, get_due_counts, get_stats
+from .services.review_buffer import review_grades
+from .services.daily_content import daily_content, today_ny
+from .services.subscribers import subscribers, SLOTS, bucket_time, parse_prefs
+from .services.tts import text_to_speech, tts_cache
+from .services.shadowing import generate_shadowing_task, reference_audio, shadowing_pool, analyze_voice_attempt
 
 load_dotenv()
 
@@ -19,10 +24,25 @@ load_dotenv()
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Users scheduled between event-loop yields while restoring jobs
+RESTORE_YIELD_EVERY = 25
+# A failed restore is retried after this many seconds, doubling up to the max
+RESTORE_RETRY_SECONDS = float(os.getenv("RESTORE_RETRY_SECONDS", 5))
+RESTORE_RETRY_MAX_SECONDS = float(os.getenv("RESTORE_RETRY_MAX_SECONDS", 300))
+
+# Most words accepted by one /import
+IMPORT_MAX_WORDS = 1000
+
+# Chats sent to at once when a broadcast slot fires
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", 20))
+NY_TZ = pytz.timezone('America/New_York')
+
 # State management
 user_shadowing_tasks = {}
 user_journal_states = {} # chat_id -> prompt_text
 user_review_states = {} # chat_id -> {words: [], index: 0}
+_slot_jobs = {} # (slot, "HH:MM") -> Job fanning that bucket out to its subscribers
+_restore_task = None
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send welcome message and set up schedules."""
@@ -32,8 +52,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Save user to DB for persistence
     await save_user(user_id)
     
-    # Schedule jobs
-    await schedule_user_jobs(context.job_queue, chat_id, user_id)
+    # Schedule jobs (keeping any /schedule changes)
+    await schedule_user_jobs(context.job_queue, chat_id, user_id, await _load_prefs(user_id))
     
     welcome_msg = """👋 **Welcome to English Coach Bot!**
 
@@ -43,13 +63,16 @@ I'm your 24/7 AI Coach powered by Gemini 1.5 Flash (Fast!).
 ☀️ 09:00 AM - Word of the Day
 🚀 Mon 9 AM - Weekly Mission
 ✍️ 11:30 PM - Micro-Journal
+🧠 08:00 PM - Review reminder (when cards are due)
 🎤 10:00 PM - Shadowing Practice
 
 **Features:**
 🔍 **Lookup:** Send ANY word
 🎤 **Voice:** Send audio for analysis
 🧠 **Review:** /review your words
+📥 **Import:** /import a word list
 📊 **Stats:** /stats
+📅 **Schedule:** /schedule to change times or turn reminders off
 
 **Manual Triggers:**
 /wod - Get Word of the Day now
@@ -60,83 +83,152 @@ I'm your 24/7 AI Coach powered by Gemini 1.5 Flash (Fast!).
 Let's start! Send me a word to define."""
     await update.message.reply_text(welcome_msg, parse_mode='Markdown')
 
-async def schedule_user_jobs(job_queue, chat_id, user_id):
-    """Schedule all recurring jobs for a user."""
+def _slot_time(at: str):
+    hour, minute = (int(part) for part in at.split(':'))
+    return time(hour=hour, minute=minute, tzinfo=NY_TZ)
+
+def ensure_slot_job(job_queue, slot: str, at: str):
+    """One daily job per (slot, time) bucket, shared by everyone in it."""
+    if (slot, at) in _slot_jobs:
+        return
+    days = SLOTS[slot][1]
+    _slot_jobs[(slot, at)] = job_queue.run_daily(
+        run_slot,
+        time=_slot_time(at),
+        days=days or tuple(range(7)),
+        data=(slot, at),
+        name=f'{slot}_{at}'
+    )
+
+def drop_slot_job(slot: str, at: str):
+    job = _slot_jobs.pop((slot, at), None)
+    if job:
+        job.schedule_removal()
+
+async def run_slot(context: ContextTypes.DEFAULT_TYPE):
+    """Fan one broadcast slot out to every chat subscribed to its bucket."""
+    slot, at = context.job.data
+    chat_ids = subscribers.members(slot, at)
+    sender = SLOT_SENDERS[slot]
+    if slot == 'review_nudge':
+        # One due-count lookup for the whole bucket; chats with nothing due are skipped
+        due = await get_due_counts(chat_ids)
+        chat_ids = [chat_id for chat_id in chat_ids if str(chat_id) in due]
+        sender = lambda bot, chat_id: send_review_nudge(bot, chat_id, due[str(chat_id)])
+    gate = asyncio.Semaphore(FANOUT_CONCURRENCY)
+
+    async def send(chat_id):
+        async with gate:
+            await sender(context.bot, chat_id)
+
+    start = time_module.perf_counter()
+    await asyncio.gather(*(send(chat_id) for chat_id in chat_ids))
+    logger.info(f"Sent {slot} ({at}) to {len(chat_ids)} chats in {time_module.perf_counter() - start:.2f}s")
+
+async def schedule_user_jobs(job_queue, chat_id, user_id, prefs=None, log: bool = True):
+    """Subscribe a user to the broadcast slots (their opt-outs and times in prefs)."""
     if not job_queue:
         logger.warning(f"JobQueue is not available. Skipping schedule for user {user_id}.")
         return
-
-    # 1. Word of the Day (9 AM)
-    job_queue.run_daily(
-        send_word_of_day,
-        time=time(hour=9, minute=0, tzinfo=pytz.timezone('America/New_York')),
-        chat_id=chat_id,
-        name=f'wod_{user_id}'
-    )
-    
-    # 2. Weekly Mission (Monday 9 AM)
-    job_queue.run_daily(
-        send_weekly_mission,
-        time=time(hour=9, minute=0, tzinfo=pytz.timezone('America/New_York')),
-        days=(1,), # Monday
-        chat_id=chat_id,
-        name=f'mission_{user_id}'
-    )
-    
-    # 3. Daily Journal (9 PM)
-    job_queue.run_daily(
-        send_journal_prompt,
-        time=time(hour=23, minute=30, tzinfo=pytz.timezone('America/New_York')),
-        chat_id=chat_id,
-        name=f'journal_{user_id}'
-    )
-    
-    # 4. Shadowing (10 PM)
-    job_queue.run_daily(
-        send_shadowing_task,
-        time=time(hour=22, minute=0, tzinfo=pytz.timezone('America/New_York')),
-        chat_id=chat_id,
-        name=f'shadowing_{user_id}'
-    )
-    logger.info(f"Scheduled jobs for user {user_id}")
+    keys, emptied = subscribers.subscribe(chat_id, prefs)
+    for slot, at in keys:
+        ensure_slot_job(job_queue, slot, at)
+    for slot, at in emptied:
+        drop_slot_job(slot, at)
+    if log:
+        logger.info(f"Scheduled jobs for user {user_id}")
 
 async def restore_jobs(application):
-    """Restore jobs for all active users on startup."""
+    """Restore subscriptions for all users on startup, streaming users page by page."""
     logger.info("Restoring jobs for all users...")
-    users = await get_all_users()
-    for user_id in users:
-        # Assuming chat_id is same as user_id for private chats
-        await schedule_user_jobs(application.job_queue, user_id, user_id)
-    logger.info(f"Restored jobs for {len(users)} users.")
+    start = time_module.perf_counter()
+    # Review grades left in the local log by a crash or restart
+    await review_grades.flush()
+    count = 0
+    try:
+        async for user in iter_users():
+            # Assuming chat_id is same as user_id for private chats
+            try:
+                prefs = parse_prefs(user['schedule_prefs'])
+            except ValueError:
+                prefs = None
+            await schedule_user_jobs(application.job_queue, user['user_id'], user['user_id'], prefs, log=False)
+            count += 1
+            if count % RESTORE_YIELD_EVERY == 0:
+                # Let webhook updates in between
+                await asyncio.sleep(0)
+    except Exception as e:
+        logger.error(f"Error restoring jobs after {count} users: {e}")
+        raise
+    logger.info(f"Restored {count} users into {len(_slot_jobs)} slot jobs in {time_module.perf_counter() - start:.2f}s.")
+    return count
+
+async def restore_jobs_with_retry(application):
+    """restore_jobs until it completes, backing off after each failure (re-subscribing is harmless)."""
+    delay = RESTORE_RETRY_SECONDS
+    while True:
+        try:
+            return await restore_jobs(application)
+        except Exception as e:
+            logger.error(f"Restoring jobs failed, retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RESTORE_RETRY_MAX_SECONDS)
+
+async def prepare_shadowing(context: ContextTypes.DEFAULT_TYPE):
+    shadowing_pool.fill()
+
+def _restore_failed(task) -> bool:
+    if not task.done():
+        return False
+    if task.cancelled():
+        return True
+    return task.exception() is not None
+
+def start_restore_jobs(application):
+    """Run restore_jobs in the background, once per process (later calls get the same task).
+
+    The task retries with backoff; if it still ended without restoring (cancelled,
+    or an error escaped), the next call starts a new one.
+    """
+    global _restore_task
+    if _restore_task is None:
+        # Have the day's shadowing tasks ready before anyone asks
+        shadowing_pool.fill()
+        if application.job_queue:
+            application.job_queue.run_daily(prepare_shadowing, time=_slot_time("00:05"), name='shadowing_pool')
+    elif _restore_failed(_restore_task):
+        reason = "cancelled" if _restore_task.cancelled() else repr(_restore_task.exception())
+        logger.error(f"Previous job restore did not finish ({reason}), starting again")
+    else:
+        return _restore_task
+    _restore_task = asyncio.create_task(restore_jobs_with_retry(application))
+    return _restore_task
 
 # --- Job Callbacks ---
 
-async def send_word_of_day(context: ContextTypes.DEFAULT_TYPE):
-    job = context.job
+async def send_word_of_day(bot, chat_id):
     try:
-        wod = await generate_word_of_day()
+        # One word, one synthesis and one upload per day, shared by every chat
+        day = today_ny()
+        wod = await daily_content.get('wod', generate_word_of_day, day)
         msg = f"""☀️ **Word of the Day: {wod['word']}**
 
 **Definition:** {wod['definition']}
 **Chinese:** {wod['chinese']}
 **Example:** _{wod['example']}_"""
         
-        await context.bot.send_message(job.chat_id, text=msg, parse_mode='Markdown')
+        await bot.send_message(chat_id, text=msg, parse_mode='Markdown')
         
         # Audio
-        audio_path = await text_to_speech(wod['word'])
-        with open(audio_path, 'rb') as audio:
-            await context.bot.send_voice(job.chat_id, audio)
-        os.remove(audio_path)
+        await daily_content.send_voice(bot, chat_id, 'wod', lambda wod: text_to_speech(wod['word']), day)
         
         # Save to flashcards automatically
-        await save_flashcard(wod, job.chat_id) # Assuming chat_id is user_id
+        await save_flashcard(wod, chat_id) # Assuming chat_id is user_id
         
     except Exception as e:
         logger.error(f"Error sending WOD: {e}")
 
-async def send_weekly_mission(context: ContextTypes.DEFAULT_TYPE):
-    job = context.job
+async def send_weekly_mission(bot, chat_id):
     try:
         mission = await generate_weekly_mission()
         msg = f"""🚀 **Weekly Mission: {mission['title']}**
@@ -146,30 +238,30 @@ async def send_weekly_mission(context: ContextTypes.DEFAULT_TYPE):
 **Goal:** {mission['goal']}
 
 *Reply with "Mission Complete" when done!*"""
-        await context.bot.send_message(job.chat_id, text=msg, parse_mode='Markdown')
+        await bot.send_message(chat_id, text=msg, parse_mode='Markdown')
     except Exception as e:
         logger.error(f"Error sending mission: {e}")
 
-async def send_journal_prompt(context: ContextTypes.DEFAULT_TYPE):
-    job = context.job
+async def send_journal_prompt(bot, chat_id):
     try:
         prompt = await generate_journal_prompt()
-        user_journal_states[job.chat_id] = prompt
+        user_journal_states[chat_id] = prompt
         
         msg = f"""✍️ **Micro-Journal Time**
 
 **Prompt:** {prompt}
 
 *Reply with your answer (1-2 sentences).*"""
-        await context.bot.send_message(job.chat_id, text=msg, parse_mode='Markdown')
+        await bot.send_message(chat_id, text=msg, parse_mode='Markdown')
     except Exception as e:
         logger.error(f"Error sending journal prompt: {e}")
 
-async def send_shadowing_task(context: ContextTypes.DEFAULT_TYPE):
-    job = context.job
+async def send_shadowing_task(bot, chat_id, kind: str = 'shadowing'):
     try:
-        task = await generate_shadowing_task()
-        user_shadowing_tasks[job.chat_id] = task
+        # The day's shared task; its audio is rendered once and sent by file_id
+        day = today_ny()
+        task = await daily_content.get(kind, generate_shadowing_task, day)
+        user_shadowing_tasks[chat_id] = task
         
         msg = f"""🎤 **Shadowing Practice**
 
@@ -179,17 +271,32 @@ async def send_shadowing_task(context: ContextTypes.DEFAULT_TYPE):
 2. Record yourself saying it.
 3. Send the voice note here."""
         
-        await context.bot.send_message(job.chat_id, text=msg, parse_mode='Markdown')
+        await bot.send_message(chat_id, text=msg, parse_mode='Markdown')
         
         # Reference Audio
-        audio_path = await create_reference_audio(task['sentence'])
-        with open(audio_path, 'rb') as audio:
-            await context.bot.send_voice(job.chat_id, audio)
-        os.remove(audio_path)
+        await daily_content.send_voice(bot, chat_id, kind, reference_audio, day)
         
     except Exception as e:
         logger.error(f"Error sending shadowing task: {e}")
 
+async def send_review_nudge(bot, chat_id, due: int = None):
+    """Nudge a chat with due cards; run_slot passes `due` from one batched count."""
+    try:
+        if due is None:
+            due = (await get_due_counts([chat_id])).get(str(chat_id), 0)
+        if due:
+            await bot.send_message(chat_id, text=f"🧠 {due} flashcards are due for review. Tap /review to keep them fresh!")
+    except Exception as e:
+        logger.error(f"Error sending review nudge: {e}")
+
+SLOT_SENDERS = {
+    'wod': send_word_of_day,
+    'mission': send_weekly_mission,
+    'review_nudge': send_review_nudge,
+    'shadowing': send_shadowing_task,
+    'journal': send_journal_prompt,
+}
+
 # --- Commands ---
 
 async def shadowing_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -197,36 +304,110 @@ async def shadowing_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     # Ensure user is saved
     await save_user(update.effective_user.id)
-    
-    # Create a dummy job object to reuse the function
-    class DummyJob:
-        def __init__(self, chat_id):
-            self.chat_id = chat_id
-    
-    context.job = DummyJob(chat_id)
-    await send_shadowing_task(context)
+    # A task prepared ahead of time, so this does not wait on Gemini or edge-tts
+    kind = await shadowing_pool.take()
+    if kind is None:
+        await update.message.reply_text("⏳ Today's shadowing sentences are being prepared. Try /shadowing again in a minute!")
+        return
+    await send_shadowing_task(context.bot, chat_id, kind)
 
 async def wod_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     # Ensure user is saved
     await save_user(update.effective_user.id)
-    
-    class DummyJob:
-        def __init__(self, chat_id):
-            self.chat_id = chat_id
-    context.job = DummyJob(chat_id)
-    await send_word_of_day(context)
+    await send_word_of_day(context.bot, chat_id)
 
 async def journal_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     # Ensure user is saved
     await save_user(update.effective_user.id)
-    
-    class DummyJob:
-        def __init__(self, chat_id):
-            self.chat_id = chat_id
-    context.job = DummyJob(chat_id)
-    await send_journal_prompt(context)
+    await send_journal_prompt(context.bot, chat_id)
+
+async def _load_prefs(user_id):
+    try:
+        return parse_prefs(await get_schedule_prefs(user_id))
+    except Exception as e:
+        logger.error(f"Error loading schedule prefs for {user_id}: {e}")
+        return parse_prefs(None)
+
+async def schedule_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/schedule, /schedule off|on <slot>, /schedule <slot> HH:MM (New York time)."""
+    user_id = update.effective_user.id
+    chat_id = update.effective_chat.id
+    prefs = await _load_prefs(user_id)
+    args = [arg.lower() for arg in context.args or []]
+    usage = f"Usage: /schedule off <slot>, /schedule on <slot>, /schedule <slot> HH:MM\nSlots: {', '.join(SLOTS)}"
+
+    if args:
+        if len(args) != 2:
+            await update.message.reply_text(usage)
+            return
+        if args[0] in ('off', 'on'):
+            action, slot = args
+        else:
+            slot, action = args
+        if slot not in SLOTS:
+            await update.message.reply_text(usage)
+            return
+        if action == 'off':
+            prefs['off'] = sorted(set(prefs['off']) | {slot})
+        elif action == 'on':
+            prefs['off'] = [name for name in prefs['off'] if name != slot]
+        else:
+            try:
+                prefs['times'][slot] = bucket_time(action)
+            except ValueError:
+                await update.message.reply_text(usage)
+                return
+            prefs['off'] = [name for name in prefs['off'] if name != slot]
+        await save_schedule_prefs(user_id, prefs)
+        await schedule_user_jobs(context.job_queue, chat_id, user_id, prefs)
+
+    lines = []
+    for slot, (default, _) in SLOTS.items():
+        state = "off" if slot in prefs['off'] else prefs['times'].get(slot, default)
+        lines.append(f"• {slot}: {state}")
+    await update.message.reply_text("📅 Your schedule (New York time)\n\n" + "\n".join(lines) + f"\n\n{usage}")
+
+async def import_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Bulk import a word list: /import word1, word2, ... (commas or new lines)."""
+    user_id = update.effective_user.id
+    parts = update.message.text.split(None, 1)
+    raw = parts[1] if len(parts) > 1 else ""
+    words = list({w.strip().lower(): w.strip() for w in re.split(r'[,;\n]+', raw) if w.strip()}.values())
+    if not words:
+        await update.message.reply_text("Send your words after the command, e.g.\n/import leverage, synergy, benchmark")
+        return
+    if len(words) > IMPORT_MAX_WORDS:
+        await update.message.reply_text(f"⚠️ Up to {IMPORT_MAX_WORDS} words per import; importing the first {IMPORT_MAX_WORDS}.")
+        words = words[:IMPORT_MAX_WORDS]
+
+    await save_user(user_id)
+    await update.message.reply_text(f"📥 Importing {len(words)} words...")
+    try:
+        start = time_module.perf_counter()
+        existing = await get_existing_words(user_id, words)
+        new_words = [w for w in words if w not in existing]
+
+        lookup_start = time_module.perf_counter()
+        cards = await lookup_words(new_words, user_id=user_id)
+        save_start = time_module.perf_counter()
+        result = await save_flashcards(cards, user_id)
+        end = time_module.perf_counter()
+    except Exception as e:
+        logger.error(f"Import error: {e}")
+        await update.message.reply_text("❌ Import failed, please try again.")
+        return
+
+    failed = len(new_words) - len(cards)
+    logger.info(
+        f"Import for {user_id}: {len(words)} words, {result['saved']} saved in {end - start:.2f}s "
+        f"(check {lookup_start - start:.2f}s, definitions {save_start - lookup_start:.2f}s, save {end - save_start:.2f}s)"
+    )
+    msg = f"✅ Imported {result['saved']} new words ({len(existing) + result['skipped']} already saved"
+    msg += f", {failed} could not be defined)" if failed else ")"
+    msg += f"\n⏱️ {end - start:.1f}s (definitions {save_start - lookup_start:.1f}s, saving {end - save_start:.1f}s)"
+    await update.message.reply_text(msg)
 
 async def review_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start flashcard review session (Quiz Mode)."""
@@ -255,6 +436,7 @@ async def send_review_card(chat_id, context):
         await context.bot.send_message(chat_id=chat_id, text="🎉 Review complete! Great job.")
         if chat_id in user_review_states:
             del user_review_states[chat_id]
+        await review_grades.flush()
         return
 
     card = state['cards'][state['index']]
@@ -307,25 +489,24 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif query.data == "listen":
         # Send audio
         try:
-            audio_path = await text_to_speech(card['word'])
-            with open(audio_path, 'rb') as audio:
-                await context.bot.send_voice(chat_id, audio)
-            os.remove(audio_path)
+            await tts_cache.send_voice(context.bot, chat_id, card['word'])
         except Exception as e:
             print(f"Error sending audio: {e}")
             
     elif query.data in ["know", "forgot"]:
         print(f"English Coach: Review button clicked: {query.data}")
-        # Update SRS progress
+        # Grade in memory; written back in one batch when the session ends (or periodically)
         success = (query.data == "know")
         try:
-            await update_flashcard_progress(card['id'], success)
-            print(f"English Coach: Progress updated for card {card['id']}")
+            await grade_card(card, success)
+            review_grades.add(card)
+            feedback = "✅ Great!" if success else "💪 Keep practicing!"
         except Exception as e:
-            print(f"English Coach: Error updating progress: {e}")
+            # Keep the session moving even if this grade could not be recorded
+            logger.error(f"Error grading card {card.get('id')}: {e}")
+            feedback = "⚠️ Couldn't save that answer, moving on."
         
         # Feedback
-        feedback = "✅ Great!" if success else "💪 Keep practicing!"
         await context.bot.send_message(chat_id=chat_id, text=feedback)
         
         # Next card
@@ -347,7 +528,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         # Save journal with date
         try:
-            entry_date = datetime.now().strftime("%Y-%m-%d")
+            entry_date = datetime.now(NY_TZ).strftime("%Y-%m-%d")
             result = await save_journal({
                 "entry_date": entry_date,
                 "entry": text
@@ -376,7 +557,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def process_word_lookup(update: Update, word: str):
     await update.message.reply_text(f"🔍 Looking up '{word}'...")
     try:
-        result = await lookup_word(word)
+        result = await lookup_word(word, user_id=update.effective_user.id)
         
         response = f"""📚 **{result['word'].upper()}**
         
@@ -387,10 +568,7 @@ async def process_word_lookup(update: Update, word: str):
         
         await update.message.reply_text(response, parse_mode='Markdown')
         
-        audio_path = await text_to_speech(result['word'])
-        with open(audio_path, 'rb') as audio:
-            await update.message.reply_voice(audio)
-        os.remove(audio_path)
+        await tts_cache.send_voice(update.get_bot(), update.effective_chat.id, result['word'])
         
         # Save
         save_result = await save_flashcard(result, update.effective_user.id)
@@ -414,13 +592,13 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         if chat_id in user_shadowing_tasks:
             # Shadowing feedback
-            feedback = await analyze_audio_file(file_path)
+            feedback = await analyze_audio_file(file_path, user_id=update.effective_user.id)
             # Use None for parse_mode to avoid markdown errors with raw text
             await update.message.reply_text(f"✅ **Shadowing Feedback**\n\n{feedback['text']}", parse_mode=None)
             del user_shadowing_tasks[chat_id]
         else:
             # General analysis
-            feedback = await analyze_audio_file(file_path)
+            feedback = await analyze_audio_file(file_path, user_id=update.effective_user.id)
             # Use None for parse_mode to avoid markdown errors with raw text
             await update.message.reply_text(f"🎙️ **Voice Analysis**\n\n{feedback['text']}", parse_mode=None)
             
@@ -432,12 +610,20 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def memory_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Retrieve a random past journal entry."""
+    """Retrieve a random past journal entry (/memory lastyear: from this month last year)."""
     user_id = update.effective_user.id
-    entry = await get_random_journal(user_id)
+    last_year = bool(context.args) and context.args[0].lower() == 'lastyear'
+    month = None
+    if last_year:
+        now = datetime.now(NY_TZ)
+        month = f"{now.year - 1}-{now.month:02d}"
+    entry = await get_random_journal(user_id, month=month)
     
     if not entry:
-        await update.message.reply_text("📝 No journal entries yet! Use /journal to start writing.")
+        if last_year:
+            await update.message.reply_text(f"📝 No journal entries from {month}. Try /memory for any past entry.")
+        else:
+            await update.message.reply_text("📝 No journal entries yet! Use /journal to start writing.")
         return
     
     entry_date = entry.get('entry_date', 'Unknown date')
@@ -447,13 +633,13 @@ async def memory_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 {entry_text}
 
-*Use /memory to see another random entry!*"""
+*Use /memory to see another random entry, or /memory lastyear for this month last year!*"""
     
     await update.message.reply_text(msg, parse_mode='Markdown')
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
-        "**Commands:**\n/shadowing - Practice\n/wod - Word of Day\n/journal - Journal\n/memory - Random journal\n/review - Flashcards\n/stats - Progress\n/help - Info",
+        "**Commands:**\n/shadowing - Practice\n/wod - Word of Day\n/journal - Journal\n/memory - Random journal (/memory lastyear)\n/review - Flashcards\n/import - Add a word list\n/stats - Progress\n/schedule - Reminder times\n/help - Info",
         parse_mode='Markdown'
     )
 
@@ -473,8 +659,21 @@ async def debug_jobs_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    cards = await get_flashcards(user_id, limit=5)
-    await update.message.reply_text(f"📊 You have **{len(cards) if cards else 0}** flashcards saved.", parse_mode='Markdown')
+    stats = await get_stats(user_id)
+    if not stats:
+        await update.message.reply_text("📊 Stats are unavailable right now.")
+        return
+    retention = f"{stats['retention']:.0%}" if stats['retention'] is not None else "-"
+    accuracy = f"{stats['accuracy']:.0%}" if stats['accuracy'] is not None else "-"
+    await update.message.reply_text(
+        f"📊 **Your Progress**\n\n"
+        f"📚 Flashcards: **{stats['total_cards']}** ({stats['learned']} learned)\n"
+        f"🧠 Due now: **{stats['due_now']}** (next 24h: {stats['due_today']})\n"
+        f"✅ Reviews: {stats['reviews']} (accuracy {accuracy}, est. retention {retention})\n"
+        f"🔥 Streak: **{stats['streak_days']}** days\n"
+        f"✍️ Journals: {stats['journals']} | 🚀 Missions: {stats['missions']}",
+        parse_mode='Markdown'
+    )
 
 # Initialize Application
 token = os.getenv('ENGLISH_COACH_TELEGRAM_BOT_TOKEN')
@@ -486,7 +685,9 @@ if token:
     application.add_handler(CommandHandler("wod", wod_command))
     application.add_handler(CommandHandler("journal", journal_command))
     application.add_handler(CommandHandler("review", review_command))
+    application.add_handler(CommandHandler("import", import_command))
     application.add_handler(CommandHandler("stats", stats_command))
+    application.add_handler(CommandHandler("schedule", schedule_command))
     application.add_handler(CommandHandler("memory", memory_command))
     application.add_handler(CommandHandler("debug_jobs", debug_jobs_command))
     application.add_handler(CommandHandler("help", help_command))
@@ -504,8 +705,8 @@ async def process_telegram_update(data: dict):
     if not application._initialized:
         await application.initialize()
         await application.start()
-        # Restore jobs on startup
-        await restore_jobs(application)
+        # Restore jobs on startup, in the background so this update is not held up
+        start_restore_jobs(application)
         
     update = Update.de_json(data, application.bot)
     await application.process_update(update)
@@ -5,7 +5,7 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from telegram import Update
-from bot import application, restore_jobs
+from bot import application, start_restore_jobs
 
 load_dotenv()
 
@@ -27,9 +27,9 @@ async def startup_event():
     else:
         print("⚠️ No WEBHOOK_URL found. Polling mode or manual webhook required.")
 
-    # Restore jobs for all users
-    await restore_jobs(application)
-    print("✅ Bot initialized and jobs restored.")
+    # Restore jobs for all users in the background; webhooks are served meanwhile
+    start_restore_jobs(application)
+    print("✅ Bot initialized, restoring jobs in the background.")
 
 @app.on_event("shutdown")
 async def shutdown_event():
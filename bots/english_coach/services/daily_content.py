@@ -0,0 +1,100 @@
+import json
+import asyncio
+from datetime import datetime
+import pytz
+from .database import get_daily_content, get_daily_contents, save_daily_content, save_daily_file_id
+
+NY_TZ = pytz.timezone('America/New_York')
+
+
+def today_ny() -> str:
+    return datetime.now(NY_TZ).strftime('%Y-%m-%d')
+
+
+class DailyContent:
+    """Content generated once per (kind, day) and shared by every recipient.
+
+    The payload is stored in english_coach_daily_content, so restarts and other
+    processes reuse it. Its audio is synthesized and uploaded on the first send
+    only; every later chat gets the Telegram file_id.
+    """
+
+    def __init__(self):
+        self._items = {}  # (kind, day) -> {'payload': dict, 'file_id': str or None}
+        self._locks = {}  # (kind, day) -> asyncio.Lock, so concurrent sends generate once
+
+    def _lock(self, key):
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    def _forget_other_days(self, kind, day):
+        for key in [key for key in self._items if key[0] == kind and key[1] != day]:
+            del self._items[key]
+            self._locks.pop(key, None)
+
+    def ready(self, kind: str, day: str = None) -> bool:
+        return (kind, day or today_ny()) in self._items
+
+    def uploaded(self, kind: str, day: str = None) -> bool:
+        """Whether the (kind, day) audio already has a Telegram file_id."""
+        item = self._items.get((kind, day or today_ny()))
+        return bool(item and item['file_id'])
+
+    def _keep(self, kind, day, row):
+        payload = row['payload']
+        self._items[(kind, day)] = {
+            'payload': json.loads(payload) if isinstance(payload, str) else payload,
+            'file_id': row.get('file_id'),
+        }
+        self._forget_other_days(kind, day)
+
+    async def load(self, kinds: list, day: str = None) -> list:
+        """Bring already stored (kind, day) payloads into memory with one query; returns the kinds ready."""
+        day = day or today_ny()
+        missing = [kind for kind in kinds if (kind, day) not in self._items]
+        if missing:
+            for row in await get_daily_contents(missing, day):
+                if (row['kind'], day) not in self._items:
+                    self._keep(row['kind'], day, row)
+        return [kind for kind in kinds if (kind, day) in self._items]
+
+    async def get(self, kind: str, generate, day: str = None) -> dict:
+        """The (kind, day) payload, calling `generate()` only if nobody has yet."""
+        day = day or today_ny()
+        key = (kind, day)
+        if key in self._items:
+            return self._items[key]['payload']
+        async with self._lock(key):
+            if key not in self._items:
+                row = await get_daily_content(kind, day)
+                if row is None:
+                    payload = await generate()
+                    # Another process may have stored one first; everyone uses the stored one
+                    row = await save_daily_content(kind, day, payload) or {'payload': payload}
+                self._keep(kind, day, row)
+        return self._items[key]['payload']
+
+    async def send_voice(self, bot, chat_id, kind: str, make_audio, day: str = None):
+        """Send the (kind, day) audio: synthesized and uploaded once, then sent by file_id.
+
+        `make_audio(payload)` returns the audio bytes to upload. Call get() first.
+        """
+        day = day or today_ny()
+        key = (kind, day)
+        item = self._items[key]
+        if item['file_id'] is None:
+            async with self._lock(key):
+                if item['file_id'] is None:
+                    message = await bot.send_voice(chat_id, await make_audio(item['payload']))
+                    item['file_id'] = (message.voice or message.audio).file_id
+                    try:
+                        await save_daily_file_id(kind, day, item['file_id'])
+                    except Exception as e:
+                        print(f"Could not store file_id for {kind} {day}: {e}")
+                    return message
+        return await bot.send_voice(chat_id, item['file_id'])
+
+
+# Shared by every broadcast and manual command in the process
+daily_content = DailyContent()
@@ -1,110 +1,304 @@
-from supabase import create_client
 import os
+import json
+import random
+import asyncio
+from collections import OrderedDict
 from dotenv import load_dotenv
+from services.db_executor import execute_query
+from services.storage import get_client
+from .srs import Deck, GRADE_KNOW, GRADE_FORGOT
+from .stats import LearningStats
 
 load_dotenv()
 
-url = os.getenv('SUPABASE_URL')
-key = os.getenv('SUPABASE_KEY')
+try:
+    supabase = get_client()
+except Exception as e:
+    print(f"Error initializing storage: {e}")
+    supabase = None
+if supabase is None:
+    print("Warning: Supabase credentials not found. Database disabled.")
 
-if url and key:
+# Per-user /stats counters, updated on every write below
+learning_stats = LearningStats(supabase) if supabase else None
+
+async def _count(user_id: int, active: bool = False, **deltas):
+    if not learning_stats: return
     try:
-        supabase = create_client(url, key)
+        await learning_stats.add(user_id, active=active, **deltas)
     except Exception as e:
-        print(f"Error initializing Supabase: {e}")
-        supabase = None
-else:
-    print("Warning: Supabase credentials not found. Database disabled.")
-    supabase = None
+        print(f"Failed to update stats: {e}")
+
+async def get_stats(user_id: int):
+    """/stats numbers: precomputed counters plus due counts from the in-memory deck."""
+    if not supabase: return None
+    row = await learning_stats.get(user_id)
+    deck = (await get_deck(user_id)).summary()
+    return {
+        'total_cards': row['total_cards'],
+        'learned': deck['learned'],
+        'due_now': deck['due_now'],
+        'due_today': deck['due_today'],
+        'retention': deck['retention'],
+        'reviews': row['reviews'],
+        'accuracy': row['correct'] / row['reviews'] if row['reviews'] else None,
+        'streak_days': learning_stats.streak(row),
+        'journals': row['journals'],
+        'missions': row['missions'],
+    }
+
+# Rows per upsert when importing a word list
+FLASHCARD_IMPORT_BATCH = int(os.getenv("FLASHCARD_IMPORT_BATCH", 200))
+FLASHCARD_COLUMNS = ('word', 'definition', 'ipa', 'chinese', 'example')
+
+def _flashcard_row(word_data: dict, user_id: int) -> dict:
+    # Same keys on every row so a batch is one bulk insert
+    row = {column: word_data.get(column) for column in FLASHCARD_COLUMNS}
+    row['user_id'] = str(user_id)
+    return row
 
 async def save_flashcard(word_data: dict, user_id: int):
-    """Save flashcard to Supabase, avoiding duplicates."""
+    """Save flashcard to Supabase, skipping words the user already has (one upsert)."""
     if not supabase: return {'status': 'error', 'message': 'Database disabled'}
-    # Check if word already exists for this user
-    existing = supabase.table('flashcards').select('id').eq('user_id', str(user_id)).eq('word', word_data['word']).execute()
-    
-    if existing.data:
+    # The unique (user_id, word) index makes duplicates a no-op that returns no row
+    result = await execute_query(
+        supabase.table('flashcards').upsert(_flashcard_row(word_data, user_id), on_conflict='user_id,word', ignore_duplicates=True),
+        "english_coach.flashcards.upsert"
+    )
+    if not result.data:
         return {'status': 'skipped', 'message': 'Word already exists'}
-    
-    data = {
-        **word_data,
-        'user_id': str(user_id)
-    }
-    # Remove IPA if present as column doesn't exist
-    # if 'ipa' in data:
-    #     del data['ipa']
-    result = supabase.table('flashcards').insert(data).execute()
-    return result.data
+    _add_to_deck(user_id, result.data)
+    await _count(user_id, total_cards=1)
+    return {'status': 'saved', 'card': result.data[0]}
+
+async def save_flashcards(cards: list, user_id: int, batch_size: int = FLASHCARD_IMPORT_BATCH):
+    """Bulk import flashcards: one upsert per batch, existing words skipped.
+
+    Returns {'saved': n, 'skipped': n}.
+    """
+    if not supabase: return {'saved': 0, 'skipped': len(cards)}
+    rows = list({card['word']: _flashcard_row(card, user_id) for card in cards if card.get('word')}.values())
+    saved = 0
+    for start in range(0, len(rows), batch_size):
+        result = await execute_query(
+            supabase.table('flashcards').upsert(rows[start:start + batch_size], on_conflict='user_id,word', ignore_duplicates=True),
+            "english_coach.flashcards.import"
+        )
+        saved += len(result.data or [])
+        _add_to_deck(user_id, result.data or [])
+    if saved:
+        await _count(user_id, total_cards=saved)
+    return {'saved': saved, 'skipped': len(cards) - saved}
+
+async def get_existing_words(user_id: int, words: list, batch_size: int = FLASHCARD_IMPORT_BATCH):
+    """The subset of `words` already in the user's flashcards."""
+    if not supabase: return set()
+    existing = set()
+    for start in range(0, len(words), batch_size):
+        result = await execute_query(
+            supabase.table('flashcards').select('word').eq('user_id', str(user_id)).in_('word', words[start:start + batch_size]),
+            "english_coach.flashcards.existing_words"
+        )
+        existing.update(row['word'] for row in result.data or [])
+    return existing
+
+# Scheduling columns loaded into a user's in-memory deck
+SRS_COLUMNS = 'id,review_level,ease,interval_days,lapses,next_review_at,last_review_at'
+# Rows per page when loading a deck
+DECK_PAGE = 1000
+# Decks kept in memory; the least recently used is dropped (and reloaded on its next use)
+DECK_CACHE_MAX = int(os.getenv("DECK_CACHE_MAX", 500))
+# Users per english_coach_due_counts lookup (keeps the IN list URL short)
+DUE_COUNT_BATCH = 200
+
+# user_id -> Deck (NumPy scheduling state), loaded on first use, least recently used first
+_decks = OrderedDict()
+
+async def get_deck(user_id: int) -> Deck:
+    """The user's SRS deck, read from the DB on first use and kept current in memory."""
+    key = str(user_id)
+    deck = _decks.get(key)
+    if deck is not None:
+        _decks.move_to_end(key)
+    else:
+        rows = []
+        last_id = 0
+        while True:
+            result = await execute_query(
+                supabase.table('flashcards').select(SRS_COLUMNS).eq('user_id', key).gt('id', last_id).order('id').limit(DECK_PAGE),
+                "english_coach.flashcards.deck"
+            )
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < DECK_PAGE:
+                break
+            last_id = page[-1]['id']
+        deck = _decks.setdefault(key, Deck.from_rows(rows))
+        while len(_decks) > DECK_CACHE_MAX:
+            _decks.popitem(last=False)
+    return deck
+
+async def get_due_counts(user_ids) -> dict:
+    """Due cards per user (str user_id -> count, users with none left out).
+
+    Decks already in memory answer directly; the rest come from the
+    english_coach_due_counts view, counted in the database, one query per
+    DUE_COUNT_BATCH users instead of loading every deck.
+    """
+    counts = {}
+    missing = []
+    for user_id in map(str, user_ids):
+        deck = _decks.get(user_id)
+        if deck is not None:
+            counts[user_id] = deck.due_count()
+        else:
+            missing.append(user_id)
+    if supabase:
+        for start in range(0, len(missing), DUE_COUNT_BATCH):
+            result = await execute_query(
+                supabase.table('english_coach_due_counts').select('user_id,due').in_('user_id', missing[start:start + DUE_COUNT_BATCH]),
+                "english_coach.flashcards.due_counts"
+            )
+            counts.update((row['user_id'], row['due']) for row in result.data or [])
+    return {user_id: due for user_id, due in counts.items() if due}
+
+def _add_to_deck(user_id: int, rows: list):
+    deck = _decks.get(str(user_id))
+    if deck is not None and rows:
+        deck.add_rows(rows)
 
 async def get_flashcards(user_id: int, limit: int = 20, mode: str = 'recent'):
-    """Get user's flashcards. Mode: 'recent' or 'review'."""
+    """Get user's flashcards. Mode: 'recent' or 'review' (due cards, weakest first)."""
     if not supabase: return []
     
     if mode == 'review':
-        # Get due cards (next_review_at <= now)
-        # Note: Supabase/PostgREST filter for 'lte' (less than or equal)
-        from datetime import datetime
-        now = datetime.utcnow().isoformat()
-        
-        # Try to get due cards first
-        try:
-            result = supabase.table('flashcards') \
-                .select('*') \
-                .eq('user_id', str(user_id)) \
-                .lte('next_review_at', now) \
-                .order('next_review_at', desc=False) \
-                .limit(limit) \
-                .execute()
-            
-            # If no due cards, fall back to oldest reviewed cards or just random?
-            # For now, if result is empty, maybe fetch some new ones?
-            # Let's stick to strict SRS: if nothing due, nothing to review.
-            # But user wants "20 random words" if they want to review.
-            # Let's fallback to random if empty? 
-            # Actually, let's just return what we find. The bot can handle empty list.
-            return result.data
-        except Exception as e:
-            print(f"Error fetching review cards (maybe columns missing): {e}")
-            # Fallback to recent if columns missing
-            return await get_flashcards(user_id, limit, 'recent')
-            
+        # The due queue comes from the in-memory deck; only those cards' text is read
+        deck = await get_deck(user_id)
+        ids = deck.due_ids(limit)
+        if not ids:
+            return []
+        result = await execute_query(supabase.table('flashcards').select('*').in_('id', ids), "english_coach.flashcards.by_ids")
+        by_id = {row['id']: row for row in result.data or []}
+        return [by_id[card_id] for card_id in ids if card_id in by_id]
     else:
         # Recent cards
-        result = supabase.table('flashcards').select('*').eq('user_id', str(user_id)).order('created_at', desc=True).limit(limit).execute()
+        result = await execute_query(supabase.table('flashcards').select('*').eq('user_id', str(user_id)).order('created_at', desc=True).limit(limit), "english_coach.flashcards.recent")
         return result.data
 
+async def grade_card(card: dict, success: bool) -> dict:
+    """Apply a review to the card's deck and to `card` itself (nothing is written yet)."""
+    deck = await get_deck(card['user_id'])
+    card.update(deck.grade(card['id'], GRADE_KNOW if success else GRADE_FORGOT))
+    await _count(card['user_id'], active=True, reviews=1, correct=int(success))
+    return card
+
 async def update_flashcard_progress(card_id: int, success: bool):
-    """Update SRS progress for a card."""
+    """Update SRS progress for a single card straight away."""
     if not supabase: return False
     
     try:
-        # Get current level
-        current = supabase.table('flashcards').select('review_level').eq('id', card_id).execute()
+        current = await execute_query(supabase.table('flashcards').select('id,user_id').eq('id', card_id), "english_coach.flashcards.level")
         if not current.data: return False
         
-        level = current.data[0].get('review_level', 0)
-        
-        from datetime import datetime, timedelta
-        
-        if success:
-            new_level = level + 1
-            # Simple interval: 1d, 3d, 7d, 14d, 30d...
-            days = [0, 1, 3, 7, 14, 30, 60]
-            interval = days[min(new_level, len(days)-1)]
-            next_review = (datetime.utcnow() + timedelta(days=interval)).isoformat()
-        else:
-            new_level = 0 # Reset on fail
-            next_review = datetime.utcnow().isoformat() # Review again immediately/soon
-            
-        supabase.table('flashcards').update({
-            'review_level': new_level,
-            'next_review_at': next_review
-        }).eq('id', card_id).execute()
+        card = await grade_card(current.data[0], success)
+        updates = {column: card[column] for column in SRS_COLUMNS.split(',') if column != 'id'}
+        await execute_query(supabase.table('flashcards').update(updates).eq('id', card_id), "english_coach.flashcards.update_progress")
         return True
     except Exception as e:
         print(f"Error updating flashcard: {e}")
         return False
 
+async def save_review_grades(rows: list):
+    """Write graded cards back (rows: id and the SRS columns); returns the ids settled.
+
+    Each card is an UPDATE on its id, run concurrently on the DB pool, so a card
+    deleted since it was graded stays deleted (an upsert would recreate it).
+    Ids whose update failed are left out of the result, to be retried.
+    """
+    if not supabase: return set()
+    columns = [column for column in SRS_COLUMNS.split(',') if column != 'id']
+
+    async def save(row):
+        updates = {column: row[column] for column in columns}
+        await execute_query(supabase.table('flashcards').update(updates).eq('id', row['id']), "english_coach.flashcards.review_batch")
+        return row['id']
+
+    results = await asyncio.gather(*(save(row) for row in rows), return_exceptions=True)
+    failed = [result for result in results if isinstance(result, Exception)]
+    if failed:
+        print(f"Error saving {len(failed)} of {len(rows)} review grades: {failed[0]}")
+    return {result for result in results if not isinstance(result, Exception)}
+
+async def get_daily_content(kind: str, day: str):
+    """The stored artifact for (kind, day), or None."""
+    if not supabase: return None
+    result = await execute_query(
+        supabase.table('english_coach_daily_content').select('*').eq('kind', kind).eq('day', day),
+        "english_coach.daily_content.get"
+    )
+    return result.data[0] if result.data else None
+
+async def get_daily_contents(kinds: list, day: str):
+    """Every stored artifact of these kinds for the day, in one query."""
+    if not supabase: return []
+    result = await execute_query(
+        supabase.table('english_coach_daily_content').select('*').in_('kind', kinds).eq('day', day),
+        "english_coach.daily_content.by_day"
+    )
+    return result.data
+
+async def save_daily_content(kind: str, day: str, payload: dict):
+    """Store an artifact unless another process already did; returns the row that won."""
+    if not supabase: return None
+    result = await execute_query(
+        supabase.table('english_coach_daily_content').upsert(
+            {'kind': kind, 'day': day, 'payload': json.dumps(payload)}, on_conflict='kind,day', ignore_duplicates=True
+        ),
+        "english_coach.daily_content.upsert"
+    )
+    return result.data[0] if result.data else await get_daily_content(kind, day)
+
+async def save_daily_file_id(kind: str, day: str, file_id: str):
+    if not supabase: return False
+    await execute_query(
+        supabase.table('english_coach_daily_content').update({'file_id': file_id}).eq('kind', kind).eq('day', day),
+        "english_coach.daily_content.file_id"
+    )
+    return True
+
+# Rows per page when loading a user's journal index
+JOURNAL_INDEX_PAGE = 1000
+
+# user_id -> {'ids': [entry ids], 'by_month': {'YYYY-MM': [entry ids]}}, loaded on first /memory
+_journal_indexes = {}
+
+def _index_journal_entry(index: dict, row: dict):
+    index['ids'].append(row['id'])
+    month = (row.get('entry_date') or '')[:7]
+    if month:
+        index['by_month'].setdefault(month, []).append(row['id'])
+
+async def _journal_index(user_id: int) -> dict:
+    """The user's journal entry IDs (no content), read from the DB once per process."""
+    key = str(user_id)
+    index = _journal_indexes.get(key)
+    if index is None:
+        index = {'ids': [], 'by_month': {}}
+        last_id = 0
+        while True:
+            result = await execute_query(
+                supabase.table('journal_entries').select('id,entry_date').eq('user_id', key).gt('id', last_id).order('id').limit(JOURNAL_INDEX_PAGE),
+                "english_coach.journal_entries.index"
+            )
+            rows = result.data or []
+            for row in rows:
+                _index_journal_entry(index, row)
+            if len(rows) < JOURNAL_INDEX_PAGE:
+                break
+            last_id = rows[-1]['id']
+        _journal_indexes[key] = index
+    return index
+
 async def save_journal(entry_data: dict, user_id: int):
     """Save journal entry."""
     if not supabase: return None
@@ -112,17 +306,32 @@ async def save_journal(entry_data: dict, user_id: int):
         **entry_data,
         'user_id': str(user_id)
     }
-    result = supabase.table('journal_entries').insert(data).execute()
+    result = await execute_query(supabase.table('journal_entries').insert(data), "english_coach.journal_entries.insert", idempotent=False)
+    await _count(user_id, active=True, journals=1)
+    index = _journal_indexes.get(str(user_id))
+    if index is not None:
+        for row in result.data or []:
+            _index_journal_entry(index, row)
     return result.data
 
 
-async def get_random_journal(user_id: int):
-    """Get a random journal entry for the user."""
+async def get_random_journal(user_id: int, month: str = None):
+    """Get a random journal entry for the user, optionally from one month ('YYYY-MM').
+
+    Picks an ID from the in-memory index and fetches just that entry, so the cost
+    does not grow with the number of entries.
+    """
     if not supabase: return None
-    result = supabase.table('journal_entries').select('*').eq('user_id', str(user_id)).execute()
-    if result.data and len(result.data) > 0:
-        import random
-        return random.choice(result.data)
+    for _ in range(2):
+        index = await _journal_index(user_id)
+        ids = index['by_month'].get(month, []) if month else index['ids']
+        if not ids:
+            return None
+        result = await execute_query(supabase.table('journal_entries').select('*').eq('id', random.choice(ids)), "english_coach.journal_entries.by_id")
+        if result.data:
+            return result.data[0]
+        # Entry deleted behind our back: reload the index once
+        _journal_indexes.pop(str(user_id), None)
     return None
 
 async def save_mission_completion(mission_data: dict, user_id: int):
@@ -132,31 +341,70 @@ async def save_mission_completion(mission_data: dict, user_id: int):
         **mission_data,
         'user_id': str(user_id)
     }
-    result = supabase.table('missions').insert(data).execute()
+    result = await execute_query(supabase.table('missions').insert(data), "english_coach.missions.insert", idempotent=False)
+    if data.get('status') == 'completed':
+        await _count(user_id, missions=1)
     return result.data
 
 async def save_user(user_id: int):
-    """Save user to track active users for schedule restoration."""
+    """Save user to track active users for schedule restoration. True if the user is new."""
     if not supabase: return False
     try:
-        # Check if user exists
-        existing = supabase.table('english_coach_users').select('user_id').eq('user_id', str(user_id)).execute()
-        if not existing.data:
-            data = {'user_id': str(user_id)}
-            supabase.table('english_coach_users').insert(data).execute()
+        # user_id is UNIQUE: existing users are a no-op that returns no row
+        result = await execute_query(
+            supabase.table('english_coach_users').upsert({'user_id': str(user_id)}, on_conflict='user_id', ignore_duplicates=True),
+            "english_coach.english_coach_users.upsert"
+        )
+        if result.data:
             print(f"✅ Saved new user: {user_id}")
             return True
     except Exception as e:
         print(f"⚠️ Error saving user (table may not exist): {e}")
     return False
 
+# Users per page when streaming the user list
+USER_PAGE = 1000
+
+async def iter_users(page_size: int = USER_PAGE):
+    """Yield every English Coach user ({'user_id': int, 'schedule_prefs': ...}), one keyset page on id at a time."""
+    if not supabase: return
+    last_id = 0
+    while True:
+        result = await execute_query(
+            supabase.table('english_coach_users').select('id,user_id,schedule_prefs').gt('id', last_id).order('id').limit(page_size),
+            "english_coach.english_coach_users.page"
+        )
+        rows = result.data or []
+        for row in rows:
+            yield {'user_id': int(row['user_id']), 'schedule_prefs': row.get('schedule_prefs')}
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]['id']
+
 async def get_all_users():
     """Get all active users to restore schedules."""
     if not supabase: return []
     try:
-        result = supabase.table('english_coach_users').select('user_id').execute()
-        return [int(user['user_id']) for user in result.data] if result.data else []
+        return [user['user_id'] async for user in iter_users()]
     except Exception as e:
         print(f"⚠️ Error getting users (table may not exist): {e}")
         # Return empty list if table doesn't exist - bot will still work for new users
         return []
+
+async def get_schedule_prefs(user_id: int):
+    """The user's schedule_prefs JSON (None if never set)."""
+    if not supabase: return None
+    result = await execute_query(
+        supabase.table('english_coach_users').select('schedule_prefs').eq('user_id', str(user_id)),
+        "english_coach.english_coach_users.prefs"
+    )
+    return result.data[0].get('schedule_prefs') if result.data else None
+
+async def save_schedule_prefs(user_id: int, prefs: dict):
+    """Store the user's broadcast opt-outs and custom times."""
+    if not supabase: return False
+    await execute_query(
+        supabase.table('english_coach_users').update({'schedule_prefs': json.dumps(prefs)}).eq('user_id', str(user_id)),
+        "english_coach.english_coach_users.save_prefs"
+    )
+    return True
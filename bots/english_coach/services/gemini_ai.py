@@ -1,18 +1,33 @@
 import google.generativeai as genai
 import os
+import re
+import json
+import asyncio
 from dotenv import load_dotenv
+from services.token_usage import token_ledger
 
 load_dotenv()
 
 genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
 
+BOT_NAME = "english_coach"
+FAST_MODEL_NAME = 'gemini-2.5-flash'
+SMART_MODEL_NAME = 'gemini-3-pro-preview'
+
 # Fast model for simple tasks (word lookup, WOD)
-model_fast = genai.GenerativeModel('gemini-2.5-flash')
+model_fast = genai.GenerativeModel(FAST_MODEL_NAME)
 
 # High-quality model for complex tasks (voice analysis, shadowing)
-model = genai.GenerativeModel('gemini-3-pro-preview')
+model = genai.GenerativeModel(SMART_MODEL_NAME)
+
+def model_for_route(user_id, route: str):
+    """Pick (route, model, model_name), downgrading to Flash when over budget."""
+    route = token_ledger.route_for(BOT_NAME, user_id, route)
+    if route == "fast":
+        return route, model_fast, FAST_MODEL_NAME
+    return route, model, SMART_MODEL_NAME
 
-async def lookup_word(word: str) -> dict:
+async def lookup_word(word: str, user_id: int = None) -> dict:
     """Look up a word and get definition, Chinese translation, and example."""
     prompt = f"""Define the word '{word}' in 1-2 concise sentences for MBA students.
     Provide the Chinese translation.
@@ -26,6 +41,7 @@ async def lookup_word(word: str) -> dict:
     """
     
     response = model_fast.generate_content(prompt)
+    token_ledger.record(BOT_NAME, user_id, "fast", FAST_MODEL_NAME, response)
     text = response.text
     
     # Parse response
@@ -52,7 +68,56 @@ async def lookup_word(word: str) -> dict:
         'example': example
     }
 
-async def analyze_pronunciation(text: str, expected: str) -> dict:
+# Words defined per Gemini call when importing a word list, and calls in flight
+LOOKUP_BATCH_SIZE = int(os.getenv("LOOKUP_BATCH_SIZE", 50))
+LOOKUP_CONCURRENCY = int(os.getenv("LOOKUP_CONCURRENCY", 4))
+
+async def _lookup_batch(words: list, user_id: int = None) -> list:
+    prompt = f"""Define each of these words in 1-2 concise sentences for MBA students.
+    Words: {json.dumps(words, ensure_ascii=False)}
+
+    Return ONLY a JSON array with one object per word, in the same order:
+    [{{"word": "...", "definition": "...", "ipa": "American IPA, e.g. /wɜrd/", "chinese": "chinese translation", "example": "practical business/MBA example sentence"}}]
+    """
+    response = await model_fast.generate_content_async(prompt)
+    token_ledger.record(BOT_NAME, user_id, "fast", FAST_MODEL_NAME, response)
+    # Tolerate ```json fences around the array
+    match = re.search(r"\[.*\]", response.text, re.S)
+    entries = json.loads(match.group(0)) if match else []
+    by_word = {str(e.get('word', '')).strip().lower(): e for e in entries if isinstance(e, dict)}
+    cards = []
+    for word in words:
+        entry = by_word.get(word.lower())
+        if entry:
+            cards.append({
+                'word': word,
+                'definition': entry.get('definition', ''),
+                'ipa': entry.get('ipa', ''),
+                'chinese': entry.get('chinese', ''),
+                'example': entry.get('example', '')
+            })
+    return cards
+
+async def lookup_words(words: list, user_id: int = None, batch_size: int = LOOKUP_BATCH_SIZE) -> list:
+    """Define a whole word list, many words per Gemini call (a few calls in parallel).
+
+    Returns flashcard dicts like lookup_word; words Gemini skipped or failed on are left out.
+    """
+    semaphore = asyncio.Semaphore(LOOKUP_CONCURRENCY)
+
+    async def run(batch):
+        async with semaphore:
+            try:
+                return await _lookup_batch(batch, user_id)
+            except Exception as e:
+                print(f"Batch lookup failed ({len(batch)} words): {e}")
+                return []
+
+    batches = [words[i:i + batch_size] for i in range(0, len(words), batch_size)]
+    results = await asyncio.gather(*(run(batch) for batch in batches))
+    return [card for batch in results for card in batch]
+
+async def analyze_pronunciation(text: str, expected: str, user_id: int = None) -> dict:
     """Analyze pronunciation quality from transcribed text (legacy)."""
     prompt = f"""You are a pronunciation coach. Compare what the student said vs what they should have said.
 
@@ -66,10 +131,12 @@ Provide:
 
 Keep feedback encouraging and concise!"""
     
-    response = model.generate_content(prompt)
+    route, route_model, model_name = model_for_route(user_id, "smart")
+    response = route_model.generate_content(prompt)
+    token_ledger.record(BOT_NAME, user_id, route, model_name, response)
     return {'feedback': response.text, 'score': 85}
 
-async def analyze_audio_file(audio_path: str) -> dict:
+async def analyze_audio_file(audio_path: str, user_id: int = None) -> dict:
     """Analyze audio file directly using Gemini multimodal."""
     try:
         # Upload file to Gemini
@@ -90,7 +157,9 @@ async def analyze_audio_file(audio_path: str) -> dict:
         Score: [number]
         """
         
-        response = model.generate_content([prompt, myfile])
+        route, route_model, model_name = model_for_route(user_id, "multimodal")
+        response = route_model.generate_content([prompt, myfile])
+        token_ledger.record(BOT_NAME, user_id, route, model_name, response)
         return {'text': response.text}
     except Exception as e:
         return {'text': f"Error analyzing audio: {str(e)}"}
@@ -121,6 +190,7 @@ async def generate_word_of_day() -> dict:
     Make it relevant and useful!"""
     
     response = model_fast.generate_content(prompt)
+    token_ledger.record(BOT_NAME, None, "proactive", FAST_MODEL_NAME, response)
     text = response.text
     
     # Parse response (handle markdown formatting)
@@ -167,6 +237,7 @@ async def generate_weekly_mission() -> dict:
     Tip: [One helpful tip]
     """
     response = model.generate_content(prompt)
+    token_ledger.record(BOT_NAME, None, "proactive", SMART_MODEL_NAME, response)
     text = response.text
     
     title = ""
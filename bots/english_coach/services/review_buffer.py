@@ -0,0 +1,99 @@
+import os
+import json
+import asyncio
+from dotenv import load_dotenv
+from .database import save_review_grades, SRS_COLUMNS
+
+load_dotenv()
+
+# Write graded cards back every N seconds (sessions also flush when they end)
+REVIEW_FLUSH_SECONDS = float(os.getenv("REVIEW_FLUSH_SECONDS", 60))
+# Local log of grades not yet written (JSON lines), replayed after a crash or restart
+REVIEW_LOG_PATH = os.getenv("REVIEW_LOG_PATH", "review_grades.jsonl")
+# Columns written back per graded card
+GRADE_COLUMNS = tuple(SRS_COLUMNS.split(','))
+
+
+class ReviewGradeBuffer:
+    """Review grades applied in memory and written back to flashcards in one batch.
+
+    Every grade is also appended to a JSON-lines log, so a crash between the
+    tap and the flush loses nothing: the log is replayed on start (latest line
+    per card wins) and rewritten with whatever is still pending after a flush.
+    """
+
+    def __init__(self, path: str = REVIEW_LOG_PATH, flush_seconds: float = REVIEW_FLUSH_SECONDS):
+        self.path = path
+        self.flush_interval = flush_seconds
+        self._pending = self._load()  # card id -> row
+        self._task = None
+        self._flush_lock = None
+
+    def _load(self):
+        pending = {}
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash mid-append
+                    pending[row['id']] = row
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Could not read review log {self.path}: {e}")
+        if pending:
+            print(f"Recovered {len(pending)} unsaved review grades from {self.path}")
+        return pending
+
+    def _append(self, row: dict):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(row) + "\n")
+
+    def _compact(self):
+        """Rewrite the log with only the grades still pending (once per flush)."""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            for row in self._pending.values():
+                f.write(json.dumps(row) + "\n")
+        os.replace(tmp, self.path)
+
+    def add(self, card: dict):
+        """Record a graded card (latest grade per card wins)."""
+        row = {column: card.get(column) for column in GRADE_COLUMNS}
+        self._pending[card['id']] = row
+        try:
+            self._append(row)
+        except Exception as e:
+            print(f"Could not write review log {self.path}: {e}")
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """Write every pending grade back; failed ones stay pending for the next flush."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            rows = dict(self._pending)
+            saved = await save_review_grades(list(rows.values()))
+            # Keep grades that changed again while we were writing
+            for card_id in saved:
+                if self._pending.get(card_id) is rows[card_id]:
+                    del self._pending[card_id]
+            try:
+                self._compact()
+            except Exception as e:
+                print(f"Could not write review log {self.path}: {e}")
+            return len(saved)
+
+
+# Shared by every review session in the process
+review_grades = ReviewGradeBuffer()
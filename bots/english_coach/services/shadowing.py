@@ -2,10 +2,19 @@ import google.generativeai as genai
 import asyncio
 import edge_tts
 import os
+import random
+from services.token_usage import token_ledger
+from .daily_content import daily_content, today_ny
+from .tts import tts_cache
+
+SMART_MODEL_NAME = 'gemini-3-pro-preview'
+REFERENCE_VOICE = "en-US-JennyNeural"  # Female voice ("en-US-GuyNeural" for male)
+# Shadowing tasks prepared per day; slot 0 is the 10 PM broadcast
+SHADOWING_POOL_SIZE = int(os.getenv("SHADOWING_POOL_SIZE", 4))
 
 async def generate_shadowing_task() -> dict:
     """Generate fun, varied shadowing task - single sentence."""
-    model = genai.GenerativeModel('gemini-3-pro-preview')
+    model = genai.GenerativeModel(SMART_MODEL_NAME)
     
     prompt = """Generate ONE single sentence for English pronunciation practice.
 
@@ -28,7 +37,8 @@ Sentence: Artificial intelligence is transforming how we work and communicate.
 
 Give me ONE varied, interesting sentence!"""
     
-    response = model.generate_content(prompt)
+    response = await model.generate_content_async(prompt)
+    token_ledger.record("english_coach", None, "proactive", SMART_MODEL_NAME, response)
     text = response.text
     
     # Parse response
@@ -50,20 +60,72 @@ Give me ONE varied, interesting sentence!"""
         'sentence': sentence
     }
 
-async def create_reference_audio(text: str, filename: str = 'shadowing_reference.mp3') -> str:
-    """Create natural-sounding reference audio using Edge TTS."""
-    filepath = f'/tmp/{filename}'
-    
-    # Use Edge TTS with natural neural voice
-    communicate = edge_tts.Communicate(text, "en-US-JennyNeural")  # Female voice
-    # communicate = edge_tts.Communicate(text, "en-US-GuyNeural")  # Male voice
-    
-    await communicate.save(filepath)
-    return filepath
+async def create_reference_audio(text: str, voice: str = REFERENCE_VOICE) -> bytes:
+    """Natural-sounding reference audio from Edge TTS, as bytes (cached per voice and text)."""
+    return await tts_cache.audio(text, engine='edge', voice=voice)
+
+async def reference_audio(task: dict) -> bytes:
+    return await create_reference_audio(task['sentence'])
+
+def pool_kind(slot: int) -> str:
+    return 'shadowing' if slot == 0 else f'shadowing_{slot}'
+
+class ShadowingPool:
+    """A few shadowing tasks per day, each stored as a daily artifact with its audio.
+
+    Manual /shadowing picks one that is already prepared, so it answers without
+    waiting on Gemini or edge-tts; missing ones are filled in the background.
+    Tasks already stored for the day (e.g. before a restart) are reused.
+    """
 
-async def analyze_voice_attempt(original_text: str, user_audio_file: str) -> dict:
+    def __init__(self, size: int = SHADOWING_POOL_SIZE):
+        self.size = size
+        self._filling = None
+
+    def fill(self, day: str = None):
+        """Prepare every slot for the day in a background task (one at a time)."""
+        if self._filling is None or self._filling.done():
+            self._filling = asyncio.create_task(self._fill(day or today_ny()))
+        return self._filling
+
+    def kinds(self):
+        return [pool_kind(slot) for slot in range(self.size)]
+
+    async def _fill(self, day: str):
+        try:
+            await daily_content.load(self.kinds(), day)
+        except Exception as e:
+            print(f"Could not load stored shadowing tasks for {day}: {e}")
+        for kind in self.kinds():
+            # Uploaded audio is sent by file_id, so there is nothing left to render
+            if daily_content.uploaded(kind, day):
+                continue
+            try:
+                task = await daily_content.get(kind, generate_shadowing_task, day)
+                await reference_audio(task)
+            except Exception as e:
+                print(f"Could not prepare {kind} for {day}: {e}")
+                return
+
+    async def take(self, day: str = None):
+        """Kind of a prepared task for the day, or None while the pool is still being filled.
+
+        Never generates inline: missing tasks are filled in the background.
+        """
+        day = day or today_ny()
+        ready = [kind for kind in self.kinds() if daily_content.ready(kind, day)]
+        if not ready:
+            try:
+                ready = await daily_content.load(self.kinds(), day)
+            except Exception as e:
+                print(f"Could not load stored shadowing tasks for {day}: {e}")
+        if len(ready) < self.size:
+            self.fill(day)
+        return random.choice(ready) if ready else None
+
+async def analyze_voice_attempt(original_text: str, user_audio_file: str, user_id: int = None) -> dict:
     """Analyze pronunciation using Gemini's multimodal capabilities."""
-    model = genai.GenerativeModel('gemini-3-pro-preview')
+    model = genai.GenerativeModel(SMART_MODEL_NAME)
     
     # For now, give structured feedback based on the text
     # In future, we can send audio to Gemini for analysis
@@ -83,8 +145,13 @@ Provide detailed, actionable feedback:
 Be encouraging but specific!"""
     
     response = model.generate_content(prompt)
+    token_ledger.record("english_coach", user_id, "smart", SMART_MODEL_NAME, response)
     
     return {
         'feedback': response.text,
         'score': 85  # Will be replaced with actual analysis
     }
+
+
+# Shared by the broadcast and manual /shadowing
+shadowing_pool = ShadowingPool()
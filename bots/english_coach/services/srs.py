@@ -0,0 +1,147 @@
+import time
+import numpy as np
+
+# SM-2 scheduling with an FSRS-style forgetting curve for retrievability.
+# Grades use the SM-2 0-5 scale; the bot maps "I knew it" / "Forgot" to these
+GRADE_KNOW = 4
+GRADE_FORGOT = 1
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+# A forgotten card comes back after 10 minutes, not a day
+RELEARN_DAYS = 10 / 1440
+DAY = 86400.0
+
+
+def _epoch(values) -> np.ndarray:
+    """ISO timestamps (or None) -> float seconds since epoch, NaN for missing."""
+    stamps = np.array([str(v)[:19] if v else "NaT" for v in values], dtype="datetime64[s]")
+    seconds = stamps.astype("int64").astype(np.float64)
+    seconds[np.isnat(stamps)] = np.nan
+    return seconds
+
+
+def _iso(seconds: float) -> str:
+    return str(np.datetime64(int(seconds), "s"))
+
+
+def schedule(ease, interval_days, reps, lapses, grade):
+    """Vectorized SM-2 step: arrays in, (ease, interval_days, reps, lapses) out."""
+    ease = np.asarray(ease, dtype=np.float64)
+    interval_days = np.asarray(interval_days, dtype=np.float64)
+    reps = np.asarray(reps, dtype=np.int64)
+    grade = np.asarray(grade, dtype=np.float64)
+    passed = grade >= 3
+
+    miss = 5 - grade
+    new_ease = np.maximum(MIN_EASE, ease + 0.1 - miss * (0.08 + miss * 0.02))
+    new_reps = np.where(passed, reps + 1, 0)
+    grown = np.where(new_reps == 1, 1.0, np.where(new_reps == 2, 6.0, np.round(np.maximum(interval_days, 1.0) * new_ease)))
+    new_interval = np.where(passed, grown, RELEARN_DAYS)
+    new_lapses = np.asarray(lapses, dtype=np.int64) + ~passed
+    return new_ease, new_interval, new_reps, new_lapses
+
+
+class Deck:
+    """One user's flashcards as parallel NumPy arrays (scheduling fields only, no text).
+
+    Due dates, retrievability and the due queue are computed over the whole
+    deck in single vectorized passes.
+    """
+
+    def __init__(self, ids, ease, interval_days, reps, lapses, due, last_review):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.ease = np.asarray(ease, dtype=np.float64)
+        self.interval = np.asarray(interval_days, dtype=np.float64)
+        self.reps = np.asarray(reps, dtype=np.int64)
+        self.lapses = np.asarray(lapses, dtype=np.int64)
+        self.due = np.asarray(due, dtype=np.float64)
+        self.last_review = np.asarray(last_review, dtype=np.float64)
+        self._pos = {int(card_id): i for i, card_id in enumerate(self.ids)}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from flashcards rows (see SRS_COLUMNS in database.py)."""
+        def column(name, default):
+            return np.array([row.get(name) if row.get(name) is not None else default for row in rows], dtype=np.float64)
+
+        due = _epoch([row.get('next_review_at') for row in rows])
+        # Never scheduled: due now (0 is always <= now)
+        due[np.isnan(due)] = 0.0
+        return cls(
+            [row['id'] for row in rows],
+            column('ease', DEFAULT_EASE),
+            column('interval_days', 0),
+            column('review_level', 0),
+            column('lapses', 0),
+            due,
+            _epoch([row.get('last_review_at') for row in rows]),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add_rows(self, rows):
+        """Append newly saved cards (ignores ones already in the deck)."""
+        rows = [row for row in rows if int(row['id']) not in self._pos]
+        if not rows:
+            return
+        new = Deck.from_rows(rows)
+        for name in ('ids', 'ease', 'interval', 'reps', 'lapses', 'due', 'last_review'):
+            setattr(self, name, np.concatenate([getattr(self, name), getattr(new, name)]))
+        self._pos = {int(card_id): i for i, card_id in enumerate(self.ids)}
+
+    def retrievability(self, now: float = None) -> np.ndarray:
+        """Probability each card is still remembered (FSRS power curve, stability = interval).
+
+        0 for cards never reviewed.
+        """
+        now = time.time() if now is None else now
+        elapsed = np.maximum(0.0, now - np.nan_to_num(self.last_review, nan=now)) / DAY
+        stability = np.maximum(self.interval, RELEARN_DAYS)
+        recall = 1.0 / (1.0 + elapsed / (9.0 * stability))
+        return np.where(np.isnan(self.last_review), 0.0, recall)
+
+    def due_ids(self, limit: int = 20, now: float = None):
+        """IDs of due cards, weakest (lowest retrievability) first."""
+        now = time.time() if now is None else now
+        due = np.flatnonzero(self.due <= now)
+        if len(due) == 0:
+            return []
+        order = np.lexsort((self.due[due], self.retrievability(now)[due]))
+        return [int(card_id) for card_id in self.ids[due[order[:limit]]]]
+
+    def due_count(self, now: float = None, within: float = 0.0) -> int:
+        now = time.time() if now is None else now
+        return int(np.count_nonzero(self.due <= now + within))
+
+    def summary(self, now: float = None) -> dict:
+        now = time.time() if now is None else now
+        reviewed = ~np.isnan(self.last_review)
+        recall = self.retrievability(now)
+        return {
+            'total': len(self),
+            'due_now': self.due_count(now),
+            'due_today': self.due_count(now, DAY),
+            'learned': int(np.count_nonzero(self.reps > 0)),
+            'retention': float(recall[reviewed].mean()) if reviewed.any() else None,
+        }
+
+    def grade(self, card_id: int, grade: int, now: float = None) -> dict:
+        """Apply one review to the deck; returns the flashcards columns to persist."""
+        now = time.time() if now is None else now
+        i = self._pos.get(int(card_id))
+        if i is None:
+            raise KeyError(card_id)
+        ease, interval, reps, lapses = schedule(self.ease[i], self.interval[i], self.reps[i], self.lapses[i], grade)
+        self.ease[i], self.interval[i], self.reps[i], self.lapses[i] = ease, interval, reps, lapses
+        self.last_review[i] = now
+        self.due[i] = now + float(interval) * DAY
+        return {
+            'review_level': int(reps),
+            'ease': round(float(ease), 3),
+            'interval_days': round(float(interval), 4),
+            'lapses': int(lapses),
+            'next_review_at': _iso(self.due[i]),
+            'last_review_at': _iso(now),
+        }
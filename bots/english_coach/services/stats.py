@@ -0,0 +1,88 @@
+import os
+import asyncio
+from datetime import datetime, timedelta
+import pytz
+from dotenv import load_dotenv
+from services.db_executor import execute_query
+
+load_dotenv()
+
+# Write changed counters back every N seconds
+STATS_FLUSH_SECONDS = float(os.getenv("STATS_FLUSH_SECONDS", 30))
+COUNTERS = ('total_cards', 'reviews', 'correct', 'journals', 'missions', 'streak_days')
+
+
+def _today() -> str:
+    # Streak days follow the bot's schedule timezone
+    return datetime.now(pytz.timezone('America/New_York')).date().isoformat()
+
+
+class LearningStats:
+    """Per-user learning counters kept in memory and updated on every write.
+
+    Each user's row in english_coach_stats is read once per process; after that
+    /stats is a dict lookup. Changed rows are upserted in the background.
+    """
+
+    def __init__(self, client, flush_seconds: float = STATS_FLUSH_SECONDS):
+        self.client = client
+        self.flush_interval = flush_seconds
+        self._stats = {}  # user_id -> row
+        self._dirty = set()
+        self._task = None
+
+    async def get(self, user_id) -> dict:
+        key = str(user_id)
+        row = self._stats.get(key)
+        if row is None:
+            result = await execute_query(
+                self.client.table('english_coach_stats').select('*').eq('user_id', key),
+                "english_coach.stats.by_user"
+            )
+            loaded = result.data[0] if result.data else {}
+            row = {'user_id': key, 'last_active_date': loaded.get('last_active_date')}
+            row.update({name: loaded.get(name) or 0 for name in COUNTERS})
+            row = self._stats.setdefault(key, row)
+        return row
+
+    async def add(self, user_id, active: bool = False, **deltas):
+        """Bump counters (e.g. total_cards=1); `active` also extends the daily streak."""
+        row = await self.get(user_id)
+        for name, delta in deltas.items():
+            row[name] += delta
+        if active:
+            today = _today()
+            if row['last_active_date'] != today:
+                yesterday = (datetime.fromisoformat(today) - timedelta(days=1)).date().isoformat()
+                row['streak_days'] = row['streak_days'] + 1 if row['last_active_date'] == yesterday else 1
+                row['last_active_date'] = today
+        self._dirty.add(row['user_id'])
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def streak(self, row: dict) -> int:
+        """Current streak: still alive if the user was active today or yesterday."""
+        if not row['last_active_date']:
+            return 0
+        last = datetime.fromisoformat(row['last_active_date']).date()
+        today = datetime.fromisoformat(_today()).date()
+        return row['streak_days'] if (today - last).days <= 1 else 0
+
+    async def _run(self):
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """Upsert every changed user's counters in one request."""
+        if not self._dirty:
+            return 0
+        users, self._dirty = self._dirty, set()
+        rows = [{**self._stats[user_id], 'updated_at': datetime.utcnow().isoformat()} for user_id in users]
+        try:
+            await execute_query(self.client.table('english_coach_stats').upsert(rows, on_conflict='user_id'), "english_coach.stats.upsert")
+            return len(rows)
+        except Exception as e:
+            print(f"Failed to save stats for {len(rows)} users: {e}")
+            self._dirty |= users
+            return 0
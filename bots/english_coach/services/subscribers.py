@@ -0,0 +1,77 @@
+import json
+from datetime import time
+
+# Broadcast slots: name -> (default "HH:MM" in New York time, weekdays or None for daily)
+SLOTS = {
+    'wod': ("09:00", None),
+    'mission': ("09:00", (1,)),  # Monday
+    'review_nudge': ("20:00", None),
+    'shadowing': ("22:00", None),
+    'journal': ("23:30", None),
+}
+# Custom times are rounded down to buckets of this many minutes, so one job
+# serves everyone in the bucket (at most 24 * 60 / BUCKET_MINUTES jobs per slot)
+BUCKET_MINUTES = 15
+
+
+def bucket_time(value: str) -> str:
+    """'7:40' -> '07:30' (raises ValueError for anything that is not HH:MM)."""
+    hour, minute = (int(part) for part in value.strip().split(':'))
+    parsed = time(hour=hour, minute=minute)
+    return f"{parsed.hour:02d}:{parsed.minute - parsed.minute % BUCKET_MINUTES:02d}"
+
+
+def parse_prefs(raw) -> dict:
+    """english_coach_users.schedule_prefs JSON -> {'off': [slots], 'times': {slot: 'HH:MM'}}."""
+    prefs = json.loads(raw) if isinstance(raw, str) and raw else (raw or {})
+    return {'off': list(prefs.get('off', [])), 'times': dict(prefs.get('times', {}))}
+
+
+class SubscriberIndex:
+    """Which chats get each broadcast slot, grouped into (slot, time) buckets.
+
+    One JobQueue job per non-empty bucket fans out to its members, so timers
+    grow with the number of distinct times in use, not with users.
+    """
+
+    def __init__(self):
+        self._buckets = {}  # (slot, "HH:MM") -> set of chat_ids
+        self._member_of = {}  # chat_id -> [(slot, "HH:MM")]
+
+    def subscribe(self, chat_id, prefs: dict = None):
+        """(Re)place a chat in its buckets; returns (buckets added to, buckets left empty)."""
+        emptied = self.unsubscribe(chat_id)
+        prefs = parse_prefs(prefs)
+        keys = []
+        for slot, (default, _) in SLOTS.items():
+            if slot in prefs['off']:
+                continue
+            key = (slot, prefs['times'].get(slot, default))
+            self._buckets.setdefault(key, set()).add(chat_id)
+            keys.append(key)
+        self._member_of[chat_id] = keys
+        return keys, [key for key in emptied if key not in self._buckets]
+
+    def unsubscribe(self, chat_id):
+        """Remove a chat everywhere; returns the buckets that became empty."""
+        emptied = []
+        for key in self._member_of.pop(chat_id, []):
+            members = self._buckets.get(key)
+            if members is not None:
+                members.discard(chat_id)
+                if not members:
+                    del self._buckets[key]
+                    emptied.append(key)
+        return emptied
+
+    def members(self, slot: str, at: str):
+        return list(self._buckets.get((slot, at), ()))
+
+    def buckets(self):
+        return list(self._buckets)
+
+    def __len__(self):
+        return len(self._member_of)
+
+
+subscribers = SubscriberIndex()
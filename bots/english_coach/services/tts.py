@@ -1,9 +1,182 @@
-from gtts import gTTS
 import os
+import json
+import uuid
+import asyncio
+import hashlib
+import weakref
+from collections import OrderedDict
+from .tts_engines import get_engine
 
-async def text_to_speech(text: str, filename: str = 'pronunciation.mp3'):
-    """Convert text to speech audio file."""
-    tts = gTTS(text=text, lang='en', slow=False)
-    filepath = f'/tmp/{filename}'
-    tts.save(filepath)
-    return filepath
+# Synthesized speech, one file per (engine, voice, text), least recently used evicted past the cap
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "/tmp/english_coach_tts")
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+# Telegram file_ids remembered (they stay valid after the local file is evicted)
+TTS_FILE_ID_MAX = int(os.getenv("TTS_FILE_ID_MAX", 20000))
+
+
+class TTSCache:
+    """Content-addressed speech files on disk plus the Telegram file_id of each.
+
+    A (engine, voice, text) is synthesized once; the first send uploads the
+    bytes straight from memory and every repeat sends the file_id, with no
+    audio bytes at all. Files on disk only serve later misses and restarts.
+    """
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._files = self._scan()  # digest -> size, least recently used first
+        self._bytes = sum(self._files.values())
+        self._file_ids_path = os.path.join(directory, "file_ids.json")
+        self._file_ids = self._load_file_ids()  # digest -> Telegram file_id
+        self._locks = weakref.WeakValueDictionary()  # digest -> asyncio.Lock while synthesizing or uploading
+
+    def _scan(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".mp3"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        return OrderedDict((digest, size) for _, digest, size in sorted(entries))
+
+    def _load_file_ids(self):
+        try:
+            with open(self._file_ids_path) as f:
+                return OrderedDict(json.load(f))
+        except FileNotFoundError:
+            return OrderedDict()
+        except Exception as e:
+            print(f"Could not read TTS file_ids {self._file_ids_path}: {e}")
+            return OrderedDict()
+
+    def _save_file_ids(self):
+        tmp = f"{self._file_ids_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._file_ids, f)
+        os.replace(tmp, self._file_ids_path)
+
+    @staticmethod
+    def key(text: str, engine: str, voice: str) -> str:
+        return hashlib.blake2b(f"{engine}\n{voice}\n{text}".encode(), digest_size=16).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.mp3")
+
+    def _lock(self, digest):
+        lock = self._locks.get(digest)
+        if lock is None:
+            lock = self._locks[digest] = asyncio.Lock()
+        return lock
+
+    def _touch(self, digest):
+        self._files.move_to_end(digest)
+        try:
+            os.utime(self._path(digest))  # keeps the order across restarts
+        except OSError:
+            pass
+
+    def _evict(self, keep: str):
+        while self._bytes > self.max_bytes and len(self._files) > 1:
+            digest, size = next(iter(self._files.items()))
+            if digest == keep:
+                break
+            del self._files[digest]
+            self._bytes -= size
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _store(self, digest: str, data: bytes):
+        # Write under a unique temp name, then move into place atomically
+        path = self._path(digest)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Could not cache speech {path}: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self._bytes -= self._files.pop(digest, 0)
+        self._files[digest] = len(data)
+        self._bytes += len(data)
+        self._evict(keep=digest)
+
+    def _read(self, digest: str):
+        if digest not in self._files:
+            return None
+        try:
+            with open(self._path(digest), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._bytes -= self._files.pop(digest)
+            return None
+        self._touch(digest)
+        return data
+
+    async def _audio(self, digest: str, text: str, engine: str, voice: str) -> bytes:
+        data = self._read(digest)
+        if data is None:
+            data = await get_engine(engine).synthesize(text, voice)
+            self._store(digest, data)
+        return data
+
+    async def audio(self, text: str, engine: str = 'gtts', voice: str = None) -> bytes:
+        """Speech for `text` as audio bytes, synthesized on a miss."""
+        voice = voice or get_engine(engine).default_voice
+        digest = self.key(text, engine, voice)
+        data = self._read(digest)
+        if data is not None:
+            return data
+        async with self._lock(digest):
+            return await self._audio(digest, text, engine, voice)
+
+    def file_id(self, text: str, engine: str = 'gtts', voice: str = None):
+        return self._file_ids.get(self.key(text, engine, voice or get_engine(engine).default_voice))
+
+    def remember_file_id(self, digest: str, file_id: str):
+        self._file_ids[digest] = file_id
+        self._file_ids.move_to_end(digest)
+        while len(self._file_ids) > TTS_FILE_ID_MAX:
+            self._file_ids.popitem(last=False)
+        try:
+            self._save_file_ids()
+        except Exception as e:
+            print(f"Could not write TTS file_ids {self._file_ids_path}: {e}")
+
+    async def send_voice(self, bot, chat_id, text: str, engine: str = 'gtts', voice: str = None):
+        """Send speech for `text`: by file_id when Telegram already has it, else upload once."""
+        voice = voice or get_engine(engine).default_voice
+        digest = self.key(text, engine, voice)
+        file_id = self._file_ids.get(digest)
+        if file_id:
+            try:
+                return await bot.send_voice(chat_id, file_id)
+            except Exception as e:
+                # Stale or foreign file_id: forget it and upload again
+                print(f"Cached voice file_id failed, re-uploading: {e}")
+                if self._file_ids.get(digest) == file_id:
+                    del self._file_ids[digest]
+        async with self._lock(digest):
+            # Concurrent first sends wait here for one upload, then use its file_id
+            file_id = self._file_ids.get(digest)
+            if not file_id:
+                message = await bot.send_voice(chat_id, await self._audio(digest, text, engine, voice))
+                sent = message.voice or message.audio
+                if sent:
+                    self.remember_file_id(digest, sent.file_id)
+                return message
+        return await bot.send_voice(chat_id, file_id)
+
+
+# Shared by lookups, reviews, Word of the Day and shadowing
+tts_cache = TTSCache()
+
+
+async def text_to_speech(text: str, engine: str = 'gtts', voice: str = None) -> bytes:
+    """Speech audio for `text` as bytes (cached), ready for send_voice."""
+    return await tts_cache.audio(text, engine, voice)
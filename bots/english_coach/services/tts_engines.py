@@ -0,0 +1,89 @@
+import io
+import abc
+import time
+import asyncio
+import hashlib
+from gtts import gTTS
+import edge_tts
+from services.db_executor import QueryMetrics
+
+# Synthesis latency per engine ("tts.gtts", "tts.edge", ...), shown in /admin/metrics
+tts_metrics = QueryMetrics()
+
+
+class TTSEngine(abc.ABC):
+    """Async text-to-speech into memory: synthesize() returns the audio bytes."""
+
+    name = "base"
+    default_voice = None
+
+    @abc.abstractmethod
+    async def _synthesize(self, text: str, voice: str) -> bytes:
+        """Render `text` with `voice`; subclasses implement this."""
+
+    async def synthesize(self, text: str, voice: str = None) -> bytes:
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await self._synthesize(text, voice or self.default_voice)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            tts_metrics.observe(f"tts.{self.name}", (time.perf_counter() - start) * 1000, outcome)
+
+
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS. gTTS is blocking network I/O, so it runs on a worker thread."""
+
+    name = "gtts"
+    default_voice = "en"
+
+    async def _synthesize(self, text: str, voice: str) -> bytes:
+        def render():
+            buffer = io.BytesIO()
+            gTTS(text=text, lang=voice, slow=False).write_to_fp(buffer)
+            return buffer.getvalue()
+        return await asyncio.to_thread(render)
+
+
+class EdgeTTSEngine(TTSEngine):
+    """Microsoft Edge neural voices, streamed chunk by chunk into a buffer."""
+
+    name = "edge"
+    default_voice = "en-US-JennyNeural"
+
+    async def _synthesize(self, text: str, voice: str) -> bytes:
+        buffer = io.BytesIO()
+        async for chunk in edge_tts.Communicate(text, voice).stream():
+            if chunk["type"] == "audio":
+                buffer.write(chunk["data"])
+        return buffer.getvalue()
+
+
+class FakeTTSEngine(TTSEngine):
+    """Offline engine for tests and benchmarks: deterministic bytes after `delay` seconds.
+
+    Not in ENGINES; tests and benchmarks put an instance there themselves.
+    """
+
+    name = "fake"
+    default_voice = "fake"
+
+    def __init__(self, delay: float = 0.0, size: int = 6000):
+        self.delay = delay
+        self.size = size
+        self.calls = 0
+
+    async def _synthesize(self, text: str, voice: str) -> bytes:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        seed = hashlib.blake2b(f"{voice}\n{text}".encode()).digest()
+        return (seed * (self.size // len(seed) + 1))[:self.size]
+
+
+ENGINES = {engine.name: engine for engine in (GTTSEngine(), EdgeTTSEngine())}
+
+
+def get_engine(name: str) -> TTSEngine:
+    return ENGINES[name]
@@ -2,17 +2,17 @@ import asyncio
 import os
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-from .services.telegram_bot import application, model
-from .services.database import DatabaseService
+from .services.telegram_bot import application, model, BOT_NAME, MODEL_NAME, db
 from dotenv import load_dotenv
 import random
 import google.generativeai as genai
+from services.token_usage import token_ledger
+from services.message_record import to_gemini_history
 
 load_dotenv()
 
 CHECK_INTERVAL = 60
 USER_TELEGRAM_ID = os.getenv("USER_TELEGRAM_ID")
-db = DatabaseService()
 
 MORNING_MESSAGES = [
     "孩子，早安。新的一天，记住：不要等待机会，去创造机会。💪",
@@ -111,13 +111,11 @@ async def trigger_weekly_review():
         Keep it strong, fatherly, and concise (under 150 words).
         """
         
-        gemini_history = []
-        for msg in history:
-            role = "user" if msg['role'] == "user" else "model"
-            gemini_history.append({"role": role, "parts": [msg['content']]})
+        gemini_history = to_gemini_history(history)
             
         chat = model.start_chat(history=gemini_history)
         response = chat.send_message(prompt)
+        token_ledger.record(BOT_NAME, USER_TELEGRAM_ID, "proactive", MODEL_NAME, response)
         review_msg = response.text
         
         await application.bot.send_message(chat_id=target_id, text=review_msg)
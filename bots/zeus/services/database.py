@@ -1,19 +1,24 @@
 import os
-from supabase import create_client, Client
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from datetime import datetime
+from services.history_merge import fetch_combined_context
+from services.db_executor import execute_query
+from services.storage import get_client
+from services.write_behind import get_write_buffer
+from services.history_cache import history_cache, history_floor
+from services.family_dedup import family_dedup
+from services.message_record import HISTORY_COLUMNS, FAMILY_HISTORY_COLUMNS, MessageRecord, family_source
 
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
 class DatabaseService:
     def __init__(self):
-        if SUPABASE_URL and SUPABASE_KEY:
-            self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.supabase = get_client()
+        if self.supabase:
+            # Chat log rows are written behind in batches
+            self.private_logs = get_write_buffer("zeus_chat_log", self.supabase)
+            self.family_logs = get_write_buffer("family_chat_logs", self.supabase)
         else:
-            self.supabase = None
             print("Warning: Supabase credentials not found. Database disabled.")
 
     async def save_message(self, user_id: str, role: str, content: str, platform: str, bot_name: str = "zeus", emotion_tag: str = None, chat_id: str = None):
@@ -26,26 +31,11 @@ class DatabaseService:
         # Determine table based on platform
         table_name = "zeus_chat_log" if platform == "telegram_private" else "family_chat_logs"
 
-        # Deduplication: Check if this user message already exists in group chat
-        if table_name == "family_chat_logs" and role == "user":
-            try:
-                # Check for duplicate within last 10 seconds
-                ten_seconds_ago = (datetime.utcnow() - timedelta(seconds=10)).isoformat()
-                existing = self.supabase.table("family_chat_logs") \
-                    .select("id") \
-                    .eq("user_id", str(user_id)) \
-                    .eq("role", "user") \
-                    .eq("content", content) \
-                    .gte("created_at", ten_seconds_ago) \
-                    .execute()
-                
-                if existing.data and len(existing.data) > 0:
-                    print(f"Skipping duplicate user message in group chat: {content[:50]}...")
-                    # Relaxing deduplication for now to ensure responsiveness
-                    # return False
-                    pass
-            except Exception as e:
-                print(f"Deduplication check failed: {e}")
+        # Athena sees the same group message; only the first bot to save it writes a row.
+        # A skipped duplicate still counts as saved so Zeus goes on to reply.
+        if table_name == "family_chat_logs" and role == "user" and not family_dedup.claim(target_chat_id, user_id, content):
+            print(f"Skipping duplicate user message in group chat: {content[:50]}...")
+            return True
 
         data = {
             "user_id": str(user_id),
@@ -62,7 +52,10 @@ class DatabaseService:
             data["bot_name"] = bot_name if role == "assistant" else None
         
         try:
-            self.supabase.table(table_name).insert(data).execute()
+            buffer = self.family_logs if table_name == "family_chat_logs" else self.private_logs
+            await buffer.add(data)
+            source = family_source if table_name == "family_chat_logs" else "private"
+            history_cache.append((table_name, str(user_id)), MessageRecord.from_row(data, source))
             return True
         except Exception as e:
             print(f"Failed to save message to {table_name}: {e}")
@@ -73,30 +66,24 @@ class DatabaseService:
         if not self.supabase:
             return []
 
+        private_key = ("zeus_chat_log", str(user_id))
+        family_key = ("family_chat_logs", str(user_id))
+        cached = history_cache.get([private_key, family_key], limit)
+        if cached is not None:
+            return cached
+
         try:
-            # Fetch from family logs
-            family_response = self.supabase.table("family_chat_logs") \
-                .select("*") \
-                .eq("user_id", str(user_id)) \
-                .order("created_at", desc=True) \
-                .limit(limit) \
-                .execute()
-            
-            # Fetch from private logs
-            private_response = self.supabase.table("zeus_chat_log") \
-                .select("*") \
-                .eq("user_id", str(user_id)) \
-                .order("created_at", desc=True) \
-                .limit(limit) \
-                .execute()
-            
-            # Combine and sort
-            combined = family_response.data + private_response.data
-            # Sort by created_at ascending (oldest first) for context window
-            sorted_msgs = sorted(combined, key=lambda x: x['created_at'])
-            
-            # Return only the last 'limit' messages
-            return sorted_msgs[-limit:]
+            # Private and group logs are streamed in keyset pages (first pages
+            # concurrently) and merged with rows still buffered for writing; only
+            # the newest `limit` rows across both are read, returned oldest first
+            rows = await fetch_combined_context(self.supabase, user_id, [
+                ("family_chat_logs", FAMILY_HISTORY_COLUMNS, family_source, self.family_logs.overlay(user_id=str(user_id))),
+                ("zeus_chat_log", HISTORY_COLUMNS, "private", self.private_logs.overlay(user_id=str(user_id))),
+            ], limit, label="zeus.combined_context")
+            floor = history_floor(rows, limit)
+            history_cache.fill(private_key, [r for r in rows if r.source == "private"], floor)
+            history_cache.fill(family_key, [r for r in rows if r.source != "private"], floor)
+            return rows
             
         except Exception as e:
             print(f"Failed to fetch combined context: {e}")
@@ -108,12 +95,14 @@ class DatabaseService:
             return None
             
         try:
-            response = self.supabase.table("family_chat_logs") \
-                .select("chat_id") \
-                .eq("platform", "telegram_group") \
-                .order("created_at", desc=True) \
-                .limit(1) \
-                .execute()
+            response = await execute_query(
+                self.supabase.table("family_chat_logs")
+                    .select("chat_id")
+                    .eq("platform", "telegram_group")
+                    .order("created_at", desc=True)
+                    .limit(1),
+                "zeus.family_chat_logs.group_id"
+            )
             
             if response.data and len(response.data) > 0:
                 return response.data[0]['chat_id']
@@ -139,7 +128,7 @@ class DatabaseService:
         }
         
         try:
-            self.supabase.table("zeus_reminders").insert(data).execute()
+            await execute_query(self.supabase.table("zeus_reminders").insert(data), "zeus.zeus_reminders.insert", idempotent=False)
             print(f"Reminder added ({reminder_type}): {content} at {reminder_time}")
         except Exception as e:
             print(f"Failed to add reminder: {e}")
@@ -151,11 +140,13 @@ class DatabaseService:
         now = datetime.utcnow().isoformat()
         
         try:
-            response = self.supabase.table("zeus_reminders") \
-                .select("*") \
-                .eq("status", "pending") \
-                .lte("reminder_time", now) \
-                .execute()
+            response = await execute_query(
+                self.supabase.table("zeus_reminders")
+                    .select("*")
+                    .eq("status", "pending")
+                    .lte("reminder_time", now),
+                "zeus.zeus_reminders.due"
+            )
             return response.data
         except Exception as e:
             print(f"Failed to get due reminders: {e}")
@@ -166,9 +157,11 @@ class DatabaseService:
         if not self.supabase: return
         
         try:
-            self.supabase.table("zeus_reminders") \
-                .update({"status": "sent"}) \
-                .eq("id", reminder_id) \
-                .execute()
+            await execute_query(
+                self.supabase.table("zeus_reminders")
+                    .update({"status": "sent"})
+                    .eq("id", reminder_id),
+                "zeus.zeus_reminders.mark_sent"
+            )
         except Exception as e:
             print(f"Failed to mark reminder sent: {e}")
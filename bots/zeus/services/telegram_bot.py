@@ -7,6 +7,7 @@ from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from dotenv import load_dotenv
 from .database import DatabaseService
+from services.token_usage import token_ledger
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
@@ -15,9 +16,12 @@ load_dotenv()
 TELEGRAM_BOT_TOKEN = os.getenv("ZEUS_TELEGRAM_BOT_TOKEN")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+BOT_NAME = "zeus"
+MODEL_NAME = 'gemini-2.5-flash'
+
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    model = genai.GenerativeModel(MODEL_NAME)
 else:
     model = None
 
@@ -112,6 +116,7 @@ async def extract_and_schedule_event(user_id: str, chat_id: str, text: str):
     
     try:
         response = model.generate_content(prompt)
+        token_ledger.record(BOT_NAME, user_id, "extraction", MODEL_NAME, response)
         result = response.text.strip()
         if result.startswith("```json"):
             result = result[7:-3]
@@ -193,7 +198,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     print(f"Zeus: Saving message to DB...")
     saved = await db.save_message(user_id, "user", text, platform, bot_name=None, emotion_tag=problem_tag, chat_id=chat_id)
     if not saved:
-        print(f"Zeus: Duplicate message detected for user {user_id}, skipping response generation.")
+        print(f"Zeus: Could not save message for user {user_id}, skipping response generation.")
         return
     print(f"Zeus: Message saved. Triggering event extraction...")
 
@@ -202,7 +207,9 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Fetch combined context
     print(f"Zeus: Fetching context...")
-    history = await db.get_combined_context(user_id, limit=500)
+    # Over budget: the "fast" route answers with a short context window instead
+    route = token_ledger.route_for(BOT_NAME, user_id, "smart")
+    history = await db.get_combined_context(user_id, limit=500 if route == "smart" else 20)
     print(f"Zeus: Context fetched ({len(history)} messages). Generating response...")
     
     gemini_history = []
@@ -221,9 +228,10 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         gemini_history.append({"role": role, "parts": [clean_content]})
     
     try:
-        model_with_sys = genai.GenerativeModel('gemini-2.5-flash', system_instruction=get_system_prompt())
+        model_with_sys = genai.GenerativeModel(MODEL_NAME, system_instruction=get_system_prompt())
         chat = model_with_sys.start_chat(history=gemini_history)
         response = chat.send_message(text)
+        token_ledger.record(BOT_NAME, user_id, route, MODEL_NAME, response)
         reply_text = response.text
         print(f"Zeus: Response generated: {reply_text[:20]}...")
     except Exception as e:
@@ -1,9 +1,10 @@
 import logging
 import asyncio
 import os
+import hmac
 import uvicorn
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Header
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
@@ -16,6 +17,15 @@ from bots.english_coach.bot import process_telegram_update as english_coach_hand
 
 # Import Scheduler
 from scheduler import start_master_scheduler
+from services.token_usage import token_ledger
+from services.db_executor import db_metrics
+from services.write_behind import flush_all_buffers, write_behind_snapshot
+from services.history_cache import history_cache
+from services.storage import http_metrics
+from services.family_dedup import family_dedup
+from bots.english_coach.services.review_buffer import review_grades
+from bots.english_coach.services.database import learning_stats
+from bots.english_coach.services.tts_engines import tts_metrics
 
 # Configure Logging
 logging.basicConfig(
@@ -30,8 +40,14 @@ async def lifespan(app: FastAPI):
     """Start background tasks."""
     logger.info("🚀 Starting OmniBot (Webhook Mode)...")
     asyncio.create_task(start_master_scheduler())
+    asyncio.create_task(token_ledger.flush_loop())
     yield
     logger.info("🛑 Shutting down OmniBot...")
+    await flush_all_buffers()
+    await review_grades.flush()
+    if learning_stats:
+        await learning_stats.flush()
+    await token_ledger.flush_async()
 
 # --- FastAPI App ---
 app = FastAPI(lifespan=lifespan)
@@ -51,6 +67,54 @@ async def health_check():
 async def health_check_alias():
     return {"status": "alive", "mode": "webhook"}
 
+# --- Admin Endpoints ---
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def is_admin(token: str) -> bool:
+    # Constant-time comparison so the token cannot be guessed by timing
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token or "", ADMIN_TOKEN)
+
+@app.get("/admin/usage")
+async def admin_usage(bot: str = None, user_id: str = None, window: str = "24h", history: bool = False, x_admin_token: str = Header(None)):
+    """Token usage per bot/user/route/model (rolling window, or flushed daily history)."""
+    if not is_admin(x_admin_token):
+        return JSONResponse(content={"error": "unauthorized"}, status_code=401)
+
+    if history:
+        await token_ledger.flush_async()
+        return {"history": await asyncio.to_thread(token_ledger.history, bot, user_id)}
+
+    rows = token_ledger.usage(bot, user_id, window)
+    bots = sorted({r["bot"] for r in rows})
+    return {
+        "window": window,
+        "usage": rows,
+        "budgets": {
+            b: {
+                "bot_budget": token_ledger.budget_for(b, "bot"),
+                "user_budget": token_ledger.budget_for(b, "user"),
+                "bot_total": token_ledger.total(b, window=window),
+                "over_budget": token_ledger.over_budget(b),
+            }
+            for b in bots
+        },
+    }
+
+@app.get("/admin/metrics")
+async def admin_metrics(x_admin_token: str = Header(None)):
+    """Runtime metrics: DB call latency per query label, history cache hit rate, HTTP connection reuse, family group dedup, TTS synthesis latency and write-behind buffers."""
+    if not is_admin(x_admin_token):
+        return JSONResponse(content={"error": "unauthorized"}, status_code=401)
+    return {
+        "db": db_metrics.snapshot(),
+        "history_cache": history_cache.snapshot(),
+        "http": http_metrics.snapshot(),
+        "family_dedup": family_dedup.snapshot(),
+        "tts": tts_metrics.snapshot(),
+        "write_behind": write_behind_snapshot(),
+    }
+
 # --- Webhook Endpoints ---
 
 @app.post("/webhook/elena")
@@ -0,0 +1,55 @@
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+from services.storage import create_storage_client
+from services.migrations import migration_tables
+
+load_dotenv()
+
+# Copy every table between storage backends, e.g.
+#   python migrate_storage.py --from supabase --to sqlite
+#   python migrate_storage.py --from sqlite --to supabase --tables flashcards,journal_entries
+# Rows are upserted on id, so re-running a migration is safe.
+
+def migrate_table(source, target, table: str, batch_size: int):
+    copied = 0
+    offset = 0
+    while True:
+        page = source.table(table).select("*").order("id").range(offset, offset + batch_size - 1).execute().data or []
+        if page:
+            target.table(table).upsert(page, on_conflict="id").execute()
+            copied += len(page)
+        if len(page) < batch_size:
+            return copied
+        offset += batch_size
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk copy bot data between storage backends.")
+    parser.add_argument("--from", dest="source", required=True, choices=["supabase", "sqlite"])
+    parser.add_argument("--to", dest="target", required=True, choices=["supabase", "sqlite"])
+    parser.add_argument("--tables", help="Comma-separated tables (default: all)")
+    parser.add_argument("--batch", type=int, default=500, help="Rows per read/write round trip")
+    args = parser.parse_args()
+
+    if args.source == args.target:
+        sys.exit("Source and target backends must differ.")
+
+    source = create_storage_client(args.source)
+    target = create_storage_client(args.target)
+    if source is None or target is None:
+        sys.exit("Supabase credentials not found (SUPABASE_URL / SUPABASE_KEY).")
+
+    tables = args.tables.split(",") if args.tables else migration_tables()
+    total_start = time.perf_counter()
+    for table in tables:
+        start = time.perf_counter()
+        try:
+            count = migrate_table(source, target, table.strip(), args.batch)
+            print(f"✅ {table}: {count} rows in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            print(f"❌ {table}: {e}")
+    print(f"Done in {time.perf_counter() - total_start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+-- Every table the bots read or write (Postgres / Supabase dialect).
+-- The SQLite backend runs the same files through services.migrations.to_sqlite().
+
+-- Alex
+CREATE TABLE IF NOT EXISTS chat_logs (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    platform TEXT,
+    media_type TEXT,
+    media_url TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS alex_scheduled_messages (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    scheduled_time TIMESTAMPTZ NOT NULL,
+    message_content TEXT NOT NULL,
+    context TEXT,
+    is_sent BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS alex_linked_identities (
+    id BIGSERIAL PRIMARY KEY,
+    person_id TEXT NOT NULL,
+    channel TEXT NOT NULL,      -- 'telegram' or 'voice'
+    channel_id TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Elena
+CREATE TABLE IF NOT EXISTS elena_chat_logs (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    platform TEXT,
+    media_type TEXT,
+    media_url TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Athena & Zeus
+CREATE TABLE IF NOT EXISTS family_chat_logs (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    chat_id TEXT,           -- Group Chat ID or User ID
+    bot_name TEXT,          -- 'athena' or 'zeus'
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    platform TEXT NOT NULL, -- 'telegram' or 'telegram_group'
+    emotion_tag TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS athena_chat_log (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    emotion_tag TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS zeus_chat_log (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    emotion_tag TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS athena_reminders (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    content TEXT NOT NULL,
+    event_time TIMESTAMPTZ NOT NULL,
+    reminder_time TIMESTAMPTZ NOT NULL,
+    status TEXT DEFAULT 'pending',
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS zeus_reminders (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    content TEXT NOT NULL,
+    event_time TIMESTAMPTZ NOT NULL,
+    reminder_time TIMESTAMPTZ NOT NULL,
+    reminder_type TEXT DEFAULT 'post_event', -- 'pre_event' or 'post_event'
+    status TEXT DEFAULT 'pending',
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- English Coach
+CREATE TABLE IF NOT EXISTS flashcards (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    word TEXT NOT NULL,
+    definition TEXT,
+    ipa TEXT,
+    chinese TEXT,
+    example TEXT,
+    review_level INTEGER DEFAULT 0,
+    next_review_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS journal_entries (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    entry_date TEXT,
+    entry TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS missions (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    status TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS english_coach_users (
+    id BIGSERIAL PRIMARY KEY,
+    user_id TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
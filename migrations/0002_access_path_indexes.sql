@@ -0,0 +1,29 @@
+-- One composite index per access path in the DB modules (see ACCESS_PATHS in
+-- services/migrations.py; `python -m services.migrations --check` verifies coverage).
+
+-- Chat history: WHERE user_id = ? / IN (...) ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_chat_logs_user_created ON chat_logs (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_elena_chat_logs_user_created ON elena_chat_logs (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_athena_chat_user ON athena_chat_log (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_zeus_chat_user ON zeus_chat_log (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_family_chat_user_created ON family_chat_logs (user_id, created_at DESC);
+
+-- Family group lookup: WHERE platform = 'telegram_group' ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_family_chat_platform_created ON family_chat_logs (platform, created_at DESC);
+
+-- Due reminders: WHERE status = 'pending' AND reminder_time <= now
+CREATE INDEX IF NOT EXISTS idx_athena_reminders_status_time ON athena_reminders (status, reminder_time);
+CREATE INDEX IF NOT EXISTS idx_zeus_reminders_status_time ON zeus_reminders (status, reminder_time);
+
+-- Alex scheduled messages: pending sweep and per-user listing
+CREATE INDEX IF NOT EXISTS idx_alex_scheduled_messages_pending ON alex_scheduled_messages (is_sent, scheduled_time);
+CREATE INDEX IF NOT EXISTS idx_alex_scheduled_messages_user_time ON alex_scheduled_messages (user_id, is_sent, scheduled_time);
+CREATE INDEX IF NOT EXISTS idx_alex_linked_identities_person ON alex_linked_identities (person_id);
+
+-- Flashcards: duplicate check, due cards, recent cards
+CREATE INDEX IF NOT EXISTS idx_flashcards_user_word ON flashcards (user_id, word);
+CREATE INDEX IF NOT EXISTS idx_flashcards_user_due ON flashcards (user_id, next_review_at);
+CREATE INDEX IF NOT EXISTS idx_flashcards_user_created ON flashcards (user_id, created_at DESC);
+
+-- Journal entries per user
+CREATE INDEX IF NOT EXISTS idx_journal_entries_user_date ON journal_entries (user_id, entry_date);
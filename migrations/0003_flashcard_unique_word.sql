@@ -0,0 +1,10 @@
+-- One flashcard per (user_id, word), so saves and imports can upsert in a single
+-- round trip instead of select-then-insert.
+
+-- Keep the oldest copy of any word saved twice before this constraint existed
+DELETE FROM flashcards WHERE id NOT IN (SELECT MIN(id) FROM flashcards GROUP BY user_id, word);
+
+CREATE UNIQUE INDEX IF NOT EXISTS flashcards_user_word_key ON flashcards (user_id, word);
+
+-- Superseded by the unique index above
+DROP INDEX IF EXISTS idx_flashcards_user_word;
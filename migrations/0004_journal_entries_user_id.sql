@@ -0,0 +1,3 @@
+-- /memory keeps a per-user index of journal entry IDs, loaded in id order:
+-- WHERE user_id = ? AND id > ? ORDER BY id
+CREATE INDEX IF NOT EXISTS idx_journal_entries_user_id ON journal_entries (user_id, id);
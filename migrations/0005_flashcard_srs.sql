@@ -0,0 +1,20 @@
+-- SM-2 scheduling state per flashcard (review_level stays the repetition count,
+-- next_review_at the due date), and the (user_id, id) index used to load a
+-- user's deck into memory: WHERE user_id = ? AND id > ? ORDER BY id
+ALTER TABLE flashcards ADD COLUMN IF NOT EXISTS ease REAL DEFAULT 2.5;
+ALTER TABLE flashcards ADD COLUMN IF NOT EXISTS interval_days REAL DEFAULT 0;
+ALTER TABLE flashcards ADD COLUMN IF NOT EXISTS lapses INTEGER DEFAULT 0;
+ALTER TABLE flashcards ADD COLUMN IF NOT EXISTS last_review_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_flashcards_user_id ON flashcards (user_id, id);
+
+-- Carry over the old fixed schedule (1d, 3d, 7d, 14d, 30d, 60d per level)
+UPDATE flashcards SET interval_days = CASE
+    WHEN review_level IS NULL OR review_level <= 0 THEN 0
+    WHEN review_level = 1 THEN 1
+    WHEN review_level = 2 THEN 3
+    WHEN review_level = 3 THEN 7
+    WHEN review_level = 4 THEN 14
+    WHEN review_level = 5 THEN 30
+    ELSE 60
+END;
@@ -0,0 +1,24 @@
+-- Per-user learning counters for /stats, kept up to date by the bot on every
+-- write instead of counting rows on each read
+CREATE TABLE IF NOT EXISTS english_coach_stats (
+    user_id TEXT PRIMARY KEY,
+    total_cards INTEGER DEFAULT 0,
+    reviews INTEGER DEFAULT 0,
+    correct INTEGER DEFAULT 0,
+    journals INTEGER DEFAULT 0,
+    missions INTEGER DEFAULT 0,
+    streak_days INTEGER DEFAULT 0,
+    last_active_date TEXT,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Backfill from existing data (review history was never recorded, so it starts at 0)
+INSERT INTO english_coach_stats (user_id)
+SELECT user_id FROM flashcards
+UNION SELECT user_id FROM journal_entries
+UNION SELECT user_id FROM missions;
+
+UPDATE english_coach_stats SET
+    total_cards = (SELECT COUNT(*) FROM flashcards f WHERE f.user_id = english_coach_stats.user_id),
+    journals = (SELECT COUNT(*) FROM journal_entries j WHERE j.user_id = english_coach_stats.user_id),
+    missions = (SELECT COUNT(*) FROM missions m WHERE m.user_id = english_coach_stats.user_id AND m.status = 'completed');
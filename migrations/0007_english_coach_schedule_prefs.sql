@@ -0,0 +1,2 @@
+-- Per-user broadcast preferences, JSON: {"off": ["journal"], "times": {"wod": "07:30"}}
+ALTER TABLE english_coach_users ADD COLUMN IF NOT EXISTS schedule_prefs TEXT;
@@ -0,0 +1,12 @@
+-- Content shared by every user for a day (Word of the Day, ...): generated once,
+-- with the Telegram file_id of its audio so the file is uploaded once
+CREATE TABLE IF NOT EXISTS english_coach_daily_content (
+    id BIGSERIAL PRIMARY KEY,
+    kind TEXT NOT NULL,
+    day TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    file_id TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS english_coach_daily_content_kind_day_key ON english_coach_daily_content (kind, day);
@@ -0,0 +1,14 @@
+-- Client-generated key per buffered chat row, so a write-behind retry after a
+-- timed-out (but committed) batch upserts ON CONFLICT (write_key) DO NOTHING
+-- instead of inserting the rows twice. Older rows keep a NULL key.
+ALTER TABLE chat_logs ADD COLUMN IF NOT EXISTS write_key TEXT;
+ALTER TABLE elena_chat_logs ADD COLUMN IF NOT EXISTS write_key TEXT;
+ALTER TABLE athena_chat_log ADD COLUMN IF NOT EXISTS write_key TEXT;
+ALTER TABLE zeus_chat_log ADD COLUMN IF NOT EXISTS write_key TEXT;
+ALTER TABLE family_chat_logs ADD COLUMN IF NOT EXISTS write_key TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS chat_logs_write_key_key ON chat_logs (write_key);
+CREATE UNIQUE INDEX IF NOT EXISTS elena_chat_logs_write_key_key ON elena_chat_logs (write_key);
+CREATE UNIQUE INDEX IF NOT EXISTS athena_chat_log_write_key_key ON athena_chat_log (write_key);
+CREATE UNIQUE INDEX IF NOT EXISTS zeus_chat_log_write_key_key ON zeus_chat_log (write_key);
+CREATE UNIQUE INDEX IF NOT EXISTS family_chat_logs_write_key_key ON family_chat_logs (write_key);
@@ -0,0 +1,10 @@
+-- Due cards per user, counted in the database, so a review nudge slot reads
+-- one row per subscriber: SELECT user_id, due FROM english_coach_due_counts
+-- WHERE user_id IN (...). Never-scheduled cards (NULL) are due.
+CREATE INDEX IF NOT EXISTS idx_flashcards_user_next_review ON flashcards (user_id, next_review_at);
+
+CREATE OR REPLACE VIEW english_coach_due_counts AS
+SELECT user_id, COUNT(*) AS due
+FROM flashcards
+WHERE next_review_at IS NULL OR next_review_at <= NOW()
+GROUP BY user_id;
@@ -7,7 +7,7 @@ from bots.alex.scheduler import proactive_loop as alex_loop
 from bots.news.scheduler import scheduler_loop as news_loop
 # English Coach uses PTB JobQueue, which runs with the Application.
 # We need to ensure the Application is started.
-from bots.english_coach.bot import application as english_coach_app, restore_jobs
+from bots.english_coach.bot import application as english_coach_app, start_restore_jobs
 
 # Configure logging
 logging.basicConfig(
@@ -31,7 +31,7 @@ async def start_master_scheduler():
         if not english_coach_app._initialized:
             await english_coach_app.initialize()
             await english_coach_app.start()
-            await restore_jobs(english_coach_app)
+            start_restore_jobs(english_coach_app)
             logger.info("English Coach Application & JobQueue started.")
     
     logger.info("All bot schedulers started.")
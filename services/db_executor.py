@@ -0,0 +1,118 @@
+import os
+import time
+import asyncio
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# supabase-py is synchronous: every .execute() runs on this bounded pool so a
+# slow query never blocks the gateway event loop.
+#
+# A timeout only stops the caller from waiting: the worker thread cannot be
+# interrupted, so the query keeps running and a write may still commit after
+# the caller saw TimeoutError. Writes that must not be applied twice pass
+# idempotent=False, which waits for the real outcome (bounded by the HTTP
+# client's own SUPABASE_TIMEOUT) instead of abandoning the call.
+DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", 8))
+DB_QUERY_TIMEOUT = float(os.getenv("DB_QUERY_TIMEOUT", 10))
+
+_executor = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="db")
+
+
+class QueryMetrics:
+    """Per-label call counts, errors, timeouts and latency percentiles.
+
+    Timed-out calls are also tracked until their worker thread finishes:
+    abandoned_running is how many are still in flight, late_ok / late_errors
+    how they ended (late_ok on a write means it committed after the timeout).
+    """
+
+    def __init__(self, samples: int = 500):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {
+            "calls": 0, "errors": 0, "timeouts": 0, "total_ms": 0.0, "max_ms": 0.0,
+            "abandoned_running": 0, "late_ok": 0, "late_errors": 0,
+        })
+        self._samples = defaultdict(lambda: deque(maxlen=samples))
+
+    def observe(self, label: str, elapsed_ms: float, outcome: str = "ok"):
+        with self._lock:
+            stats = self._stats[label]
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            if outcome == "error":
+                stats["errors"] += 1
+            elif outcome == "timeout":
+                stats["timeouts"] += 1
+            self._samples[label].append(elapsed_ms)
+
+    def abandon(self, label: str, future):
+        """Count a timed-out call whose worker thread is still running, until it finishes."""
+        with self._lock:
+            self._stats[label]["abandoned_running"] += 1
+
+        def finished(future):
+            failed = future.cancelled() or future.exception() is not None
+            with self._lock:
+                stats = self._stats[label]
+                stats["abandoned_running"] -= 1
+                stats["late_errors" if failed else "late_ok"] += 1
+
+        future.add_done_callback(finished)
+
+    def snapshot(self):
+        """Latency summary per label (ms)."""
+        with self._lock:
+            result = {}
+            for label, stats in self._stats.items():
+                samples = sorted(self._samples[label])
+                result[label] = {
+                    **stats,
+                    "avg_ms": round(stats["total_ms"] / stats["calls"], 2) if stats["calls"] else 0.0,
+                    "p50_ms": round(samples[len(samples) // 2], 2) if samples else 0.0,
+                    "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2) if samples else 0.0,
+                    "total_ms": round(stats["total_ms"], 2),
+                    "max_ms": round(stats["max_ms"], 2),
+                }
+            return result
+
+
+db_metrics = QueryMetrics()
+
+
+async def run_in_db_pool(func, *args, label: str = "db", timeout: float = None, idempotent: bool = True):
+    """Run a blocking DB callable on the bounded pool with a timeout and latency metrics.
+
+    idempotent=False waits without a timeout (see the note at the top).
+    """
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    outcome = "ok"
+    future = loop.run_in_executor(_executor, func, *args)
+    try:
+        if not idempotent:
+            return await future
+        # shield: on timeout the thread keeps running, so keep its future alive to count it
+        return await asyncio.wait_for(asyncio.shield(future), timeout or DB_QUERY_TIMEOUT)
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        db_metrics.abandon(label, future)
+        raise TimeoutError(f"DB call '{label}' timed out after {timeout or DB_QUERY_TIMEOUT}s")
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        db_metrics.observe(label, (time.perf_counter() - start) * 1000, outcome)
+
+
+async def execute_query(query, label: str = "db", timeout: float = None, idempotent: bool = True):
+    """Await a PostgREST query builder's .execute() without blocking the event loop.
+
+    Pass idempotent=False for writes that would duplicate if retried after a timeout
+    (plain inserts); reads, upserts and updates by key are safe to abandon.
+    """
+    return await run_in_db_pool(query.execute, label=label, timeout=timeout, idempotent=idempotent)
@@ -0,0 +1,62 @@
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Seconds within which the same group message seen by several bots counts as one
+FAMILY_DEDUP_WINDOW_SECONDS = float(os.getenv("FAMILY_DEDUP_WINDOW_SECONDS", 10))
+
+
+class FamilyDedupIndex:
+    """In-process index of group user messages already written to family_chat_logs.
+
+    Athena and Zeus both receive every family group message; whichever bot saves
+    it first claims (chat_id, user_id, content hash, time bucket) and the other
+    skips the write. No DB read is involved. The previous bucket is checked too,
+    so a pair straddling a bucket boundary is still caught.
+    """
+
+    def __init__(self, window: float = FAMILY_DEDUP_WINDOW_SECONDS):
+        self.window = window
+        self._seen = OrderedDict()  # key -> claim time, oldest first
+        self.claimed = 0
+        self.duplicates = 0
+
+    def _key(self, chat_id, user_id, content: str, bucket: int):
+        digest = hashlib.blake2b((content or "").encode("utf-8"), digest_size=16).digest()
+        return (str(chat_id), str(user_id), digest, bucket)
+
+    def _prune(self, now: float):
+        horizon = now - 2 * self.window
+        while self._seen:
+            key, seen_at = next(iter(self._seen.items()))
+            if seen_at >= horizon:
+                break
+            self._seen.popitem(last=False)
+
+    def claim(self, chat_id, user_id, content: str, now: float = None) -> bool:
+        """True if this is the first sighting of the message (caller should write it)."""
+        now = time.monotonic() if now is None else now
+        self._prune(now)
+        bucket = int(now // self.window)
+        key = self._key(chat_id, user_id, content, bucket)
+        if key in self._seen or self._key(chat_id, user_id, content, bucket - 1) in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen[key] = now
+        self.claimed += 1
+        return True
+
+    def snapshot(self):
+        return {
+            "claimed": self.claimed,
+            "duplicates": self.duplicates,
+            "tracked": len(self._seen),
+        }
+
+
+# Athena and Zeus both claim family group messages here
+family_dedup = FamilyDedupIndex()
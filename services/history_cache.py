@@ -0,0 +1,145 @@
+import os
+import time
+import heapq
+from itertools import islice
+from collections import OrderedDict, deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Newest rows kept per (table, user) and across every user (LRU-evicted)
+HISTORY_CACHE_ROWS_PER_USER = int(os.getenv("HISTORY_CACHE_ROWS_PER_USER", 1000))
+HISTORY_CACHE_MAX_ROWS = int(os.getenv("HISTORY_CACHE_MAX_ROWS", 50000))
+# Seconds an entry is trusted after its DB read. Write-through only sees this
+# process's saves; rows written by another process (e.g. the Alex voice server)
+# show up once the entry expires and is re-read.
+HISTORY_CACHE_TTL = float(os.getenv("HISTORY_CACHE_TTL", 60))
+
+
+class _Entry:
+    """Ring of a user's newest MessageRecords; holds every one with created_at >= floor (None = all)."""
+
+    __slots__ = ("rows", "floor", "expires_at")
+
+    def __init__(self, rows, floor, maxlen: int, ttl: float):
+        self.rows = deque(rows, maxlen=maxlen)
+        self.floor = floor
+        self.expires_at = time.monotonic() + ttl
+        if len(rows) > maxlen:
+            self.floor = self.rows[0].created_at
+
+
+def history_floor(rows, limit: int = None, since=None):
+    """Lowest timestamp a DB read is known to cover completely."""
+    if limit and len(rows) >= limit:
+        return rows[0]["created_at"]
+    if since is not None:
+        return since.isoformat()
+    return None
+
+
+class HistoryCache:
+    """Per-(table, user) ring buffers of recent chat rows, filled on read and written through on save.
+
+    Keys are (table, user_id) so family_chat_logs rows written by Athena are seen by Zeus.
+    Entries expire `ttl` seconds after they were filled, which bounds how stale a
+    read can be when another process writes the same table.
+    """
+
+    def __init__(self, rows_per_user: int = HISTORY_CACHE_ROWS_PER_USER, max_rows: int = HISTORY_CACHE_MAX_ROWS,
+                 ttl: float = HISTORY_CACHE_TTL):
+        self.rows_per_user = rows_per_user
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, keys, limit: int = None, since=None):
+        """Newest `limit` MessageRecords (oldest first) merged across keys, or None on a miss."""
+        entries = [self._entries.get(key) for key in keys]
+        now = time.monotonic()
+        if any(entry is None or entry.expires_at <= now for entry in entries):
+            self.misses += 1
+            return None
+
+        # Every source is complete from the highest floor upwards
+        floors = [entry.floor for entry in entries if entry.floor is not None]
+        floor = max(floors) if floors else None
+        if since is not None:
+            since = since.isoformat()
+            if floor is not None and floor > since:
+                self.misses += 1
+                return None
+
+        streams = [self._newest(entry, floor, since) for entry in entries]
+        merged = heapq.merge(*streams, key=lambda row: row["created_at"], reverse=True)
+        rows = list(islice(merged, limit)) if limit else list(merged)
+        if limit and len(rows) < limit and floor is not None and since is None:
+            self.misses += 1
+            return None
+
+        for key in keys:
+            self._entries.move_to_end(key)
+        self.hits += 1
+        rows.reverse()
+        return rows
+
+    def _newest(self, entry, floor, since):
+        for record in reversed(entry.rows):
+            created_at = record.created_at
+            if (floor is not None and created_at < floor) or (since is not None and created_at <= since):
+                return
+            yield record
+
+    def fill(self, key, records, floor):
+        """Warm a key from a DB read (oldest-first records complete from `floor`)."""
+        current = self._entries.get(key)
+        fresh = current is not None and current.expires_at > time.monotonic()
+        if fresh and (current.floor is None or (floor is not None and current.floor <= floor)):
+            # Already covers at least as much (write-through keeps it current)
+            self._entries.move_to_end(key)
+            return
+        if current is not None:
+            self._rows -= len(current.rows)
+        entry = _Entry(records, floor, self.rows_per_user, self.ttl)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._rows += len(entry.rows)
+        self._evict()
+
+    def append(self, key, record):
+        """Write-through for a newly saved MessageRecord (only warm keys are kept current)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        if len(entry.rows) == entry.rows.maxlen:
+            self._rows -= 1
+        entry.rows.append(record)
+        self._rows += 1
+        if len(entry.rows) == entry.rows.maxlen:
+            entry.floor = entry.rows[0].created_at
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        while self._rows > self.max_rows and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._rows -= len(entry.rows)
+            self.evictions += 1
+
+    def snapshot(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+            "users": len(self._entries),
+            "rows": self._rows,
+        }
+
+
+history_cache = HistoryCache()
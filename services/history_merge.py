@@ -0,0 +1,74 @@
+import heapq
+import asyncio
+from services.history_stream import HISTORY_PAGE_SIZE, iter_history, with_pending
+from services.message_record import to_records
+
+
+class _Head:
+    """A stream's current row on the merge heap; newest sorts first (heapq is a min-heap)."""
+
+    __slots__ = ("row", "value", "index")
+
+    def __init__(self, row, key: str, index: int):
+        self.row = row
+        self.value = row[key]
+        self.index = index
+
+    def __lt__(self, other):
+        # Ties go to the earlier stream
+        return (self.value, -self.index) > (other.value, -other.index)
+
+
+async def merge_streams(streams, limit: int, key: str = "created_at"):
+    """Lazy k-way merge of newest-first async streams; returns the newest `limit` rows oldest first.
+
+    heapq.merge only accepts synchronous iterables, and these streams are async
+    generators that fetch keyset pages on demand, so the merge keeps a heapq heap
+    of each stream's current row instead. A stream is only advanced (and its next
+    page only fetched) when its row is taken.
+    """
+    streams = list(streams)
+
+    async def head(index):
+        try:
+            return _Head(await streams[index].__anext__(), key, index)
+        except StopAsyncIteration:
+            return None
+
+    try:
+        # First pages are fetched concurrently; later pages only as the merge needs them
+        heap = [entry for entry in await asyncio.gather(*(head(i) for i in range(len(streams)))) if entry]
+        heapq.heapify(heap)
+        rows = []
+        while heap and len(rows) < limit:
+            newest = heapq.heappop(heap)
+            rows.append(newest.row)
+            if len(rows) < limit:
+                entry = await head(newest.index)
+                if entry:
+                    heapq.heappush(heap, entry)
+    finally:
+        for stream in streams:
+            await stream.aclose()
+    rows.reverse()
+    return rows
+
+
+async def fetch_combined_context(client, user_id, sources, limit: int, key: str = "created_at",
+                                 label: str = "combined_context", page_size: int = None):
+    """Stream every source newest first and k-way merge their newest `limit` messages.
+
+    sources: list of (table, columns, source, pending) where `source` labels the
+    table's MessageRecords and `pending` holds its not-yet-flushed write-behind rows.
+    Each table is read in keyset pages and only the pages the merge actually
+    consumes are fetched.
+    """
+    page_size = page_size or min(limit, HISTORY_PAGE_SIZE)
+    streams = [
+        with_pending(
+            iter_history(client, table, user_id, page_size, columns=columns, source=source, label=label),
+            to_records(pending, source), key
+        )
+        for table, columns, source, pending in sources
+    ]
+    return await merge_streams(streams, limit, key)
@@ -0,0 +1,98 @@
+import os
+from dotenv import load_dotenv
+from .db_executor import execute_query
+from .write_behind import row_key
+from .message_record import HISTORY_COLUMNS, MessageRecord
+
+load_dotenv()
+
+# Rows per keyset page when streaming chat history
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", 100))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    return len(text or "") // 4 + 1
+
+
+def _keyset_filter(created_at, row_id) -> str:
+    """Rows strictly older than (created_at, id), as a PostgREST or_ filter."""
+    return f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})'
+
+
+async def iter_history(client, table: str, user_id, page_size: int = HISTORY_PAGE_SIZE, since=None,
+                       columns: str = HISTORY_COLUMNS, source=None, label: str = None):
+    """Yield a user's messages newest first, one keyset page on (created_at, id) at a time.
+
+    user_id may be a single ID or a list (in_ filter). Rows are projected to `columns`
+    and turned into MessageRecords (see MessageRecord.from_row for `source`). Only one
+    page is held at once, so memory does not grow with conversation length; stop
+    iterating to stop fetching.
+    """
+    label = label or f"{table}.history_page"
+    cursor = None
+    while True:
+        query = client.table(table).select(columns)
+        if isinstance(user_id, (list, tuple)):
+            query = query.in_("user_id", [str(uid) for uid in user_id])
+        else:
+            query = query.eq("user_id", str(user_id))
+        if since is not None:
+            query = query.gt("created_at", since.isoformat())
+        if cursor is not None:
+            query = query.or_(_keyset_filter(*cursor))
+        query = query.order("created_at", desc=True).order("id", desc=True).limit(page_size)
+
+        page = (await execute_query(query, label)).data or []
+        if len(page) == page_size:
+            cursor = (page[-1]["created_at"], page[-1]["id"])
+        records = [MessageRecord.from_row(row, source) for row in page]
+        del page
+        for record in records:
+            yield record
+        if len(records) < page_size:
+            return
+
+
+async def with_pending(stream, pending, key: str = "created_at"):
+    """Merge not-yet-flushed write-behind records into a newest-first async stream."""
+    pending = sorted(pending, key=lambda row: row[key], reverse=True)
+    seen = set()
+    index = 0
+    async for row in stream:
+        while index < len(pending) and pending[index][key] > row[key]:
+            if row_key(pending[index]) not in seen:
+                seen.add(row_key(pending[index]))
+                yield pending[index]
+            index += 1
+        if row_key(row) not in seen:
+            seen.add(row_key(row))
+            yield row
+    for row in pending[index:]:
+        if row_key(row) not in seen:
+            seen.add(row_key(row))
+            yield row
+
+
+async def collect_newest(stream, limit: int = None, token_budget: int = None):
+    """Consume a newest-first stream until `limit` rows or the token budget is met.
+
+    Returns the rows oldest first. The stream is closed as soon as we have enough,
+    so no further pages are fetched.
+    """
+    rows = []
+    spent = 0
+    try:
+        async for row in stream:
+            if token_budget is not None:
+                spent += estimate_tokens(row["content"])
+                if spent > token_budget and rows:
+                    break
+            rows.append(row)
+            if limit and len(rows) >= limit:
+                break
+    finally:
+        await stream.aclose()
+    rows.reverse()
+    return rows
+
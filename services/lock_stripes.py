@@ -0,0 +1,22 @@
+import os
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Locks per striped pool; more stripes = fewer unrelated keys sharing a lock
+LOCK_STRIPES = int(os.getenv("LOCK_STRIPES", 64))
+
+
+class LockStripes:
+    """Fixed pool of asyncio locks where a key (e.g. a user ID) always maps to the same lock.
+
+    Serializes work per key without one global lock and without a lock per key
+    growing forever.
+    """
+
+    def __init__(self, stripes: int = LOCK_STRIPES):
+        self._locks = [asyncio.Lock() for _ in range(stripes)]
+
+    def __call__(self, key) -> asyncio.Lock:
+        return self._locks[hash(str(key)) % len(self._locks)]
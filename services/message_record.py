@@ -0,0 +1,58 @@
+# Columns history reads actually need (id only for keyset paging, user_id to
+# split linked-ID reads, bot_name to label family group replies)
+HISTORY_COLUMNS = "id,user_id,role,content,created_at"
+FAMILY_HISTORY_COLUMNS = "id,user_id,role,content,created_at,bot_name"
+
+
+class MessageRecord:
+    """One chat message, as compact as we can keep it in memory.
+
+    source says where it came from: the channel user_id for Alex, "private" or
+    "group" / "group:<bot_name>" for Athena and Zeus. msg['role'] style access
+    still works for existing callers.
+    """
+
+    __slots__ = ("role", "content", "created_at", "source")
+
+    def __init__(self, role: str, content: str, created_at: str, source: str = None):
+        self.role = role
+        self.content = content
+        self.created_at = created_at
+        self.source = source
+
+    @classmethod
+    def from_row(cls, row: dict, source=None):
+        """Build from a DB / write-buffer row; source may be a string or a callable(row)."""
+        if callable(source):
+            source = source(row)
+        return cls(row["role"], row["content"], row["created_at"], source if source is not None else row.get("user_id"))
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        return f"MessageRecord({self.role!r}, {self.content[:30]!r}, {self.created_at!r}, {self.source!r})"
+
+
+def family_source(row: dict) -> str:
+    """Source label for family_chat_logs rows ("group:athena", "group:zeus" or "group")."""
+    bot_name = row.get("bot_name")
+    return f"group:{bot_name}" if bot_name else "group"
+
+
+def to_records(rows, source=None):
+    return [MessageRecord.from_row(row, source) for row in rows]
+
+
+def to_gemini_history(records):
+    """Gemini chat history straight from records (one content dict per message)."""
+    return [
+        {"role": "user" if record.role == "user" else "model", "parts": [record.content]}
+        for record in records
+    ]
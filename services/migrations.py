@@ -0,0 +1,260 @@
+import os
+import re
+import sys
+import argparse
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ROOT = Path(__file__).resolve().parent.parent
+MIGRATIONS_DIR = ROOT / "migrations"
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Every query the DB modules run: (label, table, equality/IN columns, range or order column).
+# Upserts list their on_conflict columns (they need a unique index); plain inserts list none.
+# --check reports paths no index supports and execute_query() labels missing from this list.
+ACCESS_PATHS = [
+    ("alex.chat_logs.history", "chat_logs", ("user_id",), "created_at"),
+    ("alex.linked_identities.by_channel", "alex_linked_identities", ("channel_id",), None),
+    ("alex.linked_identities.by_person", "alex_linked_identities", ("person_id",), None),
+    ("alex.scheduled.pending", "alex_scheduled_messages", ("is_sent",), "scheduled_time"),
+    ("alex.scheduled.mark_sent", "alex_scheduled_messages", ("id",), None),
+    ("alex.scheduled.cancel", "alex_scheduled_messages", ("id",), None),
+    ("alex.scheduled.by_user", "alex_scheduled_messages", ("user_id", "is_sent"), "scheduled_time"),
+    ("elena.chat_logs.recent", "elena_chat_logs", ("user_id",), "created_at"),
+    ("athena.combined_context", "athena_chat_log", ("user_id",), "created_at"),
+    ("athena.combined_context", "family_chat_logs", ("user_id",), "created_at"),
+    ("athena.family_chat_logs.group_id", "family_chat_logs", ("platform",), "created_at"),
+    ("athena.athena_reminders.due", "athena_reminders", ("status",), "reminder_time"),
+    ("athena.athena_reminders.mark_sent", "athena_reminders", ("id",), None),
+    ("zeus.combined_context", "zeus_chat_log", ("user_id",), "created_at"),
+    ("zeus.combined_context", "family_chat_logs", ("user_id",), "created_at"),
+    ("zeus.family_chat_logs.group_id", "family_chat_logs", ("platform",), "created_at"),
+    ("zeus.zeus_reminders.due", "zeus_reminders", ("status",), "reminder_time"),
+    ("zeus.zeus_reminders.mark_sent", "zeus_reminders", ("id",), None),
+    ("english_coach.flashcards.existing_words", "flashcards", ("user_id", "word"), None),
+    ("english_coach.flashcards.deck", "flashcards", ("user_id",), "id"),
+    ("english_coach.flashcards.by_ids", "flashcards", ("id",), None),
+    ("english_coach.flashcards.recent", "flashcards", ("user_id",), "created_at"),
+    ("english_coach.flashcards.level", "flashcards", ("id",), None),
+    ("english_coach.flashcards.update_progress", "flashcards", ("id",), None),
+    ("english_coach.flashcards.review_batch", "flashcards", ("id",), None),
+    ("english_coach.flashcards.due_counts", "flashcards", ("user_id",), "next_review_at"),
+    ("english_coach.journal_entries.index", "journal_entries", ("user_id",), "id"),
+    ("english_coach.journal_entries.by_id", "journal_entries", ("id",), None),
+    ("english_coach.stats.by_user", "english_coach_stats", ("user_id",), None),
+    ("english_coach.english_coach_users.page", "english_coach_users", (), "id"),
+    ("english_coach.english_coach_users.prefs", "english_coach_users", ("user_id",), None),
+    ("english_coach.english_coach_users.save_prefs", "english_coach_users", ("user_id",), None),
+    ("english_coach.daily_content.get", "english_coach_daily_content", ("kind", "day"), None),
+    ("english_coach.daily_content.by_day", "english_coach_daily_content", ("kind", "day"), None),
+    ("english_coach.daily_content.file_id", "english_coach_daily_content", ("kind", "day"), None),
+    # Writes
+    ("alex.scheduled.insert", "alex_scheduled_messages", (), None),
+    ("athena.athena_reminders.insert", "athena_reminders", (), None),
+    ("zeus.zeus_reminders.insert", "zeus_reminders", (), None),
+    ("english_coach.flashcards.upsert", "flashcards", ("user_id", "word"), None),
+    ("english_coach.flashcards.import", "flashcards", ("user_id", "word"), None),
+    ("english_coach.journal_entries.insert", "journal_entries", (), None),
+    ("english_coach.missions.insert", "missions", (), None),
+    ("english_coach.stats.upsert", "english_coach_stats", ("user_id",), None),
+    ("english_coach.english_coach_users.upsert", "english_coach_users", ("user_id",), None),
+    ("english_coach.daily_content.upsert", "english_coach_daily_content", ("kind", "day"), None),
+    ("write_behind.chat_logs.upsert", "chat_logs", ("write_key",), None),
+    ("write_behind.elena_chat_logs.upsert", "elena_chat_logs", ("write_key",), None),
+    ("write_behind.athena_chat_log.upsert", "athena_chat_log", ("write_key",), None),
+    ("write_behind.zeus_chat_log.upsert", "zeus_chat_log", ("write_key",), None),
+    ("write_behind.family_chat_logs.upsert", "family_chat_logs", ("write_key",), None),
+]
+
+# Query labels in the bot sources: "<bot>.<table>.<query>" literals, plus the
+# write_behind.<table>.upsert label of every get_write_buffer("<table>", ...)
+_LABEL = r"[\"']({bot}(?:\.\w+)+)[\"']"
+_WRITE_BUFFER = re.compile(r"get_write_buffer\(\s*[\"'](\w+)[\"']")
+
+_SQLITE_TYPES = [
+    (r"\bBIGSERIAL PRIMARY KEY\b", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (r"\bTIMESTAMP WITH TIME ZONE\b", "TEXT"),
+    (r"\bTIMESTAMPTZ\b", "TEXT"),
+    (r"\bBOOLEAN\b", "INTEGER"),
+    # ISO-8601 text so PostgREST-style string comparisons behave the same on both backends
+    (r"\bDEFAULT NOW\(\)", "DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))"),
+    (r"\bNOW\(\)", "strftime('%Y-%m-%dT%H:%M:%f', 'now')"),
+    (r"\bCREATE OR REPLACE VIEW\b", "CREATE VIEW IF NOT EXISTS"),
+]
+# SQLite has no ADD COLUMN IF NOT EXISTS; apply_sqlite checks the table first
+_ADD_COLUMN = re.compile(r"ALTER TABLE\s+(\w+)\s+ADD COLUMN IF NOT EXISTS\s+(\w+)([^;]*);", re.I)
+
+
+def load_migrations():
+    """[(version, name, sql)] for migrations/NNNN_name.sql, in version order."""
+    migrations = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        match = re.match(r"^(\d+)_(.+)\.sql$", path.name)
+        if match:
+            migrations.append((match.group(1), match.group(2), path.read_text()))
+    return migrations
+
+
+def to_sqlite(sql: str) -> str:
+    """Translate the Postgres DDL used in migrations/ to SQLite."""
+    for pattern, replacement in _SQLITE_TYPES:
+        sql = re.sub(pattern, replacement, sql, flags=re.I)
+    return sql
+
+
+def _strip_comments(sql: str) -> str:
+    return re.sub(r"--[^\n]*", "", sql)
+
+
+def migration_tables():
+    """Every table created by the migrations, in creation order."""
+    tables = []
+    for _, _, sql in load_migrations():
+        for table in re.findall(r"CREATE TABLE(?: IF NOT EXISTS)?\s+(\w+)", sql, re.I):
+            if table not in tables:
+                tables.append(table)
+    return tables
+
+
+def schema_indexes():
+    """{table: [column tuples]} for every primary key, UNIQUE column and index in the migrations."""
+    indexes = {}
+    named = {}  # index name -> (table, columns), so a later DROP INDEX removes it
+    for _, _, sql in load_migrations():
+        sql = _strip_comments(sql)
+        for table, body in re.findall(r"CREATE TABLE(?: IF NOT EXISTS)?\s+(\w+)\s*\((.*?)\);", sql, re.I | re.S):
+            for line in body.split(","):
+                words = line.split()
+                if words and re.search(r"\b(PRIMARY KEY|UNIQUE)\b", line, re.I):
+                    indexes.setdefault(table, []).append((words[0],))
+        for name, table, columns in re.findall(r"CREATE (?:UNIQUE )?INDEX(?: IF NOT EXISTS)?\s+(\w+)\s+ON\s+(\w+)\s*\(([^)]*)\)", sql, re.I):
+            columns = tuple(c.split()[0] for c in columns.split(","))
+            indexes.setdefault(table, []).append(columns)
+            named[name] = (table, columns)
+        for table, columns in re.findall(r"ALTER TABLE\s+(\w+)\s+ADD CONSTRAINT\s+\w+\s+UNIQUE\s*\(([^)]*)\)", sql, re.I):
+            indexes.setdefault(table, []).append(tuple(c.strip() for c in columns.split(",")))
+        for name in re.findall(r"DROP INDEX(?: IF EXISTS)?\s+(\w+)", sql, re.I):
+            if name in named:
+                table, columns = named.pop(name)
+                indexes[table].remove(columns)
+    return indexes
+
+
+def _supports(index, equality, range_column) -> bool:
+    """An index serves a path if it starts with equality columns, then the range/order column."""
+    used = 0
+    while used < len(index) and index[used] in equality:
+        used += 1
+    if range_column is None:
+        return used > 0
+    if used == 0:
+        return not equality and index[0] == range_column
+    return used < len(index) and index[used] == range_column
+
+
+def check_indexes(paths=ACCESS_PATHS):
+    """Access paths that no index in the migrations supports (plain inserts need none)."""
+    indexes = schema_indexes()
+    return [
+        (label, table, equality, range_column)
+        for label, table, equality, range_column in paths
+        if (equality or range_column)
+        and not any(_supports(index, equality, range_column) for index in indexes.get(table, []))
+    ]
+
+
+def query_labels():
+    """Every execute_query() label used under bots/ and services/."""
+    bots = [path.name for path in (ROOT / "bots").iterdir() if path.is_dir() and not path.name.startswith("_")]
+    label = re.compile(_LABEL.format(bot="(?:" + "|".join(bots) + ")"))
+    labels = set()
+    for path in list((ROOT / "bots").rglob("*.py")) + list((ROOT / "services").rglob("*.py")):
+        source = path.read_text()
+        labels.update(label.findall(source))
+        labels.update(f"write_behind.{table}.upsert" for table in _WRITE_BUFFER.findall(source))
+    return labels
+
+
+def unlisted_labels(paths=ACCESS_PATHS):
+    """Labels the code runs that ACCESS_PATHS does not list, so --check cannot vouch for them."""
+    return sorted(query_labels() - {label for label, *_ in paths})
+
+
+# --- Runners ---
+
+def _guard_add_columns(conn, sql: str) -> str:
+    """Drop ADD COLUMN IF NOT EXISTS statements whose column already exists."""
+    def add(match):
+        table, column, definition = match.groups()
+        if column in {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}:
+            return ""
+        return f"ALTER TABLE {table} ADD COLUMN {column}{definition};"
+    return _ADD_COLUMN.sub(add, sql)
+
+
+def apply_sqlite(conn):
+    """Apply pending migrations to a sqlite3 connection; returns the versions applied."""
+    conn.execute("CREATE TABLE IF NOT EXISTS schema_migrations (version TEXT PRIMARY KEY, name TEXT, applied_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+    done = []
+    for version, name, sql in load_migrations():
+        if version in applied:
+            continue
+        conn.executescript(_guard_add_columns(conn, to_sqlite(sql)))
+        conn.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)", (version, name))
+        done.append(version)
+    return done
+
+
+def apply_postgres(database_url: str = DATABASE_URL):
+    """Apply pending migrations to Postgres (Supabase direct connection string)."""
+    import psycopg
+
+    done = []
+    with psycopg.connect(database_url) as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS schema_migrations (version TEXT PRIMARY KEY, name TEXT, applied_at TIMESTAMPTZ DEFAULT NOW())")
+        applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+        for version, name, sql in load_migrations():
+            if version in applied:
+                continue
+            # One transaction per migration
+            with conn.transaction():
+                conn.execute(sql)
+                conn.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            done.append(version)
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply schema migrations or check index coverage.")
+    parser.add_argument("--sqlite", metavar="PATH", help="Migrate a local SQLite file instead of Postgres")
+    parser.add_argument("--check", action="store_true", help="Report queries with no supporting index")
+    args = parser.parse_args()
+
+    if args.check:
+        missing = check_indexes()
+        for label, table, equality, range_column in missing:
+            print(f"❌ {label}: {table} ({', '.join(equality)}{' -> ' + range_column if range_column else ''}) has no supporting index")
+        unlisted = unlisted_labels()
+        for label in unlisted:
+            print(f"❌ {label}: not in ACCESS_PATHS")
+        print(f"{len(ACCESS_PATHS) - len(missing)}/{len(ACCESS_PATHS)} access paths indexed")
+        sys.exit(1 if missing or unlisted else 0)
+
+    if args.sqlite:
+        import sqlite3
+        conn = sqlite3.connect(args.sqlite)
+        done = apply_sqlite(conn)
+        conn.commit()
+        conn.close()
+    else:
+        if not DATABASE_URL:
+            sys.exit("DATABASE_URL not set (Supabase: Project Settings -> Database -> Connection string).")
+        done = apply_postgres()
+    print(f"Applied {len(done)} migration(s): {', '.join(done) or 'none pending'}")
+
+
+if __name__ == "__main__":
+    main()
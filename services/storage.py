@@ -0,0 +1,418 @@
+import os
+import re
+import sqlite3
+import threading
+import importlib.util
+from dotenv import load_dotenv
+from .migrations import apply_sqlite
+
+load_dotenv()
+
+# "supabase" (default) or "sqlite"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "omnibot.db")
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+# One keep-alive HTTP pool for every bot's PostgREST calls
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", 20))
+SUPABASE_KEEPALIVE = int(os.getenv("SUPABASE_KEEPALIVE", 10))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", 60))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", 10))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", 5))
+# HTTP/2 multiplexes every query over one connection (needs the h2 package)
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "1") == "1"
+
+_OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "like": "LIKE", "ilike": "LIKE"}
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _column(name: str) -> str:
+    name = name.strip()
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid column name: {name!r}")
+    return f'"{name}"'
+
+
+def _value(value):
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+class SQLiteResponse:
+    """Same shape as a PostgREST APIResponse (.data, .count)."""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class SQLiteQuery:
+    """Subset of the supabase-py query builder, compiled to SQL on execute()."""
+
+    def __init__(self, client, table: str):
+        self.client = client
+        self.table = table
+        self._action = "select"
+        self._columns = "*"
+        self._count = None
+        self._payload = None
+        self._on_conflict = None
+        self._ignore_duplicates = False
+        self._where = []
+        self._params = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+
+    # --- Actions ---
+
+    def select(self, columns: str = "*", count: str = None):
+        self._action = "select"
+        self._columns = columns
+        self._count = count
+        return self
+
+    def insert(self, rows):
+        self._action = "insert"
+        self._payload = rows
+        return self
+
+    def upsert(self, rows, on_conflict: str = "", ignore_duplicates: bool = False):
+        self._action = "upsert"
+        self._payload = rows
+        self._on_conflict = on_conflict or "id"
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values: dict):
+        self._action = "update"
+        self._payload = values
+        return self
+
+    def delete(self):
+        self._action = "delete"
+        return self
+
+    # --- Filters ---
+
+    def _filter(self, column: str, op: str, value):
+        self._where.append(f"{_column(column)} {_OPERATORS[op]} ?")
+        self._params.append(_value(value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def like(self, column, pattern):
+        return self._filter(column, "like", pattern.replace("*", "%"))
+
+    def ilike(self, column, pattern):
+        self._where.append(f"LOWER({_column(column)}) LIKE LOWER(?)")
+        self._params.append(pattern.replace("*", "%"))
+        return self
+
+    def is_(self, column, value):
+        if value in (None, "null"):
+            self._where.append(f"{_column(column)} IS NULL")
+        else:
+            self._where.append(f"{_column(column)} IS ?")
+            self._params.append(_value(value))
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            self._where.append("0")
+            return self
+        self._where.append(f"{_column(column)} IN ({', '.join('?' for _ in values)})")
+        self._params.extend(_value(v) for v in values)
+        return self
+
+    def or_(self, filters: str):
+        """PostgREST logic tree, e.g. "created_at.lt.X,and(created_at.eq.X,id.lt.5)"."""
+        sql, params = _parse_logic(filters, "OR")
+        self._where.append(sql)
+        self._params.extend(params)
+        return self
+
+    # --- Modifiers ---
+
+    def order(self, column: str, desc: bool = False):
+        self._order.append(f"{_column(column)} {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, count: int):
+        self._limit = int(count)
+        return self
+
+    def range(self, start: int, end: int):
+        self._offset = int(start)
+        self._limit = int(end) - int(start) + 1
+        return self
+
+    # --- Execution ---
+
+    def _where_sql(self):
+        return f" WHERE {' AND '.join(self._where)}" if self._where else ""
+
+    def execute(self):
+        return self.client._run(self)
+
+    def _compile_select(self):
+        columns = "*" if self._columns.strip() == "*" else ", ".join(_column(c) for c in self._columns.split(","))
+        sql = f'SELECT {columns} FROM "{self.table}"{self._where_sql()}'
+        if self._order:
+            sql += f" ORDER BY {', '.join(self._order)}"
+        if self._limit is not None or self._offset is not None:
+            sql += f" LIMIT {self._limit if self._limit is not None else -1} OFFSET {self._offset or 0}"
+        return sql, list(self._params)
+
+    def _compile_write(self):
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        if not rows:
+            return None, []
+        columns = list(dict.fromkeys(c for row in rows for c in row))
+        names = ", ".join(_column(c) for c in columns)
+        sql = f'INSERT INTO "{self.table}" ({names}) VALUES ({", ".join("?" for _ in columns)})'
+        if self._action == "upsert":
+            target = ", ".join(_column(c) for c in self._on_conflict.split(","))
+            updates = ", ".join(f"{_column(c)} = excluded.{_column(c)}" for c in columns)
+            if self._ignore_duplicates or not updates:
+                sql += f" ON CONFLICT ({target}) DO NOTHING"
+            else:
+                sql += f" ON CONFLICT ({target}) DO UPDATE SET {updates}"
+        sql += " RETURNING *"
+        return sql, [[_value(row.get(c)) for c in columns] for row in rows]
+
+
+def _split_top_level(text: str):
+    """Split on commas that are not inside parentheses or double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    if current:
+        parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _parse_logic(text: str, joiner: str):
+    clauses, params = [], []
+    for part in _split_top_level(text):
+        group = re.match(r"^(and|or)\((.*)\)$", part, re.S)
+        if group:
+            sql, group_params = _parse_logic(group.group(2), group.group(1).upper())
+        else:
+            column, op, value = part.split(".", 2)
+            value = value[1:-1] if value.startswith('"') and value.endswith('"') else value
+            if op == "is":
+                sql, group_params = (f"{_column(column)} IS NULL", []) if value == "null" else (f"{_column(column)} IS ?", [value])
+            elif op == "in":
+                values = _split_top_level(value.strip("()"))
+                sql, group_params = f"{_column(column)} IN ({', '.join('?' for _ in values)})", values
+            else:
+                sql, group_params = f"{_column(column)} {_OPERATORS[op]} ?", [value]
+        clauses.append(f"({sql})")
+        params.extend(group_params)
+    return f" {joiner} ".join(clauses), params
+
+
+class SQLiteClient:
+    """Local drop-in for the Supabase client: client.table(name) returns a query builder.
+
+    One connection per thread (queries run on the DB pool), WAL mode so reads never
+    wait on the writer. The schema comes from migrations/ on first use.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def table(self, name: str) -> SQLiteQuery:
+        return SQLiteQuery(self, name)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn):
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            applied = apply_sqlite(conn)
+            if applied:
+                print(f"Applied SQLite migrations: {', '.join(applied)}")
+            self._schema_ready = True
+
+    def _run(self, query: SQLiteQuery) -> SQLiteResponse:
+        conn = self._connection()
+        if query._action == "select":
+            sql, params = query._compile_select()
+            data = [dict(row) for row in conn.execute(sql, params)]
+            count = None
+            if query._count:
+                count = conn.execute(f'SELECT COUNT(*) FROM "{query.table}"{query._where_sql()}', query._params).fetchone()[0]
+            return SQLiteResponse(data, count)
+
+        if query._action in ("insert", "upsert"):
+            sql, rows = query._compile_write()
+            if sql is None:
+                return SQLiteResponse([])
+            data = []
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for params in rows:
+                    data.extend(dict(row) for row in conn.execute(sql, params).fetchall())
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return SQLiteResponse(data)
+
+        if query._action == "update":
+            assignments = ", ".join(f"{_column(c)} = ?" for c in query._payload)
+            sql = f'UPDATE "{query.table}" SET {assignments}{query._where_sql()} RETURNING *'
+            params = [_value(v) for v in query._payload.values()] + query._params
+        else:
+            sql = f'DELETE FROM "{query.table}"{query._where_sql()} RETURNING *'
+            params = query._params
+        return SQLiteResponse([dict(row) for row in conn.execute(sql, params).fetchall()])
+
+
+class ConnectionMetrics:
+    """Counts requests vs. new TCP connections on the shared HTTP pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+
+    def on_request(self, request):
+        # httpcore reports connection setup through the trace extension
+        request.extensions["trace"] = self._trace
+        with self._lock:
+            self.requests += 1
+
+    def _trace(self, event: str, info: dict):
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections += 1
+        elif event == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def snapshot(self):
+        with self._lock:
+            reused = max(self.requests - self.connections, 0)
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reuse_rate": round(reused / self.requests, 3) if self.requests else 0.0,
+            }
+
+
+http_metrics = ConnectionMetrics()
+
+
+def _http2_enabled() -> bool:
+    if not SUPABASE_HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        print("SUPABASE_HTTP2 is on but the h2 package is missing (pip install 'httpx[http2]'); using HTTP/1.1")
+        return False
+    return True
+
+
+def _pooled_session(session):
+    """Replacement for postgrest's per-client httpx session with the shared tuned pool."""
+    import httpx
+
+    return httpx.Client(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=httpx.Timeout(SUPABASE_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=SUPABASE_POOL_SIZE,
+            max_keepalive_connections=SUPABASE_KEEPALIVE,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+        ),
+        http2=_http2_enabled(),
+        event_hooks={"request": [http_metrics.on_request]},
+    )
+
+
+def create_storage_client(backend: str = None):
+    """Client for the configured backend, or None when it is not configured."""
+    backend = (backend or STORAGE_BACKEND).lower()
+    if backend == "sqlite":
+        return SQLiteClient(SQLITE_PATH)
+    if backend != "supabase":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+    if not (SUPABASE_URL and SUPABASE_KEY):
+        return None
+    from supabase import create_client
+    client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    try:
+        default_session = client.postgrest.session
+        client.postgrest.session = _pooled_session(default_session)
+        default_session.close()
+    except Exception as e:
+        print(f"Using default Supabase HTTP pool: {e}")
+    return client
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(backend: str = None):
+    """The storage client for `backend` (default STORAGE_BACKEND): Supabase or local SQLite.
+
+    One client per backend per process. Every bot's DB module, and the shared
+    services that write through it (write-behind buffers, stats), use this
+    same client, so there is one keep-alive HTTP pool or one SQLite file.
+    """
+    backend = (backend or STORAGE_BACKEND).lower()
+    with _clients_lock:
+        if backend not in _clients:
+            _clients[backend] = create_storage_client(backend)
+        return _clients[backend]
@@ -0,0 +1,302 @@
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from collections import defaultdict, deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Routes every LLM call is tagged with
+ROUTES = ("router", "fast", "smart", "extraction", "proactive", "multimodal")
+
+# Where an over-budget user/bot gets sent instead
+CHEAPER_ROUTE = {
+    "smart": "fast",
+    "multimodal": "fast",
+}
+
+BUCKET_SECONDS = 60          # Rolling window granularity (1 minute)
+WINDOW_SECONDS = 24 * 3600   # Keep 24h of buckets in memory
+WINDOWS = {"1h": 3600, "24h": WINDOW_SECONDS}
+
+TOKEN_USAGE_DB = os.getenv("TOKEN_USAGE_DB", "token_usage.db")
+FLUSH_INTERVAL = int(os.getenv("TOKEN_USAGE_FLUSH_INTERVAL", 60))
+
+# Daily (rolling 24h) budgets in total tokens. 0 = unlimited.
+# Per-bot overrides: TOKEN_BUDGET_BOT_ALEX=500000, TOKEN_BUDGET_USER_ALEX=100000
+DEFAULT_USER_BUDGET = int(os.getenv("TOKEN_BUDGET_USER_DAILY", 0))
+DEFAULT_BOT_BUDGET = int(os.getenv("TOKEN_BUDGET_BOT_DAILY", 0))
+
+
+def _usage_counts(response):
+    """Pull (prompt, completion) token counts from a Gemini response."""
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return 0, 0
+    prompt = getattr(usage, "prompt_token_count", 0) or 0
+    completion = getattr(usage, "candidates_token_count", 0) or 0
+    return prompt, completion
+
+
+class TokenLedger:
+    """In-memory rolling token accounting with budgets and a local SQLite store.
+
+    The last 24h are reloaded from the store at construction, so a restart
+    does not reset anyone's budget.
+    """
+
+    def __init__(self, db_path: str = TOKEN_USAGE_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # key -> deque of [bucket_start, prompt, completion, calls]
+        self._buckets = defaultdict(deque)
+        # (bot, user_id) and (bot, None) -> deque of [bucket_start, tokens], with
+        # the running 24h sum in _daily_totals, so budget checks are O(1)
+        self._daily = defaultdict(deque)
+        self._daily_totals = defaultdict(int)
+        # (bucket_start, *key) -> [prompt, completion, calls] not yet flushed
+        self._pending = defaultdict(lambda: [0, 0, 0])
+        self._store_ready = False
+        self._load()
+
+    # --- Recording ---
+
+    def record(self, bot: str, user_id, route: str, model: str, response):
+        """Record usage from a Gemini response object."""
+        prompt, completion = _usage_counts(response)
+        self.record_tokens(bot, user_id, route, model, prompt, completion)
+
+    def record_tokens(self, bot: str, user_id, route: str, model: str, prompt_tokens: int, completion_tokens: int):
+        """Record raw token counts for one LLM call."""
+        key = (bot, str(user_id) if user_id is not None else "system", route, model)
+        bucket = int(time.time()) // BUCKET_SECONDS * BUCKET_SECONDS
+
+        with self._lock:
+            self._add(key, bucket, prompt_tokens, completion_tokens, 1)
+            pending = self._pending[(bucket,) + key]
+            pending[0] += prompt_tokens
+            pending[1] += completion_tokens
+            pending[2] += 1
+
+    def _add(self, key, bucket: int, prompt: int, completion: int, calls: int):
+        """Add counts to the in-memory buckets and the running daily totals (lock held)."""
+        buckets = self._buckets[key]
+        if buckets and buckets[-1][0] == bucket:
+            entry = buckets[-1]
+        else:
+            entry = [bucket, 0, 0, 0]
+            buckets.append(entry)
+        entry[1] += prompt
+        entry[2] += completion
+        entry[3] += calls
+        self._expire(buckets, bucket)
+
+        for daily_key in ((key[0], key[1]), (key[0], None)):
+            daily = self._daily[daily_key]
+            if daily and daily[-1][0] == bucket:
+                daily[-1][1] += prompt + completion
+            else:
+                daily.append([bucket, prompt + completion])
+            self._daily_totals[daily_key] += prompt + completion
+            self._expire_daily(daily_key, bucket)
+
+    def _expire(self, buckets, now_bucket: int):
+        cutoff = now_bucket - WINDOW_SECONDS
+        while buckets and buckets[0][0] <= cutoff:
+            buckets.popleft()
+
+    def _expire_daily(self, daily_key, now_bucket: int):
+        daily = self._daily[daily_key]
+        cutoff = now_bucket - WINDOW_SECONDS
+        while daily and daily[0][0] <= cutoff:
+            self._daily_totals[daily_key] -= daily.popleft()[1]
+
+    # --- Aggregation ---
+
+    def usage(self, bot: str = None, user_id=None, window: str = "24h"):
+        """Aggregate rolling usage, grouped by (bot, user, route, model)."""
+        since = time.time() - WINDOWS.get(window, WINDOW_SECONDS)
+        user_id = str(user_id) if user_id is not None else None
+        rows = []
+        with self._lock:
+            for key, buckets in self._buckets.items():
+                if bot and key[0] != bot:
+                    continue
+                if user_id and key[1] != user_id:
+                    continue
+                prompt = completion = calls = 0
+                for bucket_start, p, c, n in buckets:
+                    if bucket_start >= since - BUCKET_SECONDS:
+                        prompt += p
+                        completion += c
+                        calls += n
+                if calls:
+                    rows.append({
+                        "bot": key[0],
+                        "user_id": key[1],
+                        "route": key[2],
+                        "model": key[3],
+                        "prompt_tokens": prompt,
+                        "completion_tokens": completion,
+                        "total_tokens": prompt + completion,
+                        "calls": calls,
+                    })
+        rows.sort(key=lambda r: r["total_tokens"], reverse=True)
+        return rows
+
+    def total(self, bot: str, user_id=None, window: str = "24h") -> int:
+        """Total tokens used by a bot (or one of its users) in the window."""
+        if window != "24h":
+            return sum(r["total_tokens"] for r in self.usage(bot, user_id, window))
+        daily_key = (bot, str(user_id) if user_id is not None else None)
+        bucket = int(time.time()) // BUCKET_SECONDS * BUCKET_SECONDS
+        with self._lock:
+            if daily_key not in self._daily:
+                return 0
+            self._expire_daily(daily_key, bucket)
+            return self._daily_totals[daily_key]
+
+    # --- Budgets ---
+
+    def budget_for(self, bot: str, scope: str) -> int:
+        """Daily budget for a bot ('bot') or for each of its users ('user')."""
+        default = DEFAULT_BOT_BUDGET if scope == "bot" else DEFAULT_USER_BUDGET
+        return int(os.getenv(f"TOKEN_BUDGET_{scope.upper()}_{bot.upper()}", default))
+
+    def over_budget(self, bot: str, user_id=None) -> bool:
+        """Check whether the bot, or this user on the bot, exceeded its daily budget."""
+        bot_budget = self.budget_for(bot, "bot")
+        if bot_budget and self.total(bot) >= bot_budget:
+            return True
+        user_budget = self.budget_for(bot, "user")
+        if user_budget and user_id is not None and self.total(bot, user_id) >= user_budget:
+            return True
+        return False
+
+    def route_for(self, bot: str, user_id, route: str) -> str:
+        """Return the route to actually use, downgrading when over budget."""
+        cheaper = CHEAPER_ROUTE.get(route)
+        if cheaper and self.over_budget(bot, user_id):
+            print(f"Token budget exceeded for {bot}/{user_id}: {route} -> {cheaper}")
+            return cheaper
+        return route
+
+    # --- Local store ---
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        if not self._store_ready:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS token_usage (
+                    bucket_start INTEGER NOT NULL,
+                    bot TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    route TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    calls INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (bucket_start, bot, user_id, route, model)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_token_usage_bot_user ON token_usage (bot, user_id, bucket_start)")
+            self._store_ready = True
+        return conn
+
+    def _load(self):
+        """Seed the last 24h of buckets and daily totals from the local store."""
+        if not os.path.exists(self.db_path):
+            return
+        since = int(time.time()) // BUCKET_SECONDS * BUCKET_SECONDS - WINDOW_SECONDS
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute("""
+                    SELECT bucket_start, bot, user_id, route, model, prompt_tokens, completion_tokens, calls
+                    FROM token_usage WHERE bucket_start > ? ORDER BY bucket_start
+                """, (since,)).fetchall()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Failed to load token usage from {self.db_path}: {e}")
+            return
+        with self._lock:
+            for bucket, bot, user_id, route, model, prompt, completion, calls in rows:
+                self._add((bot, user_id, route, model), bucket, prompt, completion, calls)
+
+    def flush(self) -> int:
+        """Write pending bucket deltas to the local store (blocking; see flush_async)."""
+        with self._lock:
+            pending = self._pending
+            self._pending = defaultdict(lambda: [0, 0, 0])
+        if not pending:
+            return 0
+
+        rows = [key + tuple(counts) for key, counts in pending.items()]
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany("""
+                    INSERT INTO token_usage (bucket_start, bot, user_id, route, model, prompt_tokens, completion_tokens, calls)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (bucket_start, bot, user_id, route, model) DO UPDATE SET
+                        prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                        completion_tokens = completion_tokens + excluded.completion_tokens,
+                        calls = calls + excluded.calls
+                """, rows)
+            conn.close()
+        except Exception as e:
+            print(f"Failed to flush token usage: {e}")
+            # Put the deltas back so they are retried next flush
+            with self._lock:
+                for key, counts in pending.items():
+                    merged = self._pending[key]
+                    for i, value in enumerate(counts):
+                        merged[i] += value
+            return 0
+        return len(rows)
+
+    def history(self, bot: str = None, user_id=None, since: int = None):
+        """Query flushed usage from the local store, summed per day."""
+        since = since if since is not None else int(time.time()) - 30 * 86400
+        query = """
+            SELECT date(bucket_start, 'unixepoch') AS day, bot, user_id, route, model,
+                   SUM(prompt_tokens), SUM(completion_tokens), SUM(calls)
+            FROM token_usage WHERE bucket_start >= ?
+        """
+        params = [since]
+        if bot:
+            query += " AND bot = ?"
+            params.append(bot)
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(str(user_id))
+        query += " GROUP BY day, bot, user_id, route, model ORDER BY day DESC"
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        return [
+            {
+                "day": day, "bot": b, "user_id": u, "route": r, "model": m,
+                "prompt_tokens": p, "completion_tokens": c, "total_tokens": p + c, "calls": n,
+            }
+            for day, b, u, r, m, p, c, n in rows
+        ]
+
+    async def flush_async(self) -> int:
+        """flush() on a worker thread, so sqlite3 does not block the event loop."""
+        return await asyncio.to_thread(self.flush)
+
+    async def flush_loop(self, interval: int = FLUSH_INTERVAL):
+        """Periodically flush usage to the local store."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush_async()
+
+
+token_ledger = TokenLedger()
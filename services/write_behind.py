@@ -0,0 +1,221 @@
+import os
+import json
+import uuid
+import heapq
+import asyncio
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from .db_executor import execute_query
+
+load_dotenv()
+
+# Flush a table's buffer every N milliseconds or as soon as M rows are queued
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", 250))
+WRITE_BEHIND_MAX_ROWS = int(os.getenv("WRITE_BEHIND_MAX_ROWS", 50))
+# Upper bound on rows kept for retry while the DB is unreachable
+WRITE_BEHIND_MAX_BACKLOG = int(os.getenv("WRITE_BEHIND_MAX_BACKLOG", 5000))
+# Retry delay after a failed flush doubles up to this many seconds
+WRITE_BEHIND_MAX_BACKOFF = float(os.getenv("WRITE_BEHIND_MAX_BACKOFF", 30))
+# Rows the DB rejects, or that overflow the backlog, are appended here (JSON lines)
+WRITE_BEHIND_QUARANTINE_PATH = os.getenv("WRITE_BEHIND_QUARANTINE_PATH", "write_behind_quarantine.jsonl")
+
+# The DB was unreachable or too slow: retry the whole batch later. Any other
+# error means it rejected the batch, so it is split to find the bad rows.
+try:
+    import httpx
+    _TRANSIENT = (asyncio.TimeoutError, OSError, httpx.TransportError)
+except ImportError:
+    _TRANSIENT = (asyncio.TimeoutError, OSError)
+
+
+def row_key(row):
+    """Identity of a chat row or MessageRecord across the DB and the buffer."""
+    # Compare timestamps to the second: the DB echoes them back with a UTC offset
+    return (str(row.get("created_at"))[:19], row.get("user_id") or row.get("source"), row.get("role"), row.get("content"))
+
+
+class WriteBehindBuffer:
+    """Collects rows for one table and writes them as a single bulk upsert.
+
+    Every row gets a client-generated write_key, and batches are upserted with
+    ON CONFLICT (write_key) DO NOTHING, so retrying a batch whose first attempt
+    committed after timing out does not duplicate it.
+    """
+
+    def __init__(self, table: str, client, flush_ms: int = WRITE_BEHIND_FLUSH_MS, max_rows: int = WRITE_BEHIND_MAX_ROWS,
+                 quarantine_path: str = WRITE_BEHIND_QUARANTINE_PATH):
+        self.table = table
+        self.client = client
+        self.flush_interval = flush_ms / 1000
+        self.max_rows = max_rows
+        self.quarantine_path = quarantine_path
+        self.label = f"write_behind.{table}.upsert"
+        self._pending = []
+        self._inflight = []
+        self._task = None
+        self._flush_lock = None
+        self._full = None  # Event set when max_rows are queued, so _run flushes early
+        self.failures = 0  # consecutive failed flushes, drives the backoff
+        self.written = 0
+        self.quarantined = 0  # rows the DB rejected
+        self.dropped = 0  # rows pushed out of a full backlog
+
+    async def add(self, row: dict):
+        """Queue a row; it becomes visible to reads immediately through the overlay."""
+        row.setdefault("write_key", uuid.uuid4().hex)
+        self._pending.append(row)
+        self._ensure_flusher()
+        if len(self._pending) >= self.max_rows:
+            self._full.set()
+
+    def _ensure_flusher(self):
+        if self._full is None:
+            self._full = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def backoff(self) -> float:
+        """Seconds to wait before retrying after the current run of failed flushes."""
+        if not self.failures:
+            return 0
+        return min(WRITE_BEHIND_MAX_BACKOFF, self.flush_interval * 2 ** self.failures)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            if self._pending:
+                await self.flush()
+                await asyncio.sleep(self.backoff())
+
+    async def flush(self):
+        """Upsert everything queued so far; returns the number of rows written."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            rows, self._pending = self._pending, []
+            self._inflight = rows
+            try:
+                written = await self._write(rows)
+            except Exception as e:
+                self.failures += 1
+                print(f"Failed to flush {len(rows)} rows to {self.table}, retrying in {self.backoff():.1f}s: {e}")
+                # Keep them for the next flush; the write_key makes the retry safe
+                self._pending = rows + self._pending
+                overflow = len(self._pending) - WRITE_BEHIND_MAX_BACKLOG
+                if overflow > 0:
+                    self.dropped += overflow
+                    self._quarantine(self._pending[:overflow], "backlog full")
+                    del self._pending[:overflow]
+                return 0
+            finally:
+                self._inflight = []
+            self.failures = 0
+            self.written += written
+            return written
+
+    async def _write(self, rows):
+        """Upsert rows, splitting a rejected batch in halves so one bad row cannot hold back the rest."""
+        try:
+            await execute_query(
+                self.client.table(self.table).upsert(rows, on_conflict="write_key", ignore_duplicates=True),
+                self.label
+            )
+            return len(rows)
+        except _TRANSIENT:
+            raise
+        except Exception as e:
+            if len(rows) == 1:
+                self.quarantined += 1
+                self._quarantine(rows, str(e))
+                return 0
+            middle = len(rows) // 2
+            return await self._write(rows[:middle]) + await self._write(rows[middle:])
+
+    def _quarantine(self, rows, reason: str):
+        """Set rows aside in the quarantine file so they can be inspected and replayed."""
+        print(f"⚠️ Quarantining {len(rows)} {self.table} rows ({reason}) to {self.quarantine_path}")
+        at = datetime.now(timezone.utc).isoformat()
+        try:
+            with open(self.quarantine_path, "a") as f:
+                for row in rows:
+                    f.write(json.dumps({"table": self.table, "at": at, "reason": reason, "row": row}, default=str) + "\n")
+        except OSError as e:
+            print(f"Could not write {len(rows)} quarantined {self.table} rows: {e}")
+
+    def snapshot(self):
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "failures": self.failures,
+            "quarantined": self.quarantined,
+            "dropped": self.dropped,
+        }
+
+    def overlay(self, **match):
+        """Rows not yet committed whose columns equal `match` (list values mean IN)."""
+        rows = []
+        for row in self._inflight + self._pending:
+            for column, value in match.items():
+                if isinstance(value, (list, tuple, set)):
+                    if row.get(column) not in value:
+                        break
+                elif row.get(column) != value:
+                    break
+            else:
+                rows.append(row)
+        return rows
+
+
+_buffers = {}
+
+
+def get_write_buffer(table: str, client) -> WriteBehindBuffer:
+    """The buffer for a table, created on first use (one per table)."""
+    buffer = _buffers.get(table)
+    if buffer is None:
+        buffer = _buffers[table] = WriteBehindBuffer(table, client)
+    return buffer
+
+
+async def flush_all_buffers():
+    """Flush every table's buffer (called on shutdown); rows that still fail are quarantined."""
+    for buffer in list(_buffers.values()):
+        await buffer.flush()
+        if buffer._pending:
+            buffer.dropped += len(buffer._pending)
+            buffer._quarantine(buffer._pending, "unwritten at shutdown")
+            buffer._pending = []
+
+
+def write_behind_snapshot():
+    """Per-table buffer counters for /admin/metrics."""
+    return {table: buffer.snapshot() for table, buffer in _buffers.items()}
+
+
+def with_overlay(rows, pending, key: str = "created_at"):
+    """Newest-first stream of committed rows plus uncommitted overlay rows, de-duplicated."""
+    pending = sorted(pending, key=lambda row: row[key], reverse=True)
+    seen = set()
+    for row in heapq.merge(rows, pending, key=lambda row: row[key], reverse=True):
+        identity = row_key(row)
+        if identity in seen:
+            continue
+        seen.add(identity)
+        yield row
+
+
+def merge_overlay(rows, pending, limit: int = None, key: str = "created_at"):
+    """Merge oldest-first committed rows with overlay rows, keeping the newest `limit`."""
+    if not pending:
+        return rows
+    merged = list(with_overlay(reversed(rows), pending, key))
+    if limit:
+        merged = merged[:limit]
+    merged.reverse()
+    return merged
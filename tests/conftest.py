@@ -0,0 +1,31 @@
+import os
+import sys
+import uuid
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Every test runs against a throwaway local SQLite database; set before
+# services.storage is imported, since it reads STORAGE_BACKEND at import
+_TMP = tempfile.mkdtemp(prefix="omnibot-tests-")
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_TMP, "omnibot.db")
+os.environ["WRITE_BEHIND_QUARANTINE_PATH"] = os.path.join(_TMP, "quarantine.jsonl")
+os.environ["TOKEN_USAGE_DB"] = os.path.join(_TMP, "token_usage.db")
+os.environ["REVIEW_LOG_PATH"] = os.path.join(_TMP, "review_grades.jsonl")
+os.environ["TTS_CACHE_DIR"] = os.path.join(_TMP, "tts")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def client():
+    from services.storage import get_client
+    return get_client()
+
+
+@pytest.fixture
+def user_id():
+    """A user nobody else in the session writes to (the database is shared)."""
+    return f"test-{uuid.uuid4().hex[:12]}"
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from services.write_behind import WriteBehindBuffer
+from bots.alex.services.database import DatabaseService
+
+
+@pytest.fixture
+def db(client):
+    service = DatabaseService()
+    # A buffer per test: the process-wide one would outlive each test's event loop
+    service.chat_logs = WriteBehindBuffer("chat_logs", client, flush_ms=60_000)
+    return service
+
+
+def _seed(client, user_id, count, start=0):
+    client.table("chat_logs").insert([
+        {"user_id": user_id, "role": "user" if i % 2 == 0 else "assistant", "content": f"message {i:03d}",
+         "platform": "test", "created_at": f"2026-01-01T10:{i // 60:02d}:{i % 60:02d}"}
+        for i in range(start, start + count)
+    ]).execute()
+
+
+def _contents(messages):
+    return [message["content"] for message in messages]
+
+
+def test_last_n_returns_the_newest_in_order(db, client, user_id):
+    _seed(client, user_id, 250)
+
+    messages = asyncio.run(db.get_history(user_id, last_n=120))
+    assert _contents(messages) == [f"message {i:03d}" for i in range(130, 250)]
+
+
+def test_since_returns_everything_after(db, client, user_id):
+    _seed(client, user_id, 30)
+
+    messages = asyncio.run(db.get_history(user_id, since=datetime(2026, 1, 1, 10, 0, 24)))
+    assert _contents(messages) == [f"message {i:03d}" for i in range(25, 30)]
+
+
+def test_token_budget_keeps_the_newest_that_fit(db, client, user_id):
+    _seed(client, user_id, 50)
+
+    # "message NNN" is 11 characters, ~3 tokens each
+    messages = asyncio.run(db.get_history(user_id, token_budget=30))
+    assert _contents(messages) == [f"message {i:03d}" for i in range(40, 50)]
+
+
+def test_linked_ids_are_read_together(db, client, user_id):
+    phone = f"{user_id}-phone"
+    _seed(client, user_id, 3)
+    _seed(client, phone, 3, start=3)
+
+    messages = asyncio.run(db.get_history([user_id, phone], last_n=4))
+    assert _contents(messages) == [f"message {i:03d}" for i in range(2, 6)]
+    assert [message.source for message in messages] == [user_id, phone, phone, phone]
+
+
+def test_unflushed_messages_are_read_back_once(db, client, user_id):
+    _seed(client, user_id, 3)
+
+    async def scenario():
+        await db.save_message(user_id, "user", "just said", "telegram")
+        before = await db.get_history(user_id, last_n=10)
+        await db.chat_logs.flush()
+        after = await db.get_history(user_id, last_n=10)
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    assert _contents(before)[-1] == "just said"
+    assert _contents(after) == _contents(before)
+    assert len(client.table("chat_logs").select("id").eq("user_id", user_id).execute().data) == 4
@@ -0,0 +1,52 @@
+import sqlite3
+
+from services import migrations
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+
+
+def test_apply_sqlite_applies_every_migration_once(tmp_path):
+    conn = sqlite3.connect(tmp_path / "fresh.db")
+    versions = [version for version, _, _ in migrations.load_migrations()]
+
+    assert migrations.apply_sqlite(conn) == versions
+    assert migrations.apply_sqlite(conn) == []
+    for table in migrations.migration_tables():
+        assert _columns(conn, table), f"{table} was not created"
+
+
+def test_add_column_migrations_can_be_rerun(tmp_path):
+    conn = sqlite3.connect(tmp_path / "rerun.db")
+    migrations.apply_sqlite(conn)
+    # Forget 0005 and 0007: their ADD COLUMN IF NOT EXISTS must skip the existing columns
+    conn.execute("DELETE FROM schema_migrations WHERE version IN ('0005', '0007')")
+
+    assert migrations.apply_sqlite(conn) == ["0005", "0007"]
+    assert {"ease", "interval_days", "lapses", "last_review_at"} <= _columns(conn, "flashcards")
+    assert "schedule_prefs" in _columns(conn, "english_coach_users")
+
+
+def test_every_access_path_has_an_index():
+    assert migrations.check_indexes() == []
+
+
+def test_every_query_label_is_an_access_path():
+    assert migrations.unlisted_labels() == []
+
+
+def test_unlisted_label_is_reported():
+    paths = [path for path in migrations.ACCESS_PATHS if path[0] != "alex.chat_logs.history"]
+    assert migrations.unlisted_labels(paths) == ["alex.chat_logs.history"]
+
+
+def test_due_counts_view(client, user_id):
+    client.table("flashcards").insert([
+        {"user_id": user_id, "word": "new", "definition": "never scheduled"},
+        {"user_id": user_id, "word": "late", "definition": "due", "next_review_at": "2020-01-01T00:00:00"},
+        {"user_id": user_id, "word": "later", "definition": "not due", "next_review_at": "2999-01-01T00:00:00"},
+    ]).execute()
+
+    rows = client.table("english_coach_due_counts").select("user_id,due").eq("user_id", user_id).execute().data
+    assert rows == [{"user_id": user_id, "due": 2}]
@@ -0,0 +1,59 @@
+import asyncio
+import uuid
+
+import pytest
+
+from bots.english_coach.services import shadowing
+from bots.english_coach.services.daily_content import DailyContent
+from bots.english_coach.services.database import save_daily_content, save_daily_file_id
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A two-task pool over fresh in-memory state; counts generations and renders."""
+    calls = {'generated': 0, 'rendered': 0}
+
+    async def generate():
+        calls['generated'] += 1
+        return {'context': 'test', 'sentence': f"sentence {calls['generated']}"}
+
+    async def render(task):
+        calls['rendered'] += 1
+        return b'audio'
+
+    monkeypatch.setattr(shadowing, "daily_content", DailyContent())
+    monkeypatch.setattr(shadowing, "generate_shadowing_task", generate)
+    monkeypatch.setattr(shadowing, "reference_audio", render)
+    pool = shadowing.ShadowingPool(size=2)
+    pool.calls = calls
+    return pool
+
+
+@pytest.fixture
+def day():
+    """A day nobody else in the session stores content for (the database is shared)."""
+    return f"test-{uuid.uuid4().hex[:8]}"
+
+
+def test_fill_reuses_stored_tasks(pool, day):
+    async def scenario():
+        await save_daily_content('shadowing', day, {'context': 'stored', 'sentence': 'kept'})
+        await save_daily_file_id('shadowing', day, 'file-1')
+        await pool.fill(day)
+        return await shadowing.daily_content.get('shadowing', None, day)
+
+    assert asyncio.run(scenario())['sentence'] == 'kept'
+    # Only the slot nobody stored is generated; the uploaded one needs no audio
+    assert pool.calls == {'generated': 1, 'rendered': 1}
+
+
+def test_take_never_generates_inline(pool, day):
+    async def scenario():
+        empty = await pool.take(day)
+        await pool.fill(day)
+        return empty, await pool.take(day)
+
+    empty, kind = asyncio.run(scenario())
+    assert empty is None
+    assert kind in pool.kinds()
+    assert pool.calls['generated'] == 2
@@ -0,0 +1,96 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bots.english_coach.services import tts_engines
+from bots.english_coach.services.tts import TTSCache
+from bots.english_coach.services.tts_engines import TTSEngine, FakeTTSEngine, tts_metrics
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """A FakeTTSEngine registered as "fake" for this test only."""
+    fake = FakeTTSEngine(delay=0.01)
+    monkeypatch.setitem(tts_engines.ENGINES, "fake", fake)
+    return fake
+
+
+class FakeBot:
+    """Records sends; an upload gets a fresh file_id, a file_id send echoes it."""
+
+    def __init__(self):
+        self.uploads = 0
+        self.sent = []
+
+    async def send_voice(self, chat_id, voice):
+        await asyncio.sleep(0.01)
+        if isinstance(voice, bytes):
+            self.uploads += 1
+            file_id = f"file-{self.uploads}"
+        else:
+            file_id = voice
+        self.sent.append((chat_id, file_id))
+        return SimpleNamespace(voice=SimpleNamespace(file_id=file_id), audio=None)
+
+
+def test_base_engine_is_abstract():
+    with pytest.raises(TypeError):
+        TTSEngine()
+
+
+def test_fake_engine_is_not_registered_in_production():
+    assert set(tts_engines.ENGINES) == {"gtts", "edge"}
+
+
+def test_fake_engine_is_deterministic(engine):
+    first = asyncio.run(engine.synthesize("hello"))
+    assert first == asyncio.run(engine.synthesize("hello"))
+    assert first != asyncio.run(engine.synthesize("goodbye"))
+    assert len(first) == engine.size
+    assert tts_metrics.snapshot()["tts.fake"]["calls"] >= 3
+
+
+def test_cache_synthesizes_each_text_once(engine, tmp_path):
+    cache = TTSCache(directory=str(tmp_path))
+
+    async def scenario():
+        return await asyncio.gather(*(cache.audio("hello", engine="fake") for _ in range(5)))
+
+    audio = asyncio.run(scenario())
+    assert engine.calls == 1
+    assert len(set(audio)) == 1
+    # A new cache over the same directory (a restart) reads the file instead
+    assert asyncio.run(TTSCache(directory=str(tmp_path)).audio("hello", engine="fake")) == audio[0]
+    assert engine.calls == 1
+
+
+def test_send_voice_uploads_once_then_sends_file_id(engine, tmp_path):
+    cache = TTSCache(directory=str(tmp_path))
+    bot = FakeBot()
+
+    async def scenario():
+        await asyncio.gather(*(cache.send_voice(bot, chat_id, "hello", engine="fake") for chat_id in range(10)))
+
+    asyncio.run(scenario())
+    assert bot.uploads == 1
+    assert engine.calls == 1
+    assert {file_id for _, file_id in bot.sent} == {"file-1"}
+    assert cache.file_id("hello", engine="fake") == "file-1"
+
+
+def test_cache_evicts_least_recently_used(engine, tmp_path):
+    cache = TTSCache(directory=str(tmp_path), max_bytes=engine.size * 2)
+
+    async def scenario():
+        for text in ("a", "b"):
+            await cache.audio(text, engine="fake")
+        await cache.audio("a", engine="fake")  # "b" is now the least recently used
+        await cache.audio("c", engine="fake")
+        calls = engine.calls
+        await cache.audio("a", engine="fake")
+        assert engine.calls == calls
+        await cache.audio("b", engine="fake")
+        assert engine.calls == calls + 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,95 @@
+import json
+import asyncio
+
+import pytest
+
+from services import write_behind
+from services.write_behind import WriteBehindBuffer, merge_overlay
+
+
+def _row(user_id, content, created_at):
+    return {"user_id": user_id, "role": "user", "content": content, "platform": "test", "created_at": created_at}
+
+
+def _stored(client, user_id):
+    return client.table("chat_logs").select("content,write_key").eq("user_id", user_id).order("id").execute().data
+
+
+def test_overlay_shows_rows_until_flushed(client, user_id):
+    async def scenario():
+        buffer = WriteBehindBuffer("chat_logs", client, flush_ms=60_000)
+        await buffer.add(_row(user_id, "hello", "2026-01-01T10:00:00"))
+        await buffer.add(_row("someone-else", "hi", "2026-01-01T10:00:01"))
+
+        assert [row["content"] for row in buffer.overlay(user_id=user_id)] == ["hello"]
+        assert [row["content"] for row in buffer.overlay(user_id=[user_id, "someone-else"])] == ["hello", "hi"]
+        assert _stored(client, user_id) == []
+
+        assert await buffer.flush() == 2
+        assert buffer.overlay(user_id=user_id) == []
+        assert [row["content"] for row in _stored(client, user_id)] == ["hello"]
+
+    asyncio.run(scenario())
+
+
+def test_merge_overlay_dedups_rows_already_committed(client, user_id):
+    committed = [_row(user_id, "a", "2026-01-01T10:00:00"), _row(user_id, "b", "2026-01-01T10:00:01")]
+    # "b" was flushed while the read was in flight, so it shows up on both sides
+    pending = [_row(user_id, "b", "2026-01-01T10:00:01+00:00"), _row(user_id, "c", "2026-01-01T10:00:02")]
+
+    merged = merge_overlay(committed, pending, limit=2)
+    assert [row["content"] for row in merged] == ["b", "c"]
+
+
+def test_retried_batch_is_not_duplicated(client, user_id):
+    async def scenario():
+        buffer = WriteBehindBuffer("chat_logs", client, flush_ms=60_000)
+        await buffer.add(_row(user_id, "once", "2026-01-01T10:00:00"))
+        rows = list(buffer._pending)
+        await buffer.flush()
+        # As if the first attempt committed but timed out: the same rows go again
+        buffer._pending = rows
+        await buffer.flush()
+
+    asyncio.run(scenario())
+    assert [row["content"] for row in _stored(client, user_id)] == ["once"]
+
+
+def test_rejected_row_is_quarantined_and_the_rest_written(client, user_id, tmp_path):
+    quarantine = tmp_path / "quarantine.jsonl"
+
+    async def scenario():
+        buffer = WriteBehindBuffer("chat_logs", client, flush_ms=60_000, quarantine_path=str(quarantine))
+        for i in range(5):
+            row = _row(user_id, f"m{i}", f"2026-01-01T10:00:0{i}")
+            if i == 3:
+                row["content"] = None  # violates NOT NULL
+            await buffer.add(row)
+        assert await buffer.flush() == 4
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert [row["content"] for row in _stored(client, user_id)] == ["m0", "m1", "m2", "m4"]
+    assert buffer.quarantined == 1 and buffer.failures == 0
+    lines = [json.loads(line) for line in quarantine.read_text().splitlines()]
+    assert [line["row"]["created_at"] for line in lines] == ["2026-01-01T10:00:03"]
+
+
+def test_unreachable_db_requeues_and_backs_off(client, user_id, monkeypatch):
+    async def timeout(query, label):
+        raise TimeoutError(label)
+
+    async def scenario():
+        buffer = WriteBehindBuffer("chat_logs", client, flush_ms=100)
+        await buffer.add(_row(user_id, "later", "2026-01-01T10:00:00"))
+        monkeypatch.setattr(write_behind, "execute_query", timeout)
+        assert await buffer.flush() == 0
+        assert await buffer.flush() == 0
+        assert len(buffer.overlay(user_id=user_id)) == 1
+        assert buffer.backoff() == pytest.approx(0.4)
+
+        monkeypatch.undo()
+        assert await buffer.flush() == 1
+        assert buffer.backoff() == 0
+
+    asyncio.run(scenario())